@@ -0,0 +1,254 @@
+"""
+Deterministic HTML corpus shaped like the two example sites.
+
+AI litigation pages mimic the Caspio markup the AILitCrawler parses (a results
+table, `JumpToNext` pagination link, `dl[data-cb-name=DataCtnr]` blocks and h2/article
+sections); climate pages mimic the FacetWP/Drupal markup ClimateLitCrawler parses.
+The AI litigation data is also served as JSON, the way a client-rendered app
+loads it, for the API crawler (core.api).
+Pages carry site chrome (navigation, scripts, footer) so their size and parse cost
+are close to the real ones. A directory of recorded pages can override any route,
+see `FixtureSite` in bench/fixture_site.py.
+
+    python -m bench.corpus --out bench/recorded     # dump the generated corpus to disk
+"""
+import argparse
+import json
+import os
+import random
+from html import escape
+from typing import Any, Dict, List, Optional, Tuple
+
+WORDS = (
+    "court plaintiff defendant algorithm model data privacy claim motion dismiss "
+    "appeal ruling training copyright liability facial recognition discrimination "
+    "emissions permit agency climate injunction statute review standing remedy "
+    "district circuit federal state settlement order complaint filed pending"
+).split()
+
+
+def _sentence(rng: random.Random, n: int = 14) -> str:
+    words = [rng.choice(WORDS) for _ in range(n)]
+    return " ".join(words).capitalize() + "."
+
+
+def _sentences(rng: random.Random, count: int) -> List[str]:
+    return [_sentence(rng, rng.randint(10, 30)) for _ in range(count)]
+
+
+def _paragraphs(rng: random.Random, count: int) -> str:
+    return "".join(f"<p>{s}</p>" for s in _sentences(rng, count))
+
+
+def _chrome(rng: random.Random, body: str, title: str, weight: int) -> str:
+    nav = "".join(f'<li class="menu-item"><a href="/section/{i}">{escape(_sentence(rng, 2))}</a></li>'
+                  for i in range(weight * 10))
+    scripts = "".join(f'<script src="/static/js/bundle-{i}.js"></script>' for i in range(weight))
+    footer = _paragraphs(rng, weight * 3)
+    return (
+        "<!DOCTYPE html><html><head><meta charset='utf-8'>"
+        f"<title>{escape(title)}</title>"
+        '<link rel="stylesheet" href="/static/css/site.css">'
+        f"{scripts}</head><body>"
+        f'<header><nav><ul class="menu">{nav}</ul></nav></header>'
+        f'<main id="content">{body}</main>'
+        f'<footer class="site-footer">{footer}</footer>'
+        "</body></html>"
+    )
+
+
+def _dl(pairs: Dict[str, str]) -> str:
+    rows = "".join(
+        f'<dt class="cbResultSetListViewDataLabel">{escape(k)}</dt>'
+        f'<dd class="cbResultSetData">{v}</dd>'
+        for k, v in pairs.items()
+    )
+    return f'<dl data-cb-name="DataCtnr">{rows}</dl>'
+
+
+def ai_lit_list_rows(page: int, per_page: int, cases: Optional[int] = None
+                     ) -> Tuple[List[Dict[str, Any]], random.Random]:
+    """
+    Result rows of AI litigation list page `page` (and the page's generator, for the
+    chrome). With `cases`, the last page only lists the cases that exist.
+    """
+    rng = random.Random(f"ai-list-{page}")
+    rows = []
+    offset = (page - 1) * per_page
+    count = per_page if cases is None else max(0, min(per_page, cases - offset))
+    for i in range(count):
+        rows.append({
+            "id": offset + i + 1,
+            "caption": _sentence(rng, 4),
+            "jurisdiction": rng.choice(['Federal', 'State', 'International']),
+            "filed": f"20{rng.randint(10, 24)}-0{rng.randint(1, 9)}-1{rng.randint(0, 9)}",
+        })
+    return rows, rng
+
+
+def ai_lit_list_page(page: int, pages: int, per_page: int, weight: int = 3, cases: Optional[int] = None) -> str:
+    data, rng = ai_lit_list_rows(page, per_page, cases)
+    rows = ["<tr><th>Caption</th><th>Jurisdiction</th><th>Filed</th></tr>"]
+    for row in data:
+        rows.append(
+            f'<tr><td><a href="?caseid={row["id"]}">{escape(row["caption"])}</a></td>'
+            f"<td>{row['jurisdiction']}</td><td>{row['filed']}</td></tr>"
+        )
+    nav = ""
+    if page < pages:
+        nav = (f'<a class="cbResultSetNavigationLinks" data-cb-name="JumpToNext" '
+               f'href="?page={page + 1}">Next</a>')
+    body = (f'<div class="cbResultSetPanel"><table class="cbResultSetTable">{"".join(rows)}</table>'
+            f'<div class="cbResultSetNavigation">{nav}</div></div>')
+    return _chrome(rng, body, f"AI Litigation Database - page {page}", weight)
+
+
+def ai_lit_case(case_id: int) -> Tuple[Dict[str, Any], random.Random]:
+    """
+    Data of AI litigation case `case_id` (and the page's generator, for the chrome).
+    """
+    rng = random.Random(f"ai-case-{case_id}")
+    case: Dict[str, Any] = {
+        "id": case_id,
+        "caption": _sentence(rng, 5),
+        "description": _sentence(rng, 20),
+        "area": rng.choice(["Facial Recognition", "Generative AI", "Hiring"]),
+        "jurisdiction": rng.choice(["Federal", "State"]),
+        "status": rng.choice(["Active", "Inactive", None]),
+        "link": f"https://example.org/case/{case_id}",
+    }
+    case["dockets"] = [{
+        "court": _sentence(rng, 4),
+        "number": f"{rng.randint(1, 9)}:{rng.randint(10, 24)}-cv-{rng.randint(1000, 9999)}",
+        "link": f"https://example.org/docket/{case_id}/{n}",
+    } for n in range(rng.randint(1, 4))]
+    case["documents"] = [{
+        "document": _sentence(rng, 6),
+        "date": f"20{rng.randint(10, 24)}-0{rng.randint(1, 9)}-2{rng.randint(0, 8)}",
+        "link": f"https://example.org/doc/{case_id}/{n}.pdf",
+    } for n in range(rng.randint(2, 8))]
+    case["facts"] = _sentences(rng, rng.randint(3, 10))
+    case["significance"] = _sentences(rng, rng.randint(1, 4))
+    return case, rng
+
+
+def ai_lit_detail_page(case_id: int, weight: int = 3) -> str:
+    case, rng = ai_lit_case(case_id)
+    head = _dl({
+        "Caption": escape(case["caption"]),
+        "Brief Description": escape(case["description"]),
+        "Area of Application": escape(case["area"]),
+        "Jurisdiction": case["jurisdiction"],
+        "Status": case["status"] or "\xa0",
+        "Case Link": f'<a href="{case["link"]}">Docket</a>',
+    })
+    dockets = "".join(_dl({
+        "Court": escape(d["court"]),
+        "Number": d["number"],
+        "Link": f'<a href="{d["link"]}">PACER</a>',
+    }) for d in case["dockets"])
+    documents = "".join(_dl({
+        "Document": escape(d["document"]),
+        "Date": d["date"],
+        "Link": f'<a href="{d["link"]}">PDF</a>',
+    }) for d in case["documents"])
+    facts = "".join(f"<p>{s}</p>" for s in case["facts"])
+    significance = "".join(f"<p>{s}</p>" for s in case["significance"])
+    body = (
+        f"{head}"
+        f"<h2>Summary of Facts and Activity to Date</h2><article>{facts}</article>"
+        f"<h2>Summary of Significance</h2><article>{significance}</article>"
+        f"<h2>Dockets</h2><article>{dockets}</article>"
+        f"<h2>Documents</h2><article>{documents}</article>"
+    )
+    return _chrome(rng, body, f"Case {case_id}", weight)
+
+
+def ai_lit_api_list(page: int, pages: int, per_page: int, cases: Optional[int] = None) -> str:
+    """
+    JSON of list page `page` as a client-side app would load it: rows plus pagination.
+    """
+    rows, _ = ai_lit_list_rows(page, per_page, cases)
+    return json.dumps({
+        "page": page,
+        "pages": pages,
+        "next": f"/api/ai-lit/cases?page={page + 1}" if page < pages else None,
+        "results": rows,
+    })
+
+
+def ai_lit_api_case(case_id: int) -> str:
+    return json.dumps({"case": ai_lit_case(case_id)[0]})
+
+
+def ai_lit_app_page(weight: int = 3) -> str:
+    """
+    Client-rendered variant of the list page: an empty table filled from the JSON API.
+    """
+    rng = random.Random("ai-app")
+    body = ('<div class="cbResultSetPanel"><table class="cbResultSetTable" id="results"></table></div>'
+            "<script>fetch('/api/ai-lit/cases?page=1').then(r => r.json()).then(data => {"
+            "const t = document.getElementById('results');"
+            "data.results.forEach(c => { const tr = t.insertRow(); tr.insertCell().textContent = c.caption; });"
+            "return fetch('/api/ai-lit/case/' + data.results[0].id); });</script>")
+    return _chrome(rng, body, "AI Litigation Database", weight)
+
+
+def climate_list_page(cases: int, weight: int = 3) -> str:
+    rng = random.Random("climate-list")
+    cards = "".join(
+        f'<article class="case_bundle"><h2 class="entry-title">'
+        f'<a href="/climate/case/{n}/">{escape(_sentence(rng, 5))}</a></h2>'
+        f'<div class="entry-summary">{_paragraphs(rng, 1)}</div></article>'
+        for n in range(1, cases + 1)
+    )
+    return _chrome(rng, f'<div class="facetwp-template">{cards}</div>', "Climate Case Chart search", weight)
+
+
+def climate_detail_page(case_id: int, weight: int = 3) -> str:
+    rng = random.Random(f"climate-case-{case_id}")
+
+    def field(name: str, value: str) -> str:
+        return f'<div class="field field--name-field-{name}"><span class="highlight">{escape(value)}</span></div>'
+
+    body = (
+        f'<h1 class="entry-title">{escape(_sentence(rng, 6))}</h1>'
+        + field("filed", f"20{rng.randint(10, 24)}-0{rng.randint(1, 9)}-1{rng.randint(0, 9)}")
+        + field("status", rng.choice(["Pending", "Decided", "Dismissed"]))
+        + field("court", _sentence(rng, 4))
+        + f'<div class="field field--name-field-summary">{_paragraphs(rng, rng.randint(2, 8))}</div>'
+    )
+    return _chrome(rng, body, f"Climate case {case_id}", weight)
+
+
+def routes(cases: int, per_page: int, weight: int = 3) -> Dict[str, str]:
+    """
+    Every page of the fixture site keyed by its path + query, for dumping to disk.
+    """
+    pages = max(1, -(-cases // per_page))
+    out: Dict[str, str] = {}
+    for p in range(1, pages + 1):
+        out[f"ai-lit/list-{p}.html"] = ai_lit_list_page(p, pages, per_page, weight, cases)
+    for n in range(1, cases + 1):
+        out[f"ai-lit/case-{n}.html"] = ai_lit_detail_page(n, weight)
+        out[f"climate/case-{n}.html"] = climate_detail_page(n, weight)
+    out["climate/search.html"] = climate_list_page(cases, weight)
+    return out
+
+
+def main(argv: List[str] = None) -> None:
+    p = argparse.ArgumentParser(description="Write the generated benchmark corpus to a directory")
+    p.add_argument("--out", required=True)
+    p.add_argument("--cases", type=int, default=100)
+    p.add_argument("--per-page", type=int, default=25)
+    args = p.parse_args(argv)
+    for rel, html in routes(args.cases, args.per_page).items():
+        path = os.path.join(args.out, rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as fh:
+            fh.write(html)
+    print(f"Wrote corpus to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Browser-free variants of the example crawlers for the benchmark.
+
+They reuse the real parse_list/parse_detail code and only replace the WebDriver
+list/detail navigation with the pooled HTTP fetcher, so parser changes in
+examples/ show up in the numbers.
+"""
+from typing import Iterator, List
+from urllib.parse import urljoin
+
+from core.utils import RetryPolicy, call_with_retry
+from examples.ai_lit_crawler import AILitCrawler
+from examples.climate_lit_crawler import ClimateLitCrawler
+
+LIST_RETRY = RetryPolicy(times=5, backoff=0.01)
+
+
+class HttpAILitCrawler(AILitCrawler):
+    uses_browser = False
+
+    def fetch_list(self) -> Iterator[str]:
+        url = self.base_url
+        max_pages = self.config.get("pagination", {}).get("max_pages", 1)
+        for _ in range(max_pages):
+            html = call_with_retry(self.fetch_page, url, policy=LIST_RETRY)
+            if not html:
+                break
+            yield html
+            nxt = self.soup(html).select_one('a.cbResultSetNavigationLinks[data-cb-name="JumpToNext"]')
+            if nxt is None or not nxt.get("href"):
+                break
+            url = urljoin(url, nxt["href"])
+
+    def fetch_detail(self, url: str) -> str:
+        return self.fetch_page(url)
+
+
+class HttpClimateLitCrawler(ClimateLitCrawler):
+    uses_browser = False
+
+    def fetch_list(self) -> List[str]:
+        html = call_with_retry(self.fetch_page, self.config["start_url"], policy=LIST_RETRY)
+        return [html] if html else []
+
+    def fetch_detail(self, url: str) -> str:
+        return self.fetch_page(url)
@@ -0,0 +1,209 @@
+"""
+Local HTTP server that serves the benchmark corpus with optional latency and error injection.
+
+Routes:
+    /ai-lit/                 AI litigation list page 1
+    /ai-lit/?page=N          list page N (has a JumpToNext link unless it is the last page)
+    /ai-lit/?caseid=N        case detail page
+    /climate/search/         climate list page
+    /climate/case/N/         climate case detail page
+    /ai-lit-app/             client-rendered list page that loads the JSON API below
+    /api/ai-lit/cases?page=N JSON list page (rows + next link)
+    /api/ai-lit/case/N       JSON case
+
+    python -m bench.fixture_site --port 8800 --latency 0.05 --error-rate 0.02
+"""
+import argparse
+import hashlib
+import os
+import random
+import threading
+import time
+from email.utils import formatdate
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from . import corpus
+
+STARTED = formatdate(time.time(), usegmt=True)
+
+
+class FixtureSite:
+    """
+    Serves the corpus on 127.0.0.1 from a background thread.
+
+    - latency: mean added delay per response in seconds (uniform +/- 50%)
+    - error_rate: fraction of requests answered with 503 + Retry-After: 0
+    - recorded_dir: directory of recorded pages (same layout as `bench.corpus --out`)
+      that replaces generated pages where present
+    """
+
+    def __init__(self, cases: int = 100, per_page: int = 25, latency: float = 0.0, error_rate: float = 0.0,
+                 weight: int = 3, recorded_dir: Optional[str] = None, port: int = 0, seed: int = 0):
+        self.cases = cases
+        self.per_page = per_page
+        self.pages = max(1, -(-cases // per_page))
+        self.latency = latency
+        self.error_rate = error_rate
+        self.weight = weight
+        self.recorded_dir = recorded_dir
+        self.requests = 0
+        self.errors = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.page = lru_cache(maxsize=4096)(self._page)
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self.server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def port(self) -> int:
+        return self.server.server_address[1]
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def _recorded(self, rel: str) -> Optional[str]:
+        if not self.recorded_dir:
+            return None
+        path = os.path.join(self.recorded_dir, rel)
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as fh:
+                return fh.read()
+        return None
+
+    def _page(self, path: str, query: str) -> Optional[str]:
+        params = parse_qs(query)
+        if path == "/ai-lit/":
+            if "caseid" in params:
+                n = int(params["caseid"][0])
+                if not 1 <= n <= self.cases:
+                    return None
+                return self._recorded(f"ai-lit/case-{n}.html") or corpus.ai_lit_detail_page(n, self.weight)
+            p = int(params.get("page", ["1"])[0])
+            if not 1 <= p <= self.pages:
+                return None
+            return (self._recorded(f"ai-lit/list-{p}.html")
+                    or corpus.ai_lit_list_page(p, self.pages, self.per_page, self.weight, self.cases))
+        if path == "/ai-lit-app/":
+            return corpus.ai_lit_app_page(self.weight)
+        if path == "/api/ai-lit/cases":
+            p = int(params.get("page", ["1"])[0])
+            if not 1 <= p <= self.pages:
+                return None
+            return corpus.ai_lit_api_list(p, self.pages, self.per_page, self.cases)
+        if path.startswith("/api/ai-lit/case/"):
+            try:
+                n = int(path.rsplit("/", 1)[-1])
+            except ValueError:
+                return None
+            if not 1 <= n <= self.cases:
+                return None
+            return corpus.ai_lit_api_case(n)
+        if path == "/climate/search/":
+            return self._recorded("climate/search.html") or corpus.climate_list_page(self.cases, self.weight)
+        if path.startswith("/climate/case/"):
+            try:
+                n = int(path.strip("/").split("/")[-1])
+            except ValueError:
+                return None
+            if not 1 <= n <= self.cases:
+                return None
+            return self._recorded(f"climate/case-{n}.html") or corpus.climate_detail_page(n, self.weight)
+        return None
+
+    def _decide(self) -> Tuple[float, bool]:
+        with self._lock:
+            self.requests += 1
+            delay = self.latency * self._rng.uniform(0.5, 1.5) if self.latency else 0.0
+            fail = self.error_rate > 0 and self._rng.random() < self.error_rate
+            if fail:
+                self.errors += 1
+        return delay, fail
+
+    def _handler(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, fmt, *args):
+                pass
+
+            def _send(self, status: int, body: bytes = b"", headers: Optional[dict] = None) -> None:
+                self.send_response(status)
+                for k, v in (headers or {}).items():
+                    self.send_header(k, v)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if self.command != "HEAD":
+                    self.wfile.write(body)
+
+            def do_GET(self):
+                delay, fail = site._decide()
+                if delay:
+                    time.sleep(delay)
+                if fail:
+                    self._send(503, b"unavailable", {"Retry-After": "0"})
+                    return
+                parts = urlsplit(self.path)
+                html = site.page(parts.path, parts.query)
+                if html is None:
+                    self._send(404, b"not found")
+                    return
+                body = html.encode("utf-8")
+                etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+                if self.headers.get("If-None-Match") == etag:
+                    self._send(304, headers={"ETag": etag})
+                    return
+                ctype = "application/json" if parts.path.startswith("/api/") else "text/html; charset=utf-8"
+                self._send(200, body, {
+                    "Content-Type": ctype,
+                    "ETag": etag,
+                    "Last-Modified": STARTED,
+                })
+
+            do_HEAD = do_GET
+
+        return Handler
+
+    def start(self) -> "FixtureSite":
+        self._thread = threading.Thread(target=self.server.serve_forever, name="fixture-site", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self) -> "FixtureSite":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="Serve the benchmark fixture site")
+    p.add_argument("--port", type=int, default=8800)
+    p.add_argument("--cases", type=int, default=100)
+    p.add_argument("--per-page", type=int, default=25)
+    p.add_argument("--latency", type=float, default=0.0)
+    p.add_argument("--error-rate", type=float, default=0.0)
+    p.add_argument("--recorded-dir")
+    args = p.parse_args()
+    site = FixtureSite(cases=args.cases, per_page=args.per_page, latency=args.latency,
+                       error_rate=args.error_rate, recorded_dir=args.recorded_dir, port=args.port)
+    print(f"Serving fixture site on {site.base_url} (Ctrl-C to stop)")
+    try:
+        site.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
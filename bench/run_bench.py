@@ -0,0 +1,329 @@
+"""
+Offline crawl benchmark.
+
+Starts the local fixture site (bench/fixture_site.py), then runs every
+(site, fetch mode, parser backend) scenario in its own subprocess so peak RSS is
+measured per scenario. Reports pages/sec, per-stage latency percentiles, parse
+time per page and peak RSS (of the scenario process and of its largest parse
+worker process), optionally as JSON, and can fail when throughput
+regresses against a saved baseline.
+
+    python -m bench.run_bench
+    python -m bench.run_bench --modes http http-cached --backends lxml --cases 300 --latency 0.02
+    python -m bench.run_bench --json bench_output.json --baseline bench_baseline.json --max-regression 0.15
+
+Fetch modes: http (pooled session), http-cached (second pass over a warm page
+cache), pipeline (http fetch + process-pool parse; parse latency happens in the
+worker processes and is not sampled), browser (real example crawlers through
+Chrome; skipped when no browser is available).
+"""
+import argparse
+import inspect
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows: no getrusage, RSS is not reported
+    resource = None
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+SITES = {
+    "ai_lit": {
+        "http": "bench.crawlers.HttpAILitCrawler",
+        "browser": "examples.ai_lit_crawler.AILitCrawler",
+        "detail_selectors": None,
+    },
+    "climate": {
+        "http": "bench.crawlers.HttpClimateLitCrawler",
+        "browser": "examples.climate_lit_crawler.ClimateLitCrawler",
+        "detail_selectors": {
+            "title": "h1.entry-title",
+            "filed_date": "div.field--name-field-filed span.highlight",
+            "status": "div.field--name-field-status span.highlight",
+            "court": "div.field--name-field-court span.highlight",
+            "description": "div.field--name-field-summary p",
+        },
+    },
+}
+MODES = ("http", "http-cached", "pipeline", "browser")
+BACKENDS = ("html.parser", "lxml", "selectolax")
+
+
+def peak_rss_mb(children: bool = False) -> Optional[float]:
+    """
+    Peak RSS of this process, or of its largest finished child process (e.g. a
+    pipeline parse worker), in MB. None where getrusage is unavailable or no
+    child has exited.
+    """
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF)
+    if not usage.ru_maxrss:
+        return None
+    # Linux reports ru_maxrss in KiB, macOS in bytes
+    return usage.ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def percentiles(values: List[float]) -> Dict[str, Optional[float]]:
+    if not values:
+        return {"p50": None, "p90": None, "p99": None, "mean": None}
+    ordered = sorted(values)
+
+    def pct(q: float) -> float:
+        return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+    return {"p50": pct(0.5), "p90": pct(0.9), "p99": pct(0.99), "mean": sum(ordered) / len(ordered)}
+
+
+class StageTimer:
+    """
+    Wraps crawler methods on an instance and records each call's duration per stage.
+    """
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def wrap(self, crawler, method: str, stage: str) -> None:
+        func = getattr(crawler, method)
+
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+                # generator fetch_list/parse_list: time the whole iteration
+                return list(result) if inspect.isgenerator(result) else result
+            finally:
+                with self._lock:
+                    self.samples.setdefault(stage, []).append(time.perf_counter() - started)
+        setattr(crawler, method, timed)
+
+    def report(self) -> Dict[str, Dict[str, Optional[float]]]:
+        return {stage: dict(percentiles(v), count=len(v)) for stage, v in self.samples.items()}
+
+
+def build_config(scenario: Dict[str, Any], workdir: str) -> Dict[str, Any]:
+    site = SITES[scenario["site"]]
+    base = scenario["base_url"]
+    mode = scenario["mode"]
+    config: Dict[str, Any] = {
+        "crawler_class": site["browser"] if mode == "browser" else site["http"],
+        "parser": {"backend": scenario["backend"]},
+        "http": {"enabled": mode != "browser", "pool_size": max(4, scenario["concurrency"])},
+        "retry": {"times": 5, "backoff": 0.01, "jitter": 0.5},
+        "circuit_breaker": {"enabled": False},
+        "pagination": {"start_page": 1, "max_pages": 10 ** 6},
+        "output_path": os.path.join(workdir, "out.jsonl"),
+        "checkpoint": False,
+    }
+    if scenario["site"] == "ai_lit":
+        config["base_url"] = base + "/ai-lit/"
+    else:
+        config["start_url"] = base + "/climate/search/"
+        config["detail_selectors"] = site["detail_selectors"]
+    if mode == "http-cached":
+        config["cache"] = {"enabled": True, "dir": os.path.join(workdir, "cache"), "ttl": 3600}
+    if mode == "pipeline":
+        config["pipeline"] = {"enabled": True, "queue_size": 64}
+    return config
+
+
+def run_scenario(scenario: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Run one scenario in this process and return its measurements.
+    """
+    from core.crawler import load_crawler_class
+    from core.parser import resolve_backend
+    from core.pipeline import DetailFetcher, run_detail_stage, run_pipeline
+
+    result: Dict[str, Any] = dict(scenario, effective_backend=resolve_backend(scenario["backend"]))
+    workdir = tempfile.mkdtemp(prefix="bench-")
+    config = build_config(scenario, workdir)
+    cls = load_crawler_class(config["crawler_class"])
+    try:
+        crawlers = [cls(config) for _ in range(scenario["concurrency"])]
+    except Exception as e:
+        result["skipped"] = f"cannot start crawler: {e!r}"
+        return result
+
+    timer = StageTimer()
+    for c in crawlers:
+        timer.wrap(c, "fetch_detail_cached", "fetch_detail")
+        timer.wrap(c, "parse_detail", "parse_detail")
+    primary = crawlers[0]
+    timer.wrap(primary, "fetch_list", "fetch_list")
+    timer.wrap(primary, "parse_list", "parse_list")
+
+    try:
+        items = primary.parse_list(primary.fetch_list())
+
+        def detail_pass() -> Dict[str, Any]:
+            fetch = DetailFetcher(config)
+            if scenario["mode"] == "pipeline":
+                stage = run_pipeline(crawlers, items, config, fetch)
+            else:
+                stage = run_detail_stage(crawlers, items, fetch)
+            started = time.perf_counter()
+            records = errors = 0
+            for _, _, recs, error in stage:
+                records += len(recs)
+                errors += 1 if error else 0
+            return {"seconds": time.perf_counter() - started, "records": records, "errors": errors}
+
+        if scenario["mode"] == "http-cached":
+            detail_pass()  # warm the cache
+            timer.samples.pop("fetch_detail", None)
+            timer.samples.pop("parse_detail", None)
+        detail = detail_pass()
+    finally:
+        for c in crawlers:
+            try:
+                c.quit_driver()
+            except Exception:
+                pass
+
+    result.update(
+        items=len(items),
+        records=detail["records"],
+        errors=detail["errors"],
+        detail_seconds=detail["seconds"],
+        pages_per_sec=len(items) / detail["seconds"] if detail["seconds"] else None,
+        stages=timer.report(),
+        peak_rss_mb=peak_rss_mb(),
+        # parse workers run in their own processes (pipeline mode)
+        worker_peak_rss_mb=peak_rss_mb(children=True),
+    )
+    return result
+
+
+def run_in_subprocess(scenario: Dict[str, Any]) -> Dict[str, Any]:
+    proc = subprocess.run(
+        [sys.executable, "-m", "bench.run_bench", "--scenario", json.dumps(scenario)],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    lines = [l for l in proc.stdout.splitlines() if l.startswith("{")]
+    if proc.returncode != 0 or not lines:
+        return dict(scenario, skipped=f"scenario failed: {proc.stderr.strip().splitlines()[-1:] or proc.returncode}")
+    return json.loads(lines[-1])
+
+
+def scenario_key(r: Dict[str, Any]) -> str:
+    return f"{r['site']}/{r['mode']}/{r['backend']}"
+
+
+def fmt_ms(v: Optional[float]) -> str:
+    return "-" if v is None else f"{v * 1000:.1f}"
+
+
+def fmt_mb(v: Optional[float]) -> str:
+    return "-" if v is None else f"{v:.1f}"
+
+
+def print_table(results: List[Dict[str, Any]]) -> None:
+    header = (f"{'scenario':38} {'pages':>5} {'pages/s':>8} {'fetch p50/p90/p99 ms':>22} "
+              f"{'parse p50/p90/p99 ms':>22} {'parse ms/pg':>11} {'RSS MB':>7} {'wkr MB':>7} {'err':>4}")
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        key = scenario_key(r)
+        if r.get("skipped"):
+            print(f"{key:38} skipped: {r['skipped']}")
+            continue
+        f = r["stages"].get("fetch_detail", {})
+        p = r["stages"].get("parse_detail", {})
+        print(f"{key:38} {r['items']:>5} {r['pages_per_sec']:>8.1f} "
+              f"{fmt_ms(f.get('p50')) + '/' + fmt_ms(f.get('p90')) + '/' + fmt_ms(f.get('p99')):>22} "
+              f"{fmt_ms(p.get('p50')) + '/' + fmt_ms(p.get('p90')) + '/' + fmt_ms(p.get('p99')):>22} "
+              f"{fmt_ms(p.get('mean')):>11} {fmt_mb(r['peak_rss_mb']):>7} "
+              f"{fmt_mb(r.get('worker_peak_rss_mb')):>7} {r['errors']:>4}")
+    for r in results:
+        if r.get("skipped"):
+            continue
+        for stage in ("fetch_list", "parse_list"):
+            s = r["stages"].get(stage)
+            if s:
+                print(f"  {scenario_key(r)} {stage}: {s['count']} call(s), total {fmt_ms(s['mean'] * s['count'])} ms")
+
+
+def check_regressions(results: List[Dict[str, Any]], baseline_path: str, max_regression: float) -> List[str]:
+    with open(baseline_path, "r", encoding="utf-8") as fh:
+        baseline = {scenario_key(r): r for r in json.load(fh).get("results", [])}
+    failures = []
+    for r in results:
+        old = baseline.get(scenario_key(r))
+        if r.get("skipped") or not old or old.get("skipped") or not old.get("pages_per_sec"):
+            continue
+        floor = old["pages_per_sec"] * (1 - max_regression)
+        if r["pages_per_sec"] < floor:
+            failures.append(f"{scenario_key(r)}: {r['pages_per_sec']:.1f} pages/s < {floor:.1f} "
+                            f"(baseline {old['pages_per_sec']:.1f})")
+    return failures
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Offline crawler benchmark against a local fixture site")
+    p.add_argument("--sites", nargs="+", default=list(SITES), choices=list(SITES))
+    p.add_argument("--modes", nargs="+", default=["http", "http-cached", "pipeline"], choices=MODES)
+    p.add_argument("--backends", nargs="+", default=["html.parser", "lxml"], choices=BACKENDS)
+    p.add_argument("--cases", type=int, default=100, help="detail pages per scenario")
+    p.add_argument("--per-page", type=int, default=25, help="items per AI-lit list page")
+    p.add_argument("--concurrency", type=int, default=4)
+    p.add_argument("--latency", type=float, default=0.01, help="mean injected latency (s)")
+    p.add_argument("--error-rate", type=float, default=0.0, help="fraction of 503 responses")
+    p.add_argument("--weight", type=int, default=3, help="page size multiplier (site chrome)")
+    p.add_argument("--recorded-dir", help="recorded pages overriding the generated corpus")
+    p.add_argument("--json", help="write results to this JSON file")
+    p.add_argument("--baseline", help="JSON file from an earlier --json run to compare against")
+    p.add_argument("--max-regression", type=float, default=0.2,
+                   help="allowed pages/s drop vs baseline before failing (fraction)")
+    p.add_argument("--scenario", help=argparse.SUPPRESS)
+    return p.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    if args.scenario:
+        print(json.dumps(run_scenario(json.loads(args.scenario))))
+        return 0
+
+    from bench.fixture_site import FixtureSite
+
+    results = []
+    with FixtureSite(cases=args.cases, per_page=args.per_page, latency=args.latency,
+                     error_rate=args.error_rate, weight=args.weight, recorded_dir=args.recorded_dir) as site:
+        for site_name in args.sites:
+            for mode in args.modes:
+                for backend in args.backends:
+                    scenario = {
+                        "site": site_name, "mode": mode, "backend": backend, "cases": args.cases,
+                        "concurrency": args.concurrency, "base_url": site.base_url,
+                    }
+                    print(f"running {scenario_key(scenario)} ...", file=sys.stderr)
+                    results.append(run_in_subprocess(scenario))
+        served = {"requests": site.requests, "injected_errors": site.errors}
+
+    print_table(results)
+    print(f"fixture site: {served['requests']} requests, {served['injected_errors']} injected errors")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump({"settings": vars(args), "results": results}, fh, indent=2)
+    if args.baseline:
+        failures = check_regressions(results, args.baseline, args.max_regression)
+        for f in failures:
+            print("REGRESSION " + f)
+        if failures:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,345 @@
+"""
+JSON API crawling: find the XHR/fetch endpoints a client-rendered site loads its
+data from, then crawl those endpoints directly instead of rendering pages.
+
+    python -m core.api -c examples/ai_lit_config.yaml --out data/ai_lit.endpoints.json
+
+opens the config's list page (or `--url` pages) in Chrome with DevTools
+performance logging, collects the JSON responses it receives and prints the
+endpoints with their shape and a suggested `api:` block. A config with
+`crawler_class: core.api.ApiCrawler` and that block then runs without a browser.
+"""
+import argparse
+import json
+import re
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+
+import yaml
+
+from .crawler import BaseCrawler
+from .utils import RetryPolicy, call_with_retry, logger
+
+JSON_MIME = re.compile(r"[/+]json\b|^text/javascript", re.I)
+_PATH_PART = re.compile(r"\[(\d+)\]")
+
+
+def dig(data: Any, path: Optional[str]) -> Any:
+    """
+    Value at a dotted path (`results`, `case.court.name`, `items.0.id` or `items[0].id`);
+    None if any step is missing. An empty path returns `data`.
+    """
+    if not path:
+        return data
+    for part in _PATH_PART.sub(r".\1", path).split("."):
+        if isinstance(data, dict):
+            data = data.get(part)
+        elif isinstance(data, list) and part.isdigit() and int(part) < len(data):
+            data = data[int(part)]
+        else:
+            return None
+        if data is None:
+            return None
+    return data
+
+
+class ApiCrawler(BaseCrawler):
+    """
+    Crawler for JSON endpoints, over the pooled HTTP client (no browser):
+
+    api:
+      list:
+        url: https://example.org/api/cases?page={page}   # {page} for numbered pages
+        start_page: 1
+        max_pages: 100
+        items: results          # path to the array of rows in a list response
+        next: next              # path to the next page's URL (instead of {page}); null ends
+      detail:
+        url: /api/case/{id}     # template over the row's fields (relative to list.url)
+        # url_field: links.self # or: path to the detail URL in the row
+        record: case            # path to the record in a detail response
+      fields:                   # output column -> path in the record (default: the whole record)
+        Caption: caption
+        Jurisdiction: court.jurisdiction
+        Dockets: dockets        # arrays/objects are kept as they are
+        Summary: {path: facts, join: "\\n"}    # join an array of strings
+      empty: "NA"               # value of fields missing from a record (default null)
+
+    Pagination stops at `max_pages`, at a page without rows, or when `next` is
+    null. Requests go through the page cache, rate limiter and retries like
+    any other fetch; `http.headers` adds request headers (e.g. an API key).
+    """
+
+    def __init__(self, config: Dict[str, Any]):
+        config = dict(config or {})
+        http = dict(config.get("http") or {})
+        http.update(enabled=True, ready_selector=None)
+        http["headers"] = dict({"Accept": "application/json, text/plain, */*"}, **(http.get("headers") or {}))
+        config["http"] = http
+        super().__init__(config)
+        if not (self.api.get("list") or {}).get("url"):
+            raise KeyError("api.list.url is missing in config")
+
+    @property
+    def api(self) -> Dict[str, Any]:
+        return self.config.get("api") or {}
+
+    def fetch_json_text(self, url: str) -> str:
+        """
+        Response body of `url` ("" if it could not be fetched), with the configured retries.
+        """
+        policy = RetryPolicy.from_config(dict({"backoff": 1.0}, **(self.config.get("retry") or {})))
+        return call_with_retry(self.fetch_page, url, policy=policy) or ""
+
+    def fetch_list(self) -> Iterator[str]:
+        cfg = self.api["list"]
+        items_path = cfg.get("items")
+        numbered = "{page}" in cfg["url"]
+        page = int(cfg.get("start_page", 1))
+        url = cfg["url"].format(page=page) if numbered else cfg["url"]
+        for _ in range(int(cfg.get("max_pages", 100))):
+            text = self.fetch_json_text(url)
+            if not text:
+                break
+            try:
+                data = json.loads(text)
+            except ValueError:
+                logger.warning("List response from %s is not JSON; stopping pagination: %s", url, text[:200])
+                break
+            yield text
+            if not dig(data, items_path):
+                break
+            if cfg.get("next"):
+                nxt = dig(data, cfg["next"])
+                if not nxt:
+                    break
+                url = urljoin(url, str(nxt))
+            elif numbered:
+                page += 1
+                url = cfg["url"].format(page=page)
+            else:
+                break
+
+    def detail_url(self, row: Any) -> Optional[str]:
+        """
+        Detail endpoint of one list row, from `detail.url_field` or the `detail.url` template.
+        """
+        cfg = self.api.get("detail") or {}
+        if cfg.get("url_field"):
+            url = dig(row, cfg["url_field"])
+        elif cfg.get("url") and isinstance(row, dict):
+            try:
+                url = cfg["url"].format(**row)
+            except (KeyError, IndexError) as e:
+                logger.warning("Row has no field %s for the detail URL: %s", e, str(row)[:200])
+                return None
+        else:
+            url = row if isinstance(row, str) else None
+        return urljoin(self.api["list"]["url"], str(url)) if url else None
+
+    def parse_list(self, html_list: Iterable[str]) -> Iterator[str]:
+        items_path = self.api["list"].get("items")
+        for text in html_list:
+            try:
+                rows = dig(json.loads(text), items_path) or []
+            except ValueError:
+                logger.warning("List response is not JSON: %s", text[:200])
+                continue
+            for row in rows:
+                url = self.detail_url(row)
+                if url:
+                    yield url
+
+    def fetch_detail(self, url: str) -> str:
+        return self.fetch_page(url)
+
+    def map_record(self, record: Any) -> Dict[str, Any]:
+        fields = self.api.get("fields")
+        if not fields:
+            return record if isinstance(record, dict) else {"value": record}
+        empty = self.api.get("empty")
+        out: Dict[str, Any] = {}
+        for column, spec in fields.items():
+            if isinstance(spec, str):
+                spec = {"path": spec}
+            value = dig(record, spec.get("path") or column)
+            if spec.get("join") is not None and isinstance(value, list):
+                value = str(spec["join"]).join(str(v) for v in value)
+            out[column] = empty if value is None or value == "" else value
+        return out
+
+    def parse_detail(self, html_detail: str) -> Any:
+        record = dig(json.loads(html_detail), (self.api.get("detail") or {}).get("record"))
+        if isinstance(record, list):
+            return [self.map_record(r) for r in record]
+        if record is None:
+            return []
+        return self.map_record(record)
+
+
+# ---- discovery ---------------------------------------------------------------
+
+def json_responses(messages: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    JSON responses to XHR/fetch requests in DevTools `Network.*` events (the
+    `message` objects of Chrome's performance log), in the order they arrived.
+    """
+    requests: Dict[str, Dict[str, Any]] = {}
+    found: List[Dict[str, Any]] = []
+    for msg in messages:
+        method, params = msg.get("method"), msg.get("params") or {}
+        if method == "Network.requestWillBeSent":
+            req = params.get("request") or {}
+            requests[params.get("requestId")] = {"method": req.get("method", "GET"),
+                                                 "post_data": req.get("postData")}
+        elif method == "Network.responseReceived":
+            resp = params.get("response") or {}
+            kind = params.get("type")
+            mime = resp.get("mimeType") or ""
+            if kind not in ("XHR", "Fetch") and not JSON_MIME.search(mime):
+                continue
+            entry = {"url": resp.get("url"), "status": resp.get("status"), "mime": mime, "type": kind,
+                     "request_id": params.get("requestId")}
+            entry.update(requests.get(params.get("requestId")) or {"method": "GET", "post_data": None})
+            found.append(entry)
+    return found
+
+
+def largest_array(data: Any, path: str = "") -> Tuple[Optional[str], List[Any]]:
+    """
+    (path, array) of the longest array of objects in a JSON document.
+    """
+    best: Tuple[Optional[str], List[Any]] = (None, [])
+    if isinstance(data, list):
+        if data and all(isinstance(v, dict) for v in data):
+            best = (path, data)
+        for i, v in enumerate(data[:1]):
+            sub = largest_array(v, f"{path}.{i}" if path else str(i))
+            if len(sub[1]) > len(best[1]):
+                best = sub
+    elif isinstance(data, dict):
+        for k, v in data.items():
+            sub = largest_array(v, f"{path}.{k}" if path else k)
+            if len(sub[1]) > len(best[1]):
+                best = sub
+    return best
+
+
+def describe(body: Any) -> Dict[str, Any]:
+    """
+    Shape of a JSON response: top-level keys and its largest array of objects.
+    """
+    shape: Dict[str, Any] = {"keys": list(body)[:30] if isinstance(body, dict) else None}
+    path, rows = largest_array(body)
+    if len(rows) > 1:
+        shape.update(items=path or "", rows=len(rows), row_keys=list(rows[0])[:30])
+    return shape
+
+
+def suggest_api(endpoints: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    A starting `api:` block: the endpoint with the most rows as the list, and a
+    detail URL template if another endpoint's URL contains a row's field value.
+    """
+    lists = [e for e in endpoints if e.get("shape", {}).get("rows")]
+    if not lists:
+        return {}
+    lst = max(lists, key=lambda e: e["shape"]["rows"])
+    api: Dict[str, Any] = {"list": {"url": lst["url"], "items": lst["shape"]["items"]}}
+    body = lst.get("body")
+    if isinstance(body, dict):
+        for key in ("next", "next_page", "nextPage", "links.next", "paging.next"):
+            if dig(body, key) is not None:
+                api["list"]["next"] = key
+                break
+    rows = dig(body, lst["shape"]["items"]) or []
+    first = rows[0] if rows and isinstance(rows[0], dict) else {}
+    for other in endpoints:
+        if other is lst:
+            continue
+        parts = urlsplit(other["url"])
+        for key, value in first.items():
+            if not isinstance(value, (str, int)) or isinstance(value, bool) or str(value) == "":
+                continue
+            # the value as a whole path segment only (not inside the host)
+            pattern = rf"(?<![\w-]){re.escape(str(value))}(?![\w-])"
+            if re.search(pattern, parts.path):
+                path = re.sub(pattern, "{%s}" % key, parts.path, count=1)
+                same_host = parts.netloc == urlsplit(lst["url"]).netloc
+                url = parts._replace(path=path)
+                api["detail"] = {"url": (url._replace(scheme="", netloc="") if same_host else url).geturl()}
+                shape = other.get("shape") or {}
+                if shape.get("keys") and len(shape["keys"]) == 1:
+                    api["detail"]["record"] = shape["keys"][0]
+                return api
+    return api
+
+
+def discover(config: Dict[str, Any], urls: List[str], settle: float = 3.0) -> List[Dict[str, Any]]:
+    """
+    Load `urls` in Chrome with performance logging and return the JSON endpoints
+    they called, each with its response `shape` (and `body`).
+    """
+    from .browser import create_driver, wait_ready
+
+    config = dict(config)
+    config["browser"] = dict(config.get("browser") or {}, performance_log=True)
+    driver = create_driver(config)
+    endpoints: List[Dict[str, Any]] = []
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        for url in urls:
+            logger.info("Recording network traffic of %s", url)
+            driver.get(url)
+            wait_ready(driver, (config.get("browser") or {}).get("ready_selector"))
+            time.sleep(settle)
+            messages = [json.loads(e["message"])["message"] for e in driver.get_log("performance")]
+            for entry in json_responses(messages):
+                try:
+                    raw = driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": entry["request_id"]})
+                    entry["body"] = json.loads(raw.get("body") or "null")
+                except Exception as e:
+                    logger.debug("No JSON body for %s: %s", entry["url"], e)
+                    continue
+                entry["shape"] = describe(entry["body"])
+                endpoints.append(entry)
+    finally:
+        driver.quit()
+    return endpoints
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="Find the JSON endpoints behind a client-rendered site")
+    p.add_argument("-c", "--config", required=True, help="YAML config (browser: block, list URL)")
+    p.add_argument("--url", action="append", help="page to record (repeatable; default: the config's list URL)")
+    p.add_argument("--wait", type=float, default=3.0, help="seconds to let each page make its requests")
+    p.add_argument("--out", help="write the endpoints (with response bodies) to this JSON file")
+    args = p.parse_args()
+    with open(args.config, "r", encoding="utf-8") as fh:
+        config = yaml.safe_load(fh) or {}
+    urls = args.url or [u for u in (config.get("list_url") or config.get("start_url") or config.get("base_url"),) if u]
+    start_page = (config.get("pagination") or {}).get("start_page", 1)
+    urls = [u.replace("{page}", str(start_page)) for u in urls]
+    if not urls:
+        raise SystemExit("No page to record: pass --url")
+    endpoints = discover(config, urls, args.wait)
+    if not endpoints:
+        print("No JSON XHR/fetch responses recorded.")
+        return
+    for e in endpoints:
+        shape = e["shape"]
+        rows = f"{shape['rows']} rows at '{shape['items']}': {shape['row_keys']}" if shape.get("rows") else shape["keys"]
+        print(f"{e['method']} {e['status']} {e['url']}\n    {rows}")
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as fh:
+            json.dump(endpoints, fh, indent=2, ensure_ascii=False, default=str)
+        print(f"Wrote {args.out}")
+    api = suggest_api(endpoints)
+    if api:
+        print("\nSuggested config (crawler_class: core.api.ApiCrawler):\n")
+        print(yaml.safe_dump({"api": api}, sort_keys=False, allow_unicode=True))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+import mmap
+import os
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .utils import ensure_parent_dir, logger, normalize_url
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+LIST = "list"
+DETAIL = "detail"
+
+
+def _lock_file(fh) -> None:
+    """
+    Take an exclusive lock on an open file (blocking), so appends from several
+    processes do not interleave.
+    """
+    if fcntl is not None:
+        fcntl.flock(fh, fcntl.LOCK_EX)
+        return
+    # msvcrt locks a byte range from the current position; lock the first byte
+    fh.seek(0)
+    while True:
+        try:
+            msvcrt.locking(fh.fileno(), msvcrt.LK_LOCK, 1)
+            return
+        except OSError:  # LK_LOCK gives up after ~10 s
+            continue
+
+
+def _unlock_file(fh) -> None:
+    if fcntl is not None:
+        fcntl.flock(fh, fcntl.LOCK_UN)
+        return
+    fh.seek(0)
+    msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _warc_record(url: str, html: str, kind: str, page: Optional[int], fetched_at: float) -> bytes:
+    """
+    One WARC/1.0 `resource` record (the page as the crawler saw it, rendered or not).
+    """
+    body = html.encode("utf-8")
+    date = datetime.fromtimestamp(fetched_at, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    headers = [
+        "WARC/1.0",
+        "WARC-Type: resource",
+        f"WARC-Record-ID: <urn:uuid:{uuid.uuid4()}>",
+        f"WARC-Date: {date}",
+        f"WARC-Target-URI: {url}",
+        "Content-Type: text/html; charset=utf-8",
+        f"X-Page-Kind: {kind}",
+    ]
+    if page is not None:
+        headers.append(f"X-Page-Number: {page}")
+    headers.append(f"Content-Length: {len(body)}")
+    return ("\r\n".join(headers) + "\r\n\r\n").encode("utf-8") + body + b"\r\n\r\n"
+
+
+def _warc_body(record: bytes) -> str:
+    head, _, rest = record.partition(b"\r\n\r\n")
+    length = len(rest) - 4
+    for line in head.split(b"\r\n"):
+        if line.lower().startswith(b"content-length:"):
+            length = int(line.split(b":", 1)[1])
+            break
+    return rest[:length].decode("utf-8")
+
+
+class PageArchive:
+    """
+    Append-only archive of the raw pages a crawl parsed, for re-parsing offline.
+
+    Pages are WARC/1.0 `resource` records, each its own gzip member, in one
+    `.warc.gz` file (readable by standard WARC tools). A SQLite sidecar
+    (`<path>.idx.sqlite`) maps each URL to the offset and length of its
+    records; appends take an exclusive file lock, so several processes on one
+    host can share an archive. Reads go through a memory map of the file.
+    """
+
+    def __init__(self, path: str, readonly: bool = False):
+        self.path = path
+        self.index_path = path + ".idx.sqlite"
+        self.readonly = readonly
+        self._lock = threading.Lock()
+        self._fh = None
+        self._mmap: Optional[mmap.mmap] = None
+        if readonly:
+            if not os.path.exists(path) or not os.path.exists(self.index_path):
+                raise FileNotFoundError(f"No page archive at {path}")
+            self._db = sqlite3.connect(f"file:{self.index_path}?mode=ro", uri=True, check_same_thread=False)
+            return
+        ensure_parent_dir(path)
+        self._fh = open(path, "ab")
+        self._db = sqlite3.connect(self.index_path, check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS pages (seq INTEGER PRIMARY KEY AUTOINCREMENT, key TEXT NOT NULL,"
+            " url TEXT NOT NULL, kind TEXT NOT NULL, page INTEGER, offset INTEGER NOT NULL,"
+            " length INTEGER NOT NULL, fetched_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS pages_key ON pages(key, seq)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS pages_kind ON pages(kind, seq)")
+        self._db.commit()
+
+    def add(self, url: str, html: str, kind: str = DETAIL, page: Optional[int] = None) -> None:
+        """
+        Append one page and index it.
+        """
+        if not html or not isinstance(html, str):
+            return
+        now = time.time()
+        member = zlib.compressobj(6, zlib.DEFLATED, 31)
+        data = member.compress(_warc_record(url, html, kind, page, now)) + member.flush()
+        with self._lock:
+            _lock_file(self._fh)
+            try:
+                self._fh.seek(0, os.SEEK_END)
+                offset = self._fh.tell()
+                self._fh.write(data)
+                self._fh.flush()
+            finally:
+                _unlock_file(self._fh)
+            self._db.execute(
+                "INSERT INTO pages (key, url, kind, page, offset, length, fetched_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (normalize_url(url), url, kind, page, offset, len(data), now),
+            )
+            self._db.commit()
+
+    def _view(self, end: int = 0) -> mmap.mmap:
+        if self._mmap is not None and end > len(self._mmap):
+            # appended to since it was mapped
+            self._mmap.close()
+            self._mmap = None
+        if self._mmap is None:
+            with open(self.path, "rb") as fh:
+                self._mmap = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._mmap
+
+    def read(self, offset: int, length: int) -> str:
+        """
+        HTML of the record at `offset` (as returned by `entries`).
+        """
+        return _warc_body(zlib.decompress(self._view(offset + length)[offset:offset + length], 31))
+
+    def get(self, url: str) -> Optional[str]:
+        """
+        Latest archived detail HTML for `url`, or None.
+        """
+        row = self.locate(url)
+        return self.read(*row) if row else None
+
+    def entries(self, kind: str = DETAIL) -> List[Tuple[str, int, int]]:
+        """
+        (url, offset, length) of the latest record per URL (list pages: per URL and
+        page number), in the order they were first archived.
+        """
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT url, offset, length FROM pages p JOIN ("
+                "  SELECT MIN(seq) AS first, MAX(seq) AS last FROM pages WHERE kind = ?"
+                "  GROUP BY key, COALESCE(page, -1)"
+                ") g ON p.seq = g.last ORDER BY g.first", (kind,)
+            ).fetchall()
+        return [(url, offset, length) for url, offset, length in rows]
+
+    def locate(self, url: str, kind: str = DETAIL, page: Optional[int] = None) -> Optional[Tuple[int, int]]:
+        """
+        (offset, length) of the latest record of this kind for `url` (and list page number), or None.
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT offset, length FROM pages WHERE key = ? AND kind = ? AND COALESCE(page, -1) = ?"
+                " ORDER BY seq DESC LIMIT 1",
+                (normalize_url(url), kind, -1 if page is None else page),
+            ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def iter_pages(self, kind: str = DETAIL) -> Iterator[Tuple[str, str]]:
+        """
+        (url, html) of `entries(kind)`, read lazily.
+        """
+        for url, offset, length in self.entries(kind):
+            yield url, self.read(offset, length)
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._db.execute("SELECT kind, COUNT(DISTINCT key || '#' || COALESCE(page, -1)) FROM pages GROUP BY kind").fetchall()
+        return {kind: n for kind, n in rows}
+
+    def close(self) -> None:
+        with self._lock:
+            if self._fh is not None:
+                self._fh.close()
+            if self._mmap is not None:
+                self._mmap.close()
+            self._db.close()
+
+
+def default_archive_path(config: Dict[str, Any], output_path: Optional[str] = None) -> str:
+    """
+    `config['archive']['path']`, or `<output dir>/<output stem>.warc.gz`.
+    """
+    cfg = config.get("archive") or {}
+    if cfg.get("path"):
+        return cfg["path"]
+    output = output_path or config.get("output_path") or config.get("output") or "data/output.csv"
+    return os.path.splitext(output)[0] + ".warc.gz"
+
+
+_ARCHIVES: Dict[str, PageArchive] = {}
+_ARCHIVES_LOCK = threading.Lock()
+
+
+def shared_archive(config: Optional[Dict[str, Any]]) -> Optional[PageArchive]:
+    """
+    Return the process-wide PageArchive configured by `config['archive']`, or None if disabled.
+
+    archive:
+      enabled: true
+      path: data/ai_lit.warc.gz   # default <output stem>.warc.gz (+ .idx.sqlite)
+      lists: true                 # also archive list pages, so replay re-runs parse_list
+    """
+    cfg = (config or {}).get("archive") or {}
+    if not cfg.get("enabled", False):
+        return None
+    path = os.path.abspath(default_archive_path(config))
+    with _ARCHIVES_LOCK:
+        archive = _ARCHIVES.get(path)
+        if archive is None:
+            archive = _ARCHIVES[path] = PageArchive(path)
+            logger.info("Archiving fetched pages to %s", path)
+    return archive
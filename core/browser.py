@@ -0,0 +1,267 @@
+import json
+import os
+import threading
+import time
+import urllib.request
+from typing import Any, Dict, List, Optional
+
+from selenium import webdriver
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+from .utils import logger
+
+# CDP's Network.setBlockedURLs only matches URL patterns, so resource types
+# are blocked by their usual file extensions
+RESOURCE_PATTERNS: Dict[str, List[str]] = {
+    "image": ["*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico", "*.avif", "*.bmp"],
+    "font": ["*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot"],
+    "stylesheet": ["*.css"],
+    "media": ["*.mp4", "*.webm", "*.mp3", "*.ogg", "*.wav", "*.m4a", "*.mov"],
+}
+
+# analytics and ad hosts that never carry page content
+TRACKER_PATTERNS = [
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*facebook.net*", "*hotjar.com*", "*connect.facebook.*", "*scorecardresearch.com*",
+]
+
+DEFAULT_ARGUMENTS = ["--disable-gpu", "--no-sandbox", "--disable-dev-shm-usage"]
+
+DEFAULT_DRIVER_CACHE = os.path.join("~", ".cache", "web-crawler-template", "chromedriver.json")
+
+
+def browser_config(config: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    The `browser:` block with defaults applied. `ready_selector` falls back to
+    `http.ready_selector`, since the element that proves a static page complete
+    also proves a rendered one is.
+
+    browser:
+      headless: true
+      page_load_strategy: eager     # normal | eager (DOM ready) | none (return at once);
+                                    # default eager with a ready_selector, else normal
+      disable_images: true
+      block_resources: [image, font, media]   # also: stylesheet
+      block_trackers: true
+      block_urls: ["*.pdf"]                   # extra CDP URL patterns
+      ready_selector: "h1"                    # wait for this element after each navigation
+      list_ready_selector: "table"            # same for list pages (used by the crawlers)
+      ready_timeout: 15
+      implicit_wait: 0
+      arguments: ["--window-size=1280,1024"]
+      driver_path: /usr/local/bin/chromedriver  # skip driver resolution altogether
+      driver_cache: ~/.cache/web-crawler-template/chromedriver.json
+      driver_cache_ttl: 86400                 # seconds before the driver is resolved again
+      daemon:                                 # attach to Chrome kept running by core.browserd
+        enabled: false
+        address: 127.0.0.1:9222
+      performance_log: false                  # record DevTools network events (core.api discovery)
+    """
+    cfg = dict((config or {}).get("browser") or {})
+    if not cfg.get("ready_selector"):
+        cfg["ready_selector"] = ((config or {}).get("http") or {}).get("ready_selector")
+    cfg.setdefault("headless", True)
+    # without a selector to wait for, keep waiting for the full load event
+    cfg.setdefault("page_load_strategy", "eager" if cfg["ready_selector"] else "normal")
+    cfg.setdefault("disable_images", True)
+    cfg.setdefault("block_resources", ["image", "font", "media"])
+    cfg.setdefault("block_trackers", True)
+    cfg.setdefault("block_urls", [])
+    cfg.setdefault("ready_timeout", 15)
+    cfg.setdefault("implicit_wait", 0)
+    cfg.setdefault("arguments", [])
+    cfg.setdefault("driver_cache", DEFAULT_DRIVER_CACHE)
+    cfg.setdefault("driver_cache_ttl", 86400)
+    cfg.setdefault("performance_log", False)
+    cfg["daemon"] = dict(cfg.get("daemon") or {})
+    cfg["daemon"].setdefault("enabled", False)
+    cfg["daemon"].setdefault("address", "127.0.0.1:9222")
+    return cfg
+
+
+def blocked_patterns(cfg: Dict[str, Any]) -> List[str]:
+    patterns: List[str] = []
+    for kind in cfg.get("block_resources") or []:
+        if kind not in RESOURCE_PATTERNS:
+            logger.warning("Unknown resource type to block: %s (known: %s)", kind, ", ".join(RESOURCE_PATTERNS))
+            continue
+        patterns.extend(RESOURCE_PATTERNS[kind])
+    if cfg.get("block_trackers"):
+        patterns.extend(TRACKER_PATTERNS)
+    patterns.extend(cfg.get("block_urls") or [])
+    return list(dict.fromkeys(patterns))
+
+
+def chrome_options(cfg: Dict[str, Any]) -> "webdriver.ChromeOptions":
+    opts = webdriver.ChromeOptions()
+    if cfg.get("headless"):
+        opts.add_argument("--headless=new")
+    for arg in DEFAULT_ARGUMENTS + list(cfg.get("arguments") or []):
+        opts.add_argument(arg)
+    opts.page_load_strategy = cfg.get("page_load_strategy", "eager")
+    if cfg.get("disable_images"):
+        opts.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+    if cfg.get("performance_log"):
+        opts.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    return opts
+
+
+_RESOLVED: Dict[str, Dict[str, Optional[str]]] = {}
+_RESOLVE_LOCK = threading.Lock()
+
+
+def _resolve_online() -> Dict[str, Optional[str]]:
+    """
+    Ask webdriver-manager (when installed) or Selenium Manager for the driver
+    and browser binaries; both may check versions over the network.
+    """
+    try:
+        from webdriver_manager.chrome import ChromeDriverManager
+    except ImportError:
+        from selenium.webdriver.common.selenium_manager import SeleniumManager
+        found = SeleniumManager().binary_paths(["--browser", "chrome"])
+        return {"driver_path": found.get("driver_path"), "browser_path": found.get("browser_path")}
+    return {"driver_path": ChromeDriverManager().install(), "browser_path": None}
+
+
+def resolve_binaries(cfg: Dict[str, Any]) -> Dict[str, Optional[str]]:
+    """
+    chromedriver (and Chrome) paths: `driver_path` from the config, else the
+    on-disk cache written by an earlier run (while younger than `driver_cache_ttl`
+    and the files still exist), else a fresh resolution that is then cached.
+    Resolved once per process; empty paths leave it to Selenium Manager.
+    """
+    if cfg.get("driver_path"):
+        return {"driver_path": cfg["driver_path"], "browser_path": cfg.get("binary")}
+    cache_path = os.path.expanduser(cfg.get("driver_cache") or DEFAULT_DRIVER_CACHE)
+    with _RESOLVE_LOCK:
+        if cache_path in _RESOLVED:
+            return _RESOLVED[cache_path]
+        paths: Dict[str, Optional[str]] = {}
+        try:
+            with open(cache_path, "r", encoding="utf-8") as fh:
+                cached = json.load(fh)
+            fresh = time.time() - float(cached.get("resolved_at", 0)) < float(cfg.get("driver_cache_ttl") or 0)
+            if fresh and os.path.isfile(cached.get("driver_path") or ""):
+                paths = {"driver_path": cached["driver_path"], "browser_path": cached.get("browser_path")}
+        except (OSError, ValueError):
+            pass
+        if not paths:
+            try:
+                paths = _resolve_online()
+            except Exception as e:
+                logger.warning("Could not resolve chromedriver (%s); leaving it to Selenium", e)
+                paths = {"driver_path": None, "browser_path": None}
+            if paths.get("driver_path"):
+                try:
+                    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+                    with open(cache_path, "w", encoding="utf-8") as fh:
+                        json.dump(dict(paths, resolved_at=time.time()), fh)
+                except OSError as e:
+                    logger.debug("Could not write driver cache %s: %s", cache_path, e)
+        if cfg.get("binary"):
+            paths["browser_path"] = cfg["binary"]
+        _RESOLVED[cache_path] = paths
+        return paths
+
+
+def _service(paths: Dict[str, Optional[str]]):
+    """
+    ChromeDriver service for a resolved driver path; without one, Selenium
+    Manager (selenium >= 4.6) locates the driver.
+    """
+    from selenium.webdriver.chrome.service import Service
+    return Service(paths["driver_path"]) if paths.get("driver_path") else Service()
+
+
+def daemon_available(address: str, timeout: float = 1.0) -> bool:
+    """
+    True if a Chrome DevTools endpoint answers at `address` (host:port).
+    """
+    try:
+        with urllib.request.urlopen(f"http://{address}/json/version", timeout=timeout) as resp:
+            return resp.status == 200
+    except OSError:
+        return False
+
+
+class AttachedChrome(webdriver.Chrome):
+    """
+    Session on a Chrome started elsewhere (core.browserd), working in a tab of
+    its own. `quit()` closes that tab and the chromedriver session but leaves
+    the browser running for the next run.
+    """
+
+    def start_session(self, capabilities: dict) -> None:
+        super().start_session(capabilities)
+        self.switch_to.new_window("tab")
+        self.own_handle = self.current_window_handle
+
+    def quit(self) -> None:
+        try:
+            handle = getattr(self, "own_handle", None)
+            if handle and handle in self.window_handles:
+                self.switch_to.window(handle)
+                self.close()
+        except WebDriverException:
+            pass
+        super().quit()
+
+
+def create_driver(config: Optional[Dict[str, Any]]):
+    """
+    Start Chrome configured by the `browser:` block (see `browser_config`) and
+    install the URL blocklist through the DevTools protocol.
+    """
+    cfg = browser_config(config)
+    if cfg["page_load_strategy"] == "none" and not cfg.get("ready_selector"):
+        logger.warning("page_load_strategy 'none' without a ready_selector: pages may be read before they load")
+    paths = resolve_binaries(cfg)
+    daemon = cfg["daemon"]
+    if daemon["enabled"] and daemon_available(daemon["address"]):
+        # the warm browser keeps its own flags; only the load strategy applies per session
+        opts = webdriver.ChromeOptions()
+        opts.debugger_address = daemon["address"]
+        opts.page_load_strategy = cfg.get("page_load_strategy", "eager")
+        if cfg.get("performance_log"):
+            opts.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+        driver = AttachedChrome(service=_service(paths), options=opts)
+        logger.debug("Attached to browser daemon at %s", daemon["address"])
+    else:
+        if daemon["enabled"]:
+            logger.warning("No browser daemon at %s (start it with: python -m core.browserd -c <config>); "
+                           "starting Chrome", daemon["address"])
+        opts = chrome_options(cfg)
+        if paths.get("browser_path"):
+            opts.binary_location = paths["browser_path"]
+        driver = webdriver.Chrome(service=_service(paths), options=opts)
+    driver.implicitly_wait(float(cfg.get("implicit_wait") or 0))
+    patterns = blocked_patterns(cfg)
+    if patterns:
+        try:
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+        except WebDriverException as e:
+            logger.warning("Could not install request blocklist: %s", e)
+    return driver
+
+
+def wait_ready(driver, selector: Optional[str], timeout: float = 15, stale=None) -> bool:
+    """
+    Block until `selector` matches an element (and `stale`, an element of the
+    previous page, is detached). Returns False on timeout instead of raising, so
+    callers can still read whatever has rendered.
+    """
+    wait = WebDriverWait(driver, timeout, poll_frequency=0.05)
+    try:
+        if stale is not None:
+            wait.until(EC.staleness_of(stale))
+        if selector:
+            wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, selector)))
+    except TimeoutException:
+        logger.warning("Timed out after %ss waiting for %r on %s", timeout, selector, driver.current_url)
+        return False
+    return True
@@ -0,0 +1,118 @@
+"""
+Warm browser daemon: keeps one Chrome running with remote debugging enabled so
+short crawls attach to it (`browser.daemon.enabled: true`) instead of
+resolving the driver and cold-starting a browser every time.
+
+    python -m core.browserd -c examples/ai_lit_config.yaml
+
+Chrome gets the flags of the config's `browser:` block (headless, images off,
+extra arguments) and a persistent profile directory, so its disk cache also
+survives between runs. Each attached session works in its own tab.
+"""
+import argparse
+import os
+import shutil
+import signal
+import subprocess
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import yaml
+
+from .browser import DEFAULT_ARGUMENTS, browser_config, daemon_available, resolve_binaries
+from .utils import logger
+
+CHROME_NAMES = ("google-chrome", "google-chrome-stable", "chromium", "chromium-browser", "chrome")
+
+
+def chrome_binary(cfg: Dict[str, Any]) -> Optional[str]:
+    """
+    Chrome executable: `browser.binary`, the path Selenium resolved, or the first one on PATH.
+    """
+    found = resolve_binaries(cfg).get("browser_path")
+    if found and os.path.isfile(found):
+        return found
+    for name in CHROME_NAMES:
+        path = shutil.which(name)
+        if path:
+            return path
+    return None
+
+
+def chrome_command(binary: str, cfg: Dict[str, Any], port: int, profile_dir: str) -> List[str]:
+    cmd = [binary, f"--remote-debugging-port={port}", f"--user-data-dir={os.path.abspath(profile_dir)}",
+           "--no-first-run", "--no-default-browser-check"]
+    if cfg.get("headless"):
+        cmd.append("--headless=new")
+    if cfg.get("disable_images"):
+        cmd.append("--blink-settings=imagesEnabled=false")
+    cmd += DEFAULT_ARGUMENTS + list(cfg.get("arguments") or [])
+    cmd.append("about:blank")
+    return cmd
+
+
+def serve(config: Dict[str, Any], profile_dir: Optional[str] = None, startup_timeout: float = 30) -> int:
+    """
+    Start Chrome for `config` and wait until it exits or the daemon is stopped.
+    Returns Chrome's exit code (0 when stopped by a signal).
+    """
+    cfg = browser_config(config)
+    address = cfg["daemon"]["address"]
+    if daemon_available(address):
+        logger.error("A browser already answers at %s", address)
+        return 1
+    host, _, port = address.rpartition(":")
+    if host not in ("127.0.0.1", "localhost", ""):
+        logger.warning("Chrome only listens on localhost; attach to 127.0.0.1:%s", port)
+    binary = chrome_binary(cfg)
+    if binary is None:
+        logger.error("Chrome not found: set browser.binary in the config")
+        return 1
+    profile_dir = profile_dir or cfg["daemon"].get("profile_dir") or "data/browserd-profile"
+    Path(profile_dir).mkdir(parents=True, exist_ok=True)
+
+    proc = subprocess.Popen(chrome_command(binary, cfg, int(port), profile_dir))
+    deadline = time.monotonic() + startup_timeout
+    while not daemon_available(address):
+        if proc.poll() is not None or time.monotonic() > deadline:
+            logger.error("Chrome did not open its debugging port at %s", address)
+            proc.kill()
+            return 1
+        time.sleep(0.2)
+    logger.info("Browser daemon ready at %s (pid %d, profile %s); Ctrl-C to stop", address, proc.pid, profile_dir)
+
+    def stop(signum, frame):
+        raise KeyboardInterrupt
+    signal.signal(signal.SIGTERM, stop)
+    try:
+        return proc.wait()
+    except KeyboardInterrupt:
+        logger.info("Stopping browser daemon")
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+        return 0
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="Keep a warm Chrome running for crawls to attach to")
+    p.add_argument("-c", "--config", help="YAML config whose browser: block to use")
+    p.add_argument("--address", help="host:port for remote debugging (default browser.daemon.address)")
+    p.add_argument("--profile-dir", help="Chrome profile directory (default data/browserd-profile)")
+    args = p.parse_args()
+    config: Dict[str, Any] = {}
+    if args.config:
+        with open(args.config, "r", encoding="utf-8") as fh:
+            config = yaml.safe_load(fh) or {}
+    if args.address:
+        browser = dict(config.get("browser") or {})
+        browser["daemon"] = dict(browser.get("daemon") or {}, address=args.address)
+        config["browser"] = browser
+    raise SystemExit(serve(config, args.profile_dir))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Dict, Optional
+
+from .metrics import METRICS
+from .utils import logger, normalize_url
+
+
+class CacheEntry:
+    """
+    A cached page plus its HTTP validators.
+    """
+
+    __slots__ = ("url", "html", "etag", "last_modified", "stored_at", "fresh")
+
+    def __init__(self, url: str, html: str, etag: Optional[str], last_modified: Optional[str],
+                 stored_at: float, fresh: bool):
+        self.url = url
+        self.html = html
+        self.etag = etag
+        self.last_modified = last_modified
+        self.stored_at = stored_at
+        self.fresh = fresh
+
+
+class PageCache:
+    """
+    Persistent, content-addressed page cache.
+
+    Page bodies are stored zlib-compressed under `<dir>/<aa>/<sha256 of content>.z`
+    (identical pages share one blob); a SQLite index maps the normalized URL
+    (plus an optional variant) to the blob and its ETag/Last-Modified validators.
+    Entries younger than `ttl` seconds are fresh; stale entries are kept so the HTTP
+    path can revalidate them with a conditional GET. When the blobs exceed
+    `max_bytes`, least-recently-used entries are evicted; blob sizes are tracked
+    as a running total so only crossing the limit costs a full scan of the index.
+    """
+
+    def __init__(self, directory: str, ttl: float = 86400, max_bytes: int = 500 * 1024 * 1024):
+        self.directory = directory
+        self.ttl = float(ttl)
+        self.max_bytes = int(max_bytes)
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(directory, "index.sqlite"), check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            " key TEXT PRIMARY KEY, url TEXT, digest TEXT, size INTEGER,"
+            " etag TEXT, last_modified TEXT, stored_at REAL, accessed_at REAL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS pages_accessed ON pages(accessed_at)")
+        self._db.commit()
+        self.hits = 0
+        self.misses = 0
+        self._bytes = self.total_bytes()
+
+    @staticmethod
+    def key_for(url: str, variant: str = "") -> str:
+        return normalize_url(url) + ("|" + variant if variant else "")
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.directory, digest[:2], digest + ".z")
+
+    def get(self, url: str, variant: str = "") -> Optional[CacheEntry]:
+        """
+        Return the cached entry for `url` (fresh or stale), or None.
+        """
+        key = self.key_for(url, variant)
+        with self._lock:
+            row = self._db.execute(
+                "SELECT digest, size, etag, last_modified, stored_at FROM pages WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                METRICS.inc("cache_requests_total", result="miss")
+                return None
+            digest, size, etag, last_modified, stored_at = row
+            try:
+                with open(self._blob_path(digest), "rb") as fh:
+                    html = zlib.decompress(fh.read()).decode("utf-8")
+            except (OSError, zlib.error):
+                self._db.execute("DELETE FROM pages WHERE key = ?", (key,))
+                self._drop_blob_if_unused(digest, size)
+                self._db.commit()
+                self.misses += 1
+                METRICS.inc("cache_requests_total", result="miss")
+                return None
+            self._db.execute("UPDATE pages SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            self._db.commit()
+        fresh = self.ttl <= 0 or (time.time() - stored_at) < self.ttl
+        if fresh:
+            self.hits += 1
+        METRICS.inc("cache_requests_total", result="hit" if fresh else "stale")
+        return CacheEntry(url, html, etag, last_modified, stored_at, fresh)
+
+    def put(self, url: str, html: str, etag: Optional[str] = None, last_modified: Optional[str] = None,
+            variant: str = "") -> None:
+        """
+        Store `html` for `url`. If the content is unchanged and no validators are given,
+        the previous validators are kept.
+        """
+        if not html:
+            return
+        key = self.key_for(url, variant)
+        data = html.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as fh:
+                fh.write(zlib.compress(data, 6))
+            os.replace(tmp, path)
+        size = os.path.getsize(path)
+        now = time.time()
+        with self._lock:
+            old = self._db.execute("SELECT digest, size, etag, last_modified FROM pages WHERE key = ?",
+                                   (key,)).fetchone()
+            if old and old[0] == digest and etag is None and last_modified is None:
+                etag, last_modified = old[2], old[3]
+            if not self._db.execute("SELECT 1 FROM pages WHERE digest = ? LIMIT 1", (digest,)).fetchone():
+                self._bytes += size
+            self._db.execute(
+                "INSERT OR REPLACE INTO pages (key, url, digest, size, etag, last_modified, stored_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, url, digest, size, etag, last_modified, now, now),
+            )
+            if old and old[0] != digest:
+                self._drop_blob_if_unused(old[0], old[1])
+            self._db.commit()
+        if self._bytes > self.max_bytes > 0:
+            self.evict()
+
+    def touch(self, url: str, variant: str = "") -> None:
+        """
+        Mark an entry as fresh again (e.g. after a 304 Not Modified).
+        """
+        now = time.time()
+        with self._lock:
+            self._db.execute("UPDATE pages SET stored_at = ?, accessed_at = ? WHERE key = ?",
+                             (now, now, self.key_for(url, variant)))
+            self._db.commit()
+
+    def _drop_blob_if_unused(self, digest: str, size: int) -> bool:
+        # caller holds the lock; keeps the running byte total in step
+        used = self._db.execute("SELECT 1 FROM pages WHERE digest = ? LIMIT 1", (digest,)).fetchone()
+        if used:
+            return False
+        try:
+            os.remove(self._blob_path(digest))
+        except OSError:
+            pass
+        self._bytes -= size or 0
+        return True
+
+    def total_bytes(self) -> int:
+        """
+        Size of all blobs, summed over the index (a full scan).
+        """
+        with self._lock:
+            return self._scan_bytes()
+
+    def _scan_bytes(self) -> int:
+        row = self._db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM (SELECT digest, MAX(size) AS size FROM pages GROUP BY digest)"
+        ).fetchone()
+        return int(row[0])
+
+    def evict(self) -> int:
+        """
+        Drop least-recently-used entries until the cache is below 90% of max_bytes.
+        Returns the number of entries removed.
+        """
+        if self.max_bytes <= 0:
+            return 0
+        target = int(self.max_bytes * 0.9)
+        removed = 0
+        with self._lock:
+            # resync the running total (other processes may share the directory)
+            self._bytes = self._scan_bytes()
+            if self._bytes <= self.max_bytes:
+                return 0
+            rows = self._db.execute("SELECT key, digest, size FROM pages ORDER BY accessed_at").fetchall()
+            for key, digest, size in rows:
+                if self._bytes <= target:
+                    break
+                self._db.execute("DELETE FROM pages WHERE key = ?", (key,))
+                self._drop_blob_if_unused(digest, size)
+                removed += 1
+            self._db.commit()
+        if removed:
+            logger.info(f"Page cache evicted {removed} entries")
+        return removed
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+_CACHES: Dict[str, PageCache] = {}
+_CACHES_LOCK = threading.Lock()
+
+
+def shared_cache(config: Optional[Dict[str, Any]]) -> Optional[PageCache]:
+    """
+    Return the process-wide PageCache configured by `config['cache']`, or None if disabled.
+
+    cache:
+      enabled: true
+      dir: data/cache
+      ttl: 86400        # seconds a page is served without revalidation
+      max_mb: 500       # LRU eviction threshold
+    """
+    cfg = (config or {}).get("cache") or {}
+    if not cfg.get("enabled", False):
+        return None
+    directory = os.path.abspath(cfg.get("dir", "data/cache"))
+    with _CACHES_LOCK:
+        cache = _CACHES.get(directory)
+        if cache is None:
+            cache = _CACHES[directory] = PageCache(
+                directory,
+                ttl=cfg.get("ttl", 86400),
+                max_bytes=int(float(cfg.get("max_mb", 500)) * 1024 * 1024),
+            )
+    return cache
@@ -1,33 +1,388 @@
 # core/crawler.py
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional
-import pandas as pd
+from typing import List, Dict, Any, Optional, Callable, Iterable, Iterator, Type
+import importlib
+import inspect
+import json
+import time
 import os
 from .utils import logger, ensure_parent_dir
+from .archive import DETAIL, LIST, PageArchive, shared_archive
+from .cache import PageCache, shared_cache
+from .fetcher import PageFetcher
+from .frontier import absolute_url
+from .incremental import SeenIndex, shared_seen_index
+from .metrics import METRICS
+from .ratelimit import HostRateLimiter, shared_limiter
+from .parser import compile_plan, make_soup
+from .sections import SectionIndex, index_sections
+from .sinks import ResultSink, open_sink
+from .store import ResultStore, StoreSink, shared_store
+
+
+def load_crawler_class(path: str) -> Type["BaseCrawler"]:
+    """
+    Import a crawler class from a dotted path such as "examples.ai_lit_crawler.AILitCrawler".
+    """
+    module_name, class_name = path.rsplit(".", 1)
+    module = importlib.import_module(module_name)
+    return getattr(module, class_name)
+
+
+def as_pages(result: Any) -> Iterator[Any]:
+    """
+    Iterate what `fetch_list()` returned: a list or generator of pages, a single
+    page (str or response object), or None.
+    """
+    if result is None:
+        return iter(())
+    if isinstance(result, (str, bytes, dict)) or not isinstance(result, Iterable):
+        return iter([result])
+    return iter(result)
 
 
 class BaseCrawler(ABC):
     """
     Generic crawler base class.
     Subclasses must implement: fetch_list, parse_list, fetch_detail, parse_detail.
-    The crawler collects detail records into `self.results` (a list of dicts).
+    The crawler collects detail records into `self.results` (a list of dicts),
+    or streams them to a sink opened with `open_sink()` when records go through `emit()`.
+    Subclasses can use `fetch_page(url, fallback)` to get pages through the pooled
+    HTTP fast path (config `http:`) before falling back to their browser.
+    `fetch_list` and `parse_list` may return lists or be generators; when
+    `fetch_list` is a generator, run.py parses each list page as soon as it is
+    yielded and starts fetching its details while later pages are still loading.
+    Crawlers that drive Chrome set `uses_browser = True` and use `self.driver`,
+    which is started on first use, so workers served by the HTTP fast path never
+    launch a browser.
     """
 
+    # counts against the scheduler's browser budget (see core.scheduler)
+    uses_browser = False
+
     def __init__(self, config: Dict[str, Any]):
         self.config = config or {}
         self.results: List[Dict[str, Any]] = []
+        self._fetcher: Optional[PageFetcher] = None
+        self._cache_handoff: Optional[tuple] = None
+        self._driver = None
+        self.sink: Optional[ResultSink] = None
+
+    @classmethod
+    def for_parsing(cls, config: Dict[str, Any]) -> "BaseCrawler":
+        """
+        Build an instance that can only parse (no browser or session is started),
+        e.g. inside parse worker processes. Subclasses whose parse methods need
+        more state than `config` should override this.
+        """
+        obj = cls.__new__(cls)
+        BaseCrawler.__init__(obj, config)
+        return obj
+
+    @property
+    def fetcher(self) -> PageFetcher:
+        """
+        Lazily created HTTP fetcher configured from `config['http']`.
+        """
+        if getattr(self, "_fetcher", None) is None:
+            self._fetcher = PageFetcher(self.config)
+        return self._fetcher
+
+    @property
+    def parser_backend(self) -> Optional[str]:
+        """
+        Parser backend from `config['parser']['backend']` (None means auto).
+        """
+        return (self.config.get("parser") or {}).get("backend")
+
+    def soup(self, html: str, parse_only=None):
+        """
+        Parse HTML into BeautifulSoup with the configured backend.
+        """
+        return make_soup(html, self.parser_backend, parse_only=parse_only)
+
+    def extract(self, html: str, selectors: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Run the compiled extraction plan for `selectors` (default: `config['detail_selectors']`).
+        """
+        parser_cfg = self.config.get("parser") or {}
+        plan = compile_plan(selectors if selectors is not None else self.config.get("detail_selectors") or {},
+                            backend=parser_cfg.get("backend"), strain=bool(parser_cfg.get("strain", False)))
+        return plan.extract(html)
+
+    def sections(self, html, spec: Optional[Dict[str, Any]] = None) -> SectionIndex:
+        """
+        Index `html` (or a soup) in one pass by heading -> content block and
+        definition-list label -> value (see core.sections), using the `spec`
+        block (default: `config['sections']`).
+        """
+        return index_sections(html, spec if spec is not None else self.config.get("sections"),
+                              backend=self.parser_backend)
+
+    @property
+    def cache(self) -> Optional[PageCache]:
+        """
+        Shared on-disk page cache configured by `config['cache']` (None if disabled).
+        """
+        return shared_cache(self.config)
+
+    @property
+    def store(self) -> Optional[ResultStore]:
+        """
+        Keyed result store configured by `config['store']` (None if disabled).
+        """
+        return shared_store(self.config)
+
+    @property
+    def archive(self) -> Optional[PageArchive]:
+        """
+        Shared raw-page archive configured by `config['archive']` (None if disabled).
+        """
+        return shared_archive(self.config)
+
+    def archive_page(self, url: str, html: Any, kind: str = DETAIL, page: Optional[int] = None,
+                     fetched: bool = True) -> None:
+        """
+        Append a page to the archive, if enabled. Pages served from the page cache
+        (`fetched=False`) are only archived when the archive lacks them.
+        """
+        archive = self.archive
+        if archive is None or not isinstance(html, str) or not html:
+            return
+        if kind == LIST and not (self.config.get("archive") or {}).get("lists", True):
+            return
+        if not fetched and archive.locate(url, kind, page) is not None:
+            return
+        archive.add(url, html, kind, page)
+
+    @property
+    def streams_list(self) -> bool:
+        """
+        True if `fetch_list` is a generator (and `stream_list` is not disabled),
+        so list pages can be consumed one at a time while pagination goes on.
+        """
+        return bool(self.config.get("stream_list", True)) and inspect.isgeneratorfunction(self.fetch_list)
+
+    def iter_list_pages(self) -> Iterator[Any]:
+        """
+        `fetch_list()` one page at a time, through the page cache. Pages are cached
+        one entry each (variant `list:<pagination>#<n>`) plus a page count, so
+        neither side holds the whole list in memory.
+        """
+        cache = self.cache
+        list_url = self.config.get("list_url") or self.config.get("start_url")
+        if cache is None or not list_url:
+            archived_as = list_url or self.config.get("base_url") or "list"
+            for n, html in enumerate(as_pages(self.fetch_list())):
+                self.archive_page(archived_as, html, LIST, n)
+                yield html
+            return
+        variant = "list:" + json.dumps(self.config.get("pagination") or {}, sort_keys=True)
+        served = 0
+        entry = cache.get(list_url, variant=variant)
+        if entry is not None and entry.fresh:
+            logger.info("List pages served from cache")
+            count = json.loads(entry.html)
+            if isinstance(count, list):
+                # written before pages were cached one by one
+                for n, html in enumerate(count):
+                    self.archive_page(list_url, html, LIST, n, fetched=False)
+                    yield html
+                return
+            for n in range(int(count)):
+                page = cache.get(list_url, variant=f"{variant}#{n}")
+                if page is None:
+                    logger.info("List page %d was evicted from the cache; fetching the list again", n + 1)
+                    break
+                self.archive_page(list_url, page.html, LIST, n, fetched=False)
+                yield page.html
+                served += 1
+            else:
+                return
+        count = 0
+        for n, html in enumerate(as_pages(self.fetch_list())):
+            if isinstance(html, str):
+                cache.put(list_url, html, variant=f"{variant}#{n}")
+            self.archive_page(list_url, html, LIST, n)
+            count += 1
+            if n >= served:
+                yield html
+        if count:
+            cache.put(list_url, json.dumps(count), variant=variant)
+
+    def fetch_list_cached(self) -> List[Any]:
+        """
+        `fetch_list()` through the page cache, as a list.
+        """
+        return list(self.iter_list_pages())
+
+    def fetch_detail_cached(self, item) -> str:
+        """
+        `fetch_detail(item)` through the page cache, keyed by the normalized item URL,
+        and into the page archive. The cache is looked up once: when `fetch_detail`
+        fetches the item through `fetch_page`, the entry found here is handed to the
+        fetcher (for a conditional request) and the fetcher stores the response.
+        """
+        cache = self.cache
+        if cache is None or not isinstance(item, str):
+            html = self.fetch_detail(item)
+            if isinstance(item, str):
+                self.archive_page(item, html)
+            return html
+        entry = cache.get(item)
+        if entry is not None and entry.fresh:
+            self.archive_page(item, entry.html, fetched=False)
+            return entry.html
+        self._cache_handoff = (item, entry)
+        try:
+            html = self.fetch_detail(item)
+            handed_off = self._cache_handoff is None
+        finally:
+            self._cache_handoff = None
+        if html:
+            if not handed_off:
+                cache.put(item, html)
+            self.archive_page(item, html)
+        return html
+
+    @property
+    def seen_index(self) -> Optional[SeenIndex]:
+        """
+        Persistent index of known items for incremental mode (None if disabled).
+        """
+        return shared_seen_index(self.config)
+
+    def page_is_known(self, html: str) -> bool:
+        """
+        In incremental mode, True if every item on this list page was crawled before,
+        meaning pagination can stop. Always False otherwise.
+        """
+        index = self.seen_index
+        if index is None:
+            return False
+        try:
+            items = self.parse_list([html]) or []
+        except Exception:
+            return False
+        return index.all_known(absolute_url(it) for it in items if isinstance(it, str))
+
+    @property
+    def rate_limiter(self) -> Optional[HostRateLimiter]:
+        """
+        Per-host token-bucket limiter shared by all workers (None when `rate_limit` is 0/unset).
+        """
+        return shared_limiter(self.config)
+
+    def throttle(self, url: str) -> None:
+        """
+        Wait for this host's rate limiter before issuing a request.
+        """
+        limiter = self.rate_limiter
+        if limiter is not None:
+            limiter.acquire(url)
+
+    @property
+    def browser_config(self) -> Dict[str, Any]:
+        """
+        The `browser:` config block with defaults (see core.browser.browser_config).
+        """
+        # selenium is only imported by crawlers that drive a browser
+        from .browser import browser_config
+        return browser_config(self.config)
+
+    def create_driver(self):
+        """
+        Start a Chrome WebDriver configured by `config['browser']`: page load strategy,
+        blocked resource types and URL patterns, images off, headless.
+        """
+        from .browser import create_driver
+        return create_driver(self.config)
+
+    @property
+    def driver(self):
+        """
+        The crawler's WebDriver, started with `create_driver()` on first use.
+        """
+        if getattr(self, "_driver", None) is None:
+            self._driver = self.create_driver()
+        return self._driver
+
+    @driver.setter
+    def driver(self, value) -> None:
+        self._driver = value
+
+    def quit_driver(self) -> bool:
+        """
+        Quit the WebDriver if one was started. Returns False if there was none.
+        """
+        driver, self._driver = getattr(self, "_driver", None), None
+        if driver is None:
+            return False
+        driver.quit()
+        return True
+
+    def wait_render(self, ready_selector: Optional[str] = None, stale=None) -> bool:
+        """
+        Wait until the page in `self.driver` has rendered: until `ready_selector`
+        (default `browser.ready_selector`) is present and `stale`, an element of the
+        previous page, is gone. Without a selector, sleeps `render_wait` seconds
+        (default 0). Returns False if the wait timed out.
+        """
+        cfg = self.browser_config
+        selector = cfg.get("ready_selector") if ready_selector is None else ready_selector
+        if selector or stale is not None:
+            from .browser import wait_ready
+            return wait_ready(self.driver, selector, timeout=float(cfg.get("ready_timeout", 15)), stale=stale)
+        seconds = float(self.config.get("render_wait", 0) or 0)
+        if seconds > 0:
+            time.sleep(seconds)
+        return True
+
+    def navigate(self, url: str, ready_selector: Optional[str] = None) -> None:
+        """
+        Load `url` in `self.driver` under the rate limiter and wait for it to render
+        (see `wait_render`), reporting latency to the limiter and to the
+        `browser_navigate` timing.
+        """
+        self.throttle(url)
+        started = time.monotonic()
+        try:
+            self.driver.get(url)
+        except Exception:
+            if self.rate_limiter is not None:
+                self.rate_limiter.feedback(url, error=True)
+            METRICS.inc("failures_total", stage="browser_navigate")
+            raise
+        if self.rate_limiter is not None:
+            self.rate_limiter.feedback(url, latency=time.monotonic() - started)
+        if not self.wait_render(ready_selector):
+            METRICS.inc("render_timeouts_total")
+        METRICS.observe("browser_navigate", time.monotonic() - started)
+
+    def fetch_page(self, url: str, fallback: Optional[Callable[[str], str]] = None) -> str:
+        """
+        Fetch a page over HTTP when the static HTML is complete, otherwise via `fallback(url)`.
+        """
+        handoff = getattr(self, "_cache_handoff", None)
+        if handoff is not None and handoff[0] == url:
+            # fetch_detail_cached() already looked the item up
+            self._cache_handoff = None
+            return self.fetcher.fetch(url, fallback=fallback, cached=handoff[1], lookup=False)
+        return self.fetcher.fetch(url, fallback=fallback)
 
     @abstractmethod
-    def fetch_list(self) -> List[str]:
+    def fetch_list(self) -> Iterable[str]:
         """
-        Fetch list pages and return a list of raw HTML strings (or list-response objects).
+        Fetch list pages and return a list of raw HTML strings (or list-response objects),
+        or yield them one by one as they load.
         """
         raise NotImplementedError
 
     @abstractmethod
-    def parse_list(self, html_list) -> List[str]:
+    def parse_list(self, html_list) -> Iterable[str]:
         """
-        Parse list pages and return a list of identifiers or URLs for detail pages.
+        Parse list pages and return (or yield) identifiers or URLs for detail pages.
+        It must also work on a single page (`[html]`): streamed runs call it per page.
         """
         raise NotImplementedError
 
@@ -45,23 +400,74 @@ class BaseCrawler(ABC):
         """
         raise NotImplementedError
 
+    def open_sink(self, output_path: str) -> ResultSink:
+        """
+        Start streaming records emitted via `emit()` to `output_path`
+        (format chosen by extension: csv, jsonl, xlsx, parquet), or into the
+        result store if one is configured (`output_path` then only gets the
+        run's added/changed records, with `store.export: true`).
+        """
+        store = self.store
+        if store is not None:
+            self.sink = StoreSink(output_path, store, self.config,
+                                  buffer_size=self.config.get("output_buffer", 500),
+                                  export=bool((self.config.get("store") or {}).get("export", False)))
+        else:
+            self.sink = open_sink(output_path, self.config)
+        return self.sink
+
+    def emit(self, record: Dict[str, Any], item: Any = None) -> None:
+        """
+        Hand one record to the open sink, or keep it in `self.results` if none is open.
+        With `store.url_field`, the detail URL `item` is added to the record under that name.
+        """
+        url_field = (self.config.get("store") or {}).get("url_field")
+        if url_field and isinstance(item, str) and url_field not in record:
+            record = dict(record, **{url_field: item})
+        if self.sink is not None:
+            self.sink.write(record)
+        else:
+            self.results.append(record)
+
+    @property
+    def record_count(self) -> int:
+        if self.sink is not None:
+            return self.sink.count
+        return len(self.results)
+
     def save(self, output_path: Optional[str]) -> None:
         """
-        Persist results (list[dict]) to CSV or Excel based on file extension.
+        Persist results (list[dict]) to CSV or Excel based on file extension;
+        other formats (JSON Lines, Parquet, Arrow) go through their sink.
+        If a sink is open, it is finalized instead (atomic rename of the streamed file).
         If output_path is None or empty, raises ValueError.
         """
         if not output_path:
             raise ValueError("output_path is required for saving results.")
 
+        if getattr(self, "sink", None) is None and self.store is not None:
+            self.open_sink(output_path).write_many(self.results)
+        if getattr(self, "sink", None) is not None:
+            self.sink.finalize()
+            return
+
         if not self.results:
             logger.warning("No data to save.")
             # Still create parent dir so debug pages can be written consistently
             ensure_parent_dir(output_path)
             return
 
+        ext = os.path.splitext(output_path)[1].lower().lstrip('.')
+        if ext not in ('csv', '', 'xls', 'xlsx'):
+            sink = open_sink(output_path, self.config)
+            sink.write_many(self.results)
+            sink.finalize()
+            return
+
+        # pandas takes ~0.5 s to import; only this non-streaming path needs it
+        import pandas as pd
         df = pd.DataFrame(self.results)
         ensure_parent_dir(output_path)
-        ext = os.path.splitext(output_path)[1].lower().lstrip('.')
 
         if ext == 'csv' or ext == '':
             df.to_csv(output_path, index=False, encoding='utf-8')
@@ -0,0 +1,238 @@
+import asyncio
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+import soupsieve
+
+from .cache import CacheEntry, PageCache, shared_cache
+from .metrics import METRICS
+from .parser import make_soup
+from .ratelimit import HostRateLimiter, shared_limiter
+from .utils import logger
+
+class HttpStatusError(Exception):
+    """
+    A retryable HTTP status (429 or 5xx, see HostRateLimiter.is_backoff). Carries `retry_after` seconds from the
+    response so core.utils.call_with_retry can honor it.
+    """
+
+    def __init__(self, url: str, status: int, retry_after: Optional[str] = None):
+        super().__init__(f"HTTP {status} for {url}")
+        self.url = url
+        self.status = status
+        self.retry_after = retry_after
+
+
+DEFAULT_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/120.0 Safari/537.36"
+    ),
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.9",
+}
+
+
+class PageFetcher:
+    """
+    HTTP-first page fetcher with a WebDriver (or any callable) fallback.
+
+    Pages are requested through a pooled keep-alive `requests.Session`. The static
+    HTML is accepted only if it is "complete" according to the config, i.e. it
+    contains `ready_selector` and is at least `min_length` characters long.
+    Otherwise the `fallback(url)` callable (usually a browser navigation) is used.
+
+    Config (all keys optional), under `http:` in the YAML:
+        enabled: true            # false -> always use the fallback
+        timeout: 15              # seconds per request
+        pool_size: 10            # keep-alive connections per host
+        headers: {...}           # extra request headers
+        ready_selector: "h1"     # CSS selector that proves the page is complete
+        min_length: 0            # minimum accepted HTML length
+        skip_after_misses: 3     # stop trying HTTP for a host after N incomplete pages
+        max_in_flight: 16        # concurrency of fetch_many()
+
+    If a page cache is enabled (`cache:` in the YAML, see core.cache), fresh pages
+    are served from it, stale ones are revalidated with If-None-Match /
+    If-Modified-Since, and every fetched page is stored.
+    Requests wait on the shared per-host limiter (see core.ratelimit) and report
+    status/latency back to it.
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        http_cfg = (config or {}).get("http") or {}
+        self.enabled: bool = bool(http_cfg.get("enabled", False))
+        self.timeout: float = float(http_cfg.get("timeout", 15))
+        self.ready_selector: Optional[str] = http_cfg.get("ready_selector")
+        self._ready = soupsieve.compile(self.ready_selector) if self.ready_selector else None
+        self.backend: Optional[str] = ((config or {}).get("parser") or {}).get("backend")
+        self.min_length: int = int(http_cfg.get("min_length", 0))
+        self.skip_after_misses: int = int(http_cfg.get("skip_after_misses", 3))
+        self.max_in_flight: int = int(http_cfg.get("max_in_flight", 16))
+        pool_size = int(http_cfg.get("pool_size", 10))
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update(DEFAULT_HEADERS)
+        self.session.headers.update(http_cfg.get("headers") or {})
+
+        self._misses: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.cache: Optional[PageCache] = shared_cache(config)
+        self.limiter: Optional[HostRateLimiter] = shared_limiter(config)
+
+    def is_complete(self, html: str) -> bool:
+        """
+        Return True if static HTML is good enough to skip the browser.
+        """
+        if not html or len(html) < self.min_length:
+            return False
+        if self._ready is None:
+            return True
+        return self._ready.select_one(make_soup(html, self.backend)) is not None
+
+    def _http_allowed(self, url: str) -> bool:
+        if not self.enabled:
+            return False
+        if self.skip_after_misses <= 0:
+            return True
+        with self._lock:
+            return self._misses.get(urlsplit(url).netloc, 0) < self.skip_after_misses
+
+    def _record(self, url: str, complete: bool) -> None:
+        host = urlsplit(url).netloc
+        with self._lock:
+            if complete:
+                self._misses[host] = 0
+            else:
+                self._misses[host] = self._misses.get(host, 0) + 1
+                if self._misses[host] == self.skip_after_misses:
+                    logger.info("HTTP fast path disabled for %s (static pages incomplete)", host)
+
+    def fetch_http(self, url: str, cached: Optional[CacheEntry] = None, throttle: bool = True) -> Optional[str]:
+        """
+        Fetch `url` over HTTP. Returns the HTML if the response is complete, else None.
+        Raises HttpStatusError on 429 and 5xx. With a `cached` entry the request is conditional and a 304 returns the cached HTML.
+        `throttle=False` skips the limiter (the caller already acquired a token).
+        """
+        headers = {}
+        if cached is not None:
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+        if throttle and self.limiter is not None:
+            self.limiter.acquire(url)
+        started = time.monotonic()
+        try:
+            resp = self.session.get(url, timeout=self.timeout, headers=headers or None)
+        except requests.RequestException as e:
+            logger.debug(f"HTTP fetch failed for {url}: {e}")
+            if self.limiter is not None:
+                self.limiter.feedback(url, error=True)
+            METRICS.observe("http_request", time.monotonic() - started)
+            METRICS.inc("http_responses_total", status="error")
+            return None
+        latency = time.monotonic() - started
+        if self.limiter is not None:
+            self.limiter.feedback(url, status=resp.status_code, latency=latency)
+        METRICS.observe("http_request", latency)
+        METRICS.inc("http_responses_total", status=resp.status_code)
+        METRICS.inc("bytes_downloaded_total", len(resp.content), source="http")
+        if resp.status_code == 304 and cached is not None:
+            if self.cache is not None:
+                self.cache.touch(url)
+            return cached.html
+        if HostRateLimiter.is_backoff(resp.status_code):
+            # the host is throttling us or overloaded: do not hit it again through the browser
+            raise HttpStatusError(url, resp.status_code, resp.headers.get("Retry-After"))
+        if resp.status_code != 200:
+            logger.debug(f"HTTP fetch for {url} returned status {resp.status_code}")
+            return None
+        html = resp.text
+        complete = self.is_complete(html)
+        self._record(url, complete)
+        if not complete:
+            return None
+        if self.cache is not None:
+            self.cache.put(url, html, etag=resp.headers.get("ETag"), last_modified=resp.headers.get("Last-Modified"))
+        return html
+
+    def fetch(self, url: str, fallback: Optional[Callable[[str], str]] = None,
+              cached: Optional[CacheEntry] = None, lookup: bool = True) -> str:
+        """
+        Fetch `url` via the cache and the HTTP fast path, falling back to
+        `fallback(url)` when HTTP is disabled, fails, or returns an incomplete page.
+        `lookup=False` means the caller already looked `url` up in the cache and
+        passes what it found (None on a miss) as `cached`.
+        """
+        if lookup:
+            cached = self.cache.get(url) if self.cache is not None else None
+        if cached is not None and cached.fresh:
+            return cached.html
+        if self._http_allowed(url):
+            html = self.fetch_http(url, cached)
+            if html is not None:
+                return html
+            logger.debug(f"Falling back to browser for {url}")
+        if fallback is None:
+            return ""
+        html = fallback(url)
+        METRICS.inc("browser_fallbacks_total")
+        if html:
+            METRICS.inc("bytes_downloaded_total", len(html.encode("utf-8")), source="browser")
+            if self.cache is not None:
+                self.cache.put(url, html)
+        return html
+
+    def fetch_many(self, urls: List[str], fallback: Optional[Callable[[str], str]] = None) -> List[str]:
+        """
+        Fetch many URLs concurrently (asyncio over the pooled session) and return
+        their HTML in input order. Incomplete pages go through `fallback` one by one,
+        since a single WebDriver cannot be shared across in-flight requests.
+        """
+        async def gather() -> List[Optional[str]]:
+            loop = asyncio.get_running_loop()
+            sem = asyncio.Semaphore(max(1, self.max_in_flight))
+
+            async def one(u: str) -> Optional[str]:
+                cached = self.cache.get(u) if self.cache is not None else None
+                if cached is not None and cached.fresh:
+                    return cached.html
+                if not self._http_allowed(u):
+                    return None
+                async with sem:
+                    if self.limiter is not None:
+                        await self.limiter.acquire_async(u)
+                    return await loop.run_in_executor(None, self.fetch_http, u, cached, False)
+
+            return await asyncio.gather(*(one(u) for u in urls), return_exceptions=True)
+
+        results = asyncio.run(gather())
+        out: List[str] = []
+        for url, html in zip(urls, results):
+            if isinstance(html, HttpStatusError):
+                logger.warning(f"{html}; skipped")
+                out.append("")
+                continue
+            if isinstance(html, BaseException):
+                raise html
+            if html is None:
+                html = fallback(url) if fallback else ""
+                if fallback:
+                    METRICS.inc("browser_fallbacks_total")
+                if html:
+                    METRICS.inc("bytes_downloaded_total", len(html.encode("utf-8")), source="browser")
+                    if self.cache is not None:
+                        self.cache.put(url, html)
+            out.append(html)
+        return out
+
+    def close(self) -> None:
+        self.session.close()
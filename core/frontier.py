@@ -0,0 +1,247 @@
+import hashlib
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Pattern, Tuple
+from urllib.parse import parse_qsl, urldefrag, urlencode, urljoin, urlsplit, urlunsplit
+
+from .utils import ensure_parent_dir, logger, normalize_url
+
+# query parameters that never change the page content
+TRACKING_PARAMS = ("utm_source", "utm_medium", "utm_campaign", "utm_term", "utm_content",
+                   "gclid", "fbclid", "mc_cid", "mc_eid")
+
+
+def absolute_url(href: str, base: Optional[str] = None) -> str:
+    """
+    The URL to fetch for a link: resolved against `base`, without the fragment,
+    with lowercase scheme and host. Path, trailing slash and query order are kept,
+    since servers may treat them as significant.
+    """
+    url, _ = urldefrag(urljoin(base, href.strip()) if base else href.strip())
+    parts = urlsplit(url)
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path, parts.query, ""))
+
+
+def canonical_key(url: str, strip_params: Iterable[str] = TRACKING_PARAMS) -> str:
+    """
+    Dedupe key of a URL: `normalize_url` (no fragment, sorted query, no default
+    port or trailing slash) without tracking parameters.
+    """
+    strip = set(strip_params)
+    if strip:
+        parts = urlsplit(url)
+        query = urlencode([(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k not in strip])
+        url = urlunsplit((parts.scheme, parts.netloc, parts.path, query, parts.fragment))
+    return normalize_url(url)
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter (bytearray + double hashing over blake2b), sized for
+    `capacity` items at `error_rate` false positives: about 1.2 bytes per item
+    at 1%. A false positive drops a new URL as a duplicate, so keep the rate low.
+    """
+
+    def __init__(self, capacity: int = 1_000_000, error_rate: float = 0.001):
+        capacity = max(1, int(capacity))
+        self.bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.bits / capacity * math.log(2)))
+        self._array = bytearray((self.bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: str) -> Iterator[int]:
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.bits
+
+    def add(self, key: str) -> bool:
+        """
+        Add `key`; returns False if it was (probably) present already.
+        """
+        new = False
+        for pos in self._positions(key):
+            byte, bit = divmod(pos, 8)
+            if not self._array[byte] >> bit & 1:
+                self._array[byte] |= 1 << bit
+                new = True
+        if new:
+            self.count += 1
+        return new
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._array[pos // 8] >> (pos % 8) & 1 for pos in self._positions(key))
+
+
+class Frontier:
+    """
+    Disk-backed queue of detail items for one run: URLs are canonicalized and
+    deduplicated (exactly, through a UNIQUE key column, or with a Bloom filter
+    that keeps the table unindexed for very large crawls) and handed out by
+    priority (higher first), then in insertion order.
+
+    Iterating a Frontier pops items lazily in small batches, so items can be
+    added while it is being consumed and only a batch is ever in memory.
+    Non-URL items (e.g. dicts) are kept as they are, without dedupe.
+    """
+
+    def __init__(self, path: str = ":memory:", dedupe: str = "exact", capacity: int = 1_000_000,
+                 error_rate: float = 0.001, strip_params: Iterable[str] = TRACKING_PARAMS,
+                 priorities: Optional[Dict[str, int]] = None, batch: int = 256):
+        if dedupe not in ("exact", "bloom"):
+            raise ValueError(f"frontier dedupe must be 'exact' or 'bloom', not {dedupe!r}")
+        if path != ":memory:":
+            ensure_parent_dir(path)
+        self.path = path
+        self.dedupe = dedupe
+        self.strip_params = tuple(strip_params)
+        self.rules: List[Tuple[Pattern, int]] = [(re.compile(p), int(v)) for p, v in (priorities or {}).items()]
+        self.batch = int(batch)
+        self.added = 0
+        self.duplicates = 0
+        self._bloom = BloomFilter(capacity, error_rate) if dedupe == "bloom" else None
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("DROP TABLE IF EXISTS frontier")
+        unique = "UNIQUE" if dedupe == "exact" else ""
+        self._db.execute(
+            "CREATE TABLE frontier (seq INTEGER PRIMARY KEY AUTOINCREMENT,"
+            f" key TEXT {unique}, item TEXT NOT NULL, priority INTEGER NOT NULL DEFAULT 0,"
+            " popped INTEGER NOT NULL DEFAULT 0)"
+        )
+        self._db.execute("CREATE INDEX frontier_next ON frontier(popped, priority DESC, seq)")
+        self._db.commit()
+
+    def priority_of(self, url: str) -> int:
+        """
+        Priority from the first matching `priorities` rule (regex searched in the URL), else 0.
+        """
+        for pattern, value in self.rules:
+            if pattern.search(url):
+                return value
+        return 0
+
+    def add_many(self, items: Iterable[Any], base: Optional[str] = None, priority: Optional[int] = None) -> int:
+        """
+        Queue items (relative URLs are resolved against `base`). Returns how many
+        were new. `priority` overrides the configured rules.
+        """
+        rows = []
+        for it in items:
+            if isinstance(it, str):
+                url = absolute_url(it, base)
+                key = canonical_key(url, self.strip_params)
+                if self._bloom is not None and not self._bloom.add(key):
+                    self.duplicates += 1
+                    continue
+                rows.append((key, url, self.priority_of(url) if priority is None else priority))
+            else:
+                rows.append((None, "\0" + json.dumps(it, default=str), priority or 0))
+        with self._lock:
+            before = self._db.total_changes
+            self._db.executemany("INSERT OR IGNORE INTO frontier (key, item, priority) VALUES (?, ?, ?)", rows)
+            self._db.commit()
+            added = self._db.total_changes - before
+        self.duplicates += len(rows) - added
+        self.added += added
+        return added
+
+    def add(self, item: Any, base: Optional[str] = None, priority: Optional[int] = None) -> bool:
+        return self.add_many([item], base=base, priority=priority) == 1
+
+    def pop(self, n: int = 1) -> List[Any]:
+        """
+        Remove and return up to `n` items, highest priority first.
+        """
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT seq, item FROM frontier WHERE popped = 0 ORDER BY priority DESC, seq LIMIT ?", (n,)
+            ).fetchall()
+            self._db.executemany("UPDATE frontier SET popped = 1 WHERE seq = ?", [(r[0],) for r in rows])
+            self._db.commit()
+        return [json.loads(item[1:]) if item.startswith("\0") else item for _, item in rows]
+
+    def pending(self) -> Iterator[Any]:
+        """
+        Iterate the items not handed out yet, in pop order, without popping them.
+        """
+        last: Optional[Tuple[int, int]] = None
+        while True:
+            with self._lock:
+                if last is None:
+                    rows = self._db.execute(
+                        "SELECT priority, seq, item FROM frontier WHERE popped = 0"
+                        " ORDER BY priority DESC, seq LIMIT ?", (self.batch,)
+                    ).fetchall()
+                else:
+                    rows = self._db.execute(
+                        "SELECT priority, seq, item FROM frontier WHERE popped = 0"
+                        " AND (priority < ? OR (priority = ? AND seq > ?))"
+                        " ORDER BY priority DESC, seq LIMIT ?", (last[0], last[0], last[1], self.batch)
+                    ).fetchall()
+            if not rows:
+                return
+            last = (rows[-1][0], rows[-1][1])
+            for _, _, item in rows:
+                yield json.loads(item[1:]) if item.startswith("\0") else item
+
+    def __iter__(self) -> Iterator[Any]:
+        while True:
+            items = self.pop(self.batch)
+            if not items:
+                return
+            yield from items
+
+    def __len__(self) -> int:
+        """
+        Number of items not handed out yet.
+        """
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM frontier WHERE popped = 0").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+def default_frontier_path(config: Dict[str, Any], output_path: str) -> str:
+    """
+    `config['frontier']['path']`, or `<output dir>/<output stem>.frontier.sqlite`.
+    """
+    cfg = config.get("frontier") or {}
+    if cfg.get("path"):
+        return cfg["path"]
+    stem = os.path.splitext(output_path)[0]
+    return stem + ".frontier.sqlite"
+
+
+def open_frontier(config: Dict[str, Any], output_path: str) -> Frontier:
+    """
+    Build the run's Frontier from `config['frontier']`:
+
+    frontier:
+      dedupe: exact            # exact (on-disk UNIQUE index) | bloom (fixed memory, tiny error rate)
+      expected_items: 1000000  # bloom sizing
+      error_rate: 0.001
+      path: data/ai_lit.frontier.sqlite   # default <output stem>.frontier.sqlite
+      strip_params: [utm_source, utm_medium, sessionid]   # ignored for dedupe (default: tracking params)
+      priorities:              # regex searched in the URL -> priority, higher first, default 0
+        "/case/": 10
+    """
+    cfg = config.get("frontier") or {}
+    frontier = Frontier(
+        default_frontier_path(config, output_path),
+        dedupe=cfg.get("dedupe", "exact"),
+        capacity=int(cfg.get("expected_items", 1_000_000)),
+        error_rate=float(cfg.get("error_rate", 0.001)),
+        strip_params=cfg.get("strip_params", TRACKING_PARAMS),
+        priorities=cfg.get("priorities"),
+    )
+    logger.debug("Frontier at %s (%s dedupe)", frontier.path, frontier.dedupe)
+    return frontier
@@ -0,0 +1,145 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from .utils import ensure_parent_dir
+
+ADDED = "added"
+CHANGED = "changed"
+UNCHANGED = "unchanged"
+
+
+def record_hash(records: Any) -> str:
+    """
+    Stable content hash of the extracted fields of one item.
+    """
+    data = json.dumps(records, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+class SeenIndex:
+    """
+    Persistent index of item URLs seen in earlier runs and the hash of their extracted fields.
+
+    Used by incremental mode to stop pagination at already-known list pages,
+    fetch only new items plus a sample of stale ones, and emit only records
+    that were added or changed since the last crawl.
+    """
+
+    def __init__(self, path: str, recheck_count: int = 0, recheck_after: float = 7 * 86400):
+        ensure_parent_dir(path)
+        self.path = path
+        self.recheck_count = int(recheck_count)
+        self.recheck_after = float(recheck_after)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS seen ("
+            " url TEXT PRIMARY KEY, content_hash TEXT,"
+            " first_seen REAL, last_seen REAL, last_fetched REAL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS seen_fetched ON seen(last_fetched)")
+        self._db.commit()
+
+    def is_known(self, url: str) -> bool:
+        """
+        True if `url` was fetched and parsed in an earlier run.
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT 1 FROM seen WHERE url = ? AND content_hash IS NOT NULL", (url,)
+            ).fetchone()
+        return row is not None
+
+    def all_known(self, urls: Iterable[str]) -> bool:
+        """
+        True if `urls` is non-empty and every URL was seen before.
+        """
+        urls = [u for u in urls if isinstance(u, str)]
+        return bool(urls) and all(self.is_known(u) for u in urls)
+
+    def select_for_fetch(self, items: List[Any]) -> List[Any]:
+        """
+        Return the items to fetch, in list order: every unknown item plus up to
+        `recheck_count` known items not fetched for `recheck_after` seconds (oldest first).
+        All listed items are marked as seen now.
+        """
+        now = time.time()
+        urls = [it for it in items if isinstance(it, str)]
+        with self._lock:
+            known = {}
+            for i in range(0, len(urls), 500):
+                chunk = urls[i:i + 500]
+                marks = ",".join("?" * len(chunk))
+                for url, last_fetched in self._db.execute(
+                        f"SELECT url, last_fetched FROM seen WHERE content_hash IS NOT NULL AND url IN ({marks})",
+                        chunk):
+                    known[url] = last_fetched or 0.0
+            self._db.executemany(
+                "INSERT INTO seen (url, first_seen, last_seen) VALUES (?, ?, ?)"
+                " ON CONFLICT(url) DO UPDATE SET last_seen = excluded.last_seen",
+                [(u, now, now) for u in urls],
+            )
+            self._db.commit()
+
+        stale = sorted((ts, u) for u, ts in known.items() if now - ts >= self.recheck_after)
+        recheck = {u for _, u in stale[:max(0, self.recheck_count)]}
+        return [it for it in items if not isinstance(it, str) or it not in known or it in recheck]
+
+    def classify(self, url: str, records: Any) -> str:
+        """
+        Store the content hash of `records` for `url` and report added/changed/unchanged.
+        """
+        digest = record_hash(records)
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT content_hash FROM seen WHERE url = ?", (url,)).fetchone()
+            self._db.execute(
+                "INSERT INTO seen (url, content_hash, first_seen, last_seen, last_fetched) VALUES (?, ?, ?, ?, ?)"
+                " ON CONFLICT(url) DO UPDATE SET content_hash = excluded.content_hash,"
+                " last_seen = excluded.last_seen, last_fetched = excluded.last_fetched",
+                (url, digest, now, now, now),
+            )
+            self._db.commit()
+        if row is None or row[0] is None:
+            return ADDED
+        return UNCHANGED if row[0] == digest else CHANGED
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+_INDEXES: Dict[str, SeenIndex] = {}
+_INDEXES_LOCK = threading.Lock()
+
+
+def shared_seen_index(config: Optional[Dict[str, Any]]) -> Optional[SeenIndex]:
+    """
+    Return the process-wide SeenIndex configured by `config['incremental']`, or None if disabled.
+
+    incremental:
+      enabled: true
+      path: data/ai_lit.seen.sqlite   # default: <output stem>.seen.sqlite
+      recheck_count: 20               # stale known items re-fetched per run
+      recheck_after_days: 7           # when a known item counts as stale
+    """
+    cfg = (config or {}).get("incremental") or {}
+    if not cfg.get("enabled", False):
+        return None
+    output = (config or {}).get("output_path") or (config or {}).get("output") or "data/output.csv"
+    path = os.path.abspath(cfg.get("path") or os.path.splitext(output)[0] + ".seen.sqlite")
+    with _INDEXES_LOCK:
+        index = _INDEXES.get(path)
+        if index is None:
+            index = _INDEXES[path] = SeenIndex(
+                path,
+                recheck_count=cfg.get("recheck_count", 0),
+                recheck_after=float(cfg.get("recheck_after_days", 7)) * 86400,
+            )
+    return index
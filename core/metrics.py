@@ -0,0 +1,262 @@
+# core/metrics.py
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# same logger as core.utils; imported by name because core.utils records retries here
+logger = logging.getLogger("webcrawler")
+
+# upper bounds in seconds, from a cached parse (~1 ms) to a slow browser page load
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _key(name: str, labels: Dict[str, Any]) -> Tuple[str, LabelKey]:
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _label_text(labels: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    body = ",".join('{}="{}"'.format(k, v.replace("\\", "\\\\").replace('"', '\\"')) for k, v in pairs)
+    return "{" + body + "}"
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram of durations in seconds (Prometheus layout),
+    with count, sum, min and max. Quantiles are interpolated from the buckets.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)    # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def observe(self, value: float) -> None:
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        lower = 0.0
+        for i, n in enumerate(self.counts):
+            upper = self.buckets[i] if i < len(self.buckets) else self.max
+            if n and seen + n >= rank:
+                est = lower + (upper - lower) * (rank - seen) / n
+                return min(max(est, self.min), self.max)
+            seen += n
+            lower = upper
+        return self.max
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "mean": round(self.sum / self.count, 6) if self.count else None,
+            "min": self.min,
+            "max": self.max,
+            "p50": self.quantile(0.5),
+            "p90": self.quantile(0.9),
+            "p99": self.quantile(0.99),
+        }
+
+
+class Metrics:
+    """
+    Thread-safe registry of counters and duration histograms for one process.
+
+    Histograms are keyed by stage (`stage_seconds{stage="fetch_detail"}`),
+    counters by name and optional labels (`bytes_downloaded_total{source="http"}`).
+    """
+
+    def __init__(self, prefix: str = "crawler"):
+        self.prefix = prefix
+        self.started = time.time()
+        self._counters: Dict[Tuple[str, LabelKey], float] = {}
+        self._histograms: Dict[Tuple[str, LabelKey], Histogram] = {}
+        self._lock = threading.Lock()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.started = time.time()
+            self._counters.clear()
+            self._histograms.clear()
+
+    def inc(self, name: str, value: float = 1, **labels: Any) -> None:
+        key = _key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, stage: str, seconds: float) -> None:
+        """
+        Record one duration of `stage` (fetch_list, parse_list, fetch_detail, ...).
+        """
+        key = _key("stage_seconds", {"stage": stage})
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = Histogram()
+            hist.observe(seconds)
+
+    @contextmanager
+    def time(self, stage: str) -> Iterator[None]:
+        """
+        Context manager that observes the wall time of its block under `stage`,
+        also when the block raises.
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - started)
+
+    def counter(self, name: str, **labels: Any) -> float:
+        with self._lock:
+            return self._counters.get(_key(name, labels), 0)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        JSON-friendly summary: counters, per-stage timing statistics and uptime.
+        """
+        with self._lock:
+            counters = {name + _label_text(labels): value for (name, labels), value in sorted(self._counters.items())}
+            stages = {dict(labels).get("stage", name): hist.summary()
+                      for (name, labels), hist in sorted(self._histograms.items())}
+        return {
+            "started_at": self.started,
+            "elapsed_seconds": round(time.time() - self.started, 3),
+            "counters": counters,
+            "stages": stages,
+        }
+
+    def summary_line(self) -> str:
+        """
+        One log line with count, total and p50/p90 per stage, for end-of-run logs.
+        """
+        parts = []
+        for stage, s in self.snapshot()["stages"].items():
+            parts.append(f"{stage} n={s['count']} total={s['sum']:.2f}s "
+                         f"p50={1000 * s['p50']:.1f}ms p90={1000 * s['p90']:.1f}ms")
+        return "; ".join(parts) or "no stages timed"
+
+    def to_prometheus(self) -> str:
+        """
+        Render all metrics in the Prometheus text exposition format.
+        """
+        lines: List[str] = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(self._histograms.items())
+        typed = set()
+        for (name, labels), value in counters:
+            full = f"{self.prefix}_{name}"
+            if full not in typed:
+                lines.append(f"# TYPE {full} counter")
+                typed.add(full)
+            lines.append(f"{full}{_label_text(labels)} {value:g}")
+        for (name, labels), hist in histograms:
+            full = f"{self.prefix}_{name}"
+            if full not in typed:
+                lines.append(f"# TYPE {full} histogram")
+                typed.add(full)
+            cumulative = 0
+            for bound, n in zip(hist.buckets, hist.counts):
+                cumulative += n
+                lines.append(f"{full}_bucket{_label_text(labels, ('le', f'{bound:g}'))} {cumulative}")
+            lines.append(f"{full}_bucket{_label_text(labels, ('le', '+Inf'))} {hist.count}")
+            lines.append(f"{full}_sum{_label_text(labels)} {hist.sum:.6f}")
+            lines.append(f"{full}_count{_label_text(labels)} {hist.count}")
+        lines.append(f"# TYPE {self.prefix}_elapsed_seconds gauge")
+        lines.append(f"{self.prefix}_elapsed_seconds {time.time() - self.started:.3f}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path_prefix: str) -> None:
+        """
+        Write `<path_prefix>.json` and `<path_prefix>.prom`, replacing both atomically.
+        """
+        parent = os.path.dirname(path_prefix)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        for ext, text in ((".json", json.dumps(self.snapshot(), indent=2)), (".prom", self.to_prometheus())):
+            tmp = f"{path_prefix}{ext}.tmp"
+            with open(tmp, "w", encoding="utf-8") as fh:
+                fh.write(text)
+            os.replace(tmp, path_prefix + ext)
+
+
+# process-wide registry used by core modules and run.py
+METRICS = Metrics()
+
+
+class MetricsExporter:
+    """
+    Writes METRICS to disk every `interval` seconds from a daemon thread, and
+    once more on `stop()`, so long crawls can be watched while they run
+    (e.g. by a node_exporter textfile collector reading the .prom file).
+
+    metrics:
+      enabled: true
+      path: data/ai_lit.metrics   # writes .json and .prom (default: <output stem>.metrics)
+      interval: 30                # seconds between exports, 0 = only at the end
+    """
+
+    def __init__(self, path_prefix: str, interval: float = 30.0, metrics: Metrics = METRICS):
+        self.path_prefix = path_prefix
+        self.interval = float(interval or 0)
+        self.metrics = metrics
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def export(self) -> None:
+        try:
+            self.metrics.write(self.path_prefix)
+        except OSError:
+            logger.exception("Failed to export metrics to %s", self.path_prefix)
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.export()
+
+    def start(self) -> "MetricsExporter":
+        if self.interval > 0:
+            self._thread = threading.Thread(target=self._loop, name="metrics-export", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.export()
+
+
+def default_metrics_path(config: Dict[str, Any], output_path: str) -> str:
+    """
+    `config['metrics']['path']`, or `<output dir>/<output stem>.metrics`.
+    """
+    cfg = config.get("metrics") or {}
+    if cfg.get("path"):
+        return cfg["path"]
+    stem = os.path.splitext(output_path)[0]
+    return stem + ".metrics"
@@ -1,61 +1,218 @@
-# core/parser.py
-from typing import Dict, Any, Union, Tuple, List
-from bs4 import BeautifulSoup
+import re
+import threading
+from typing import Dict, Any, Union, Tuple, List, Optional, Hashable
+
+import soupsieve
+from bs4 import BeautifulSoup, SoupStrainer
 
 SelectorRule = Union[str, Tuple[str, str]]  # either CSS selector (text) or (selector, attr)
 
+BACKENDS = ("selectolax", "lxml", "html.parser")
+_LEADING_TAG = re.compile(r"^([a-zA-Z][a-zA-Z0-9-]*)")
+# attribute conditions and quoted strings, removed before looking for unsafe syntax
+_ATTRIBUTES = re.compile(r"\[[^\]]*\]|\"[^\"]*\"|'[^']*'")
+
+
+def _installed(module: str) -> bool:
+    try:
+        __import__(module)
+        return True
+    except ImportError:
+        return False
 
-def extract_fields(html: str, selectors: Dict[str, SelectorRule]) -> Dict[str, Any]:
+
+def resolve_backend(backend: Optional[str] = None) -> str:
     """
-    Generic field extractor using BeautifulSoup.
+    Resolve a parser backend name.
 
-    - html: raw HTML string
-    - selectors: mapping field_name -> selector or (selector, attribute)
-      Examples:
-        { "title": "h1.node-title",
-          "pdf": ("a.download", "href") }
+    - None / "auto": lxml if installed, otherwise html.parser
+    - "lxml", "selectolax": used when installed, otherwise degrade to the next available one
+    - "html.parser": always available
+    """
+    name = (backend or "auto").lower()
+    if name == "auto":
+        return "lxml" if _installed("lxml") else "html.parser"
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown parser backend: {backend}")
+    if name == "selectolax" and not _installed("selectolax"):
+        name = "lxml"
+    if name == "lxml" and not _installed("lxml"):
+        name = "html.parser"
+    return name
 
-    Returns a dict of extracted values. If element not found -> None.
+
+def soup_builder(backend: Optional[str] = None) -> str:
+    """
+    Return the BeautifulSoup tree builder for a backend (selectolax has no soup, so it maps to lxml/html.parser).
     """
-    soup = BeautifulSoup(html or "", "html.parser")
-    out: Dict[str, Any] = {}
+    name = resolve_backend(backend)
+    if name == "selectolax":
+        return "lxml" if _installed("lxml") else "html.parser"
+    return name
 
-    for field, rule in (selectors or {}).items():
-        if not rule:
-            out[field] = None
-            continue
 
+def make_soup(html: str, backend: Optional[str] = None, parse_only: Optional[SoupStrainer] = None) -> BeautifulSoup:
+    """
+    Build a BeautifulSoup tree with the fastest available builder for `backend`.
+    """
+    return BeautifulSoup(html or "", soup_builder(backend), parse_only=parse_only)
+
+
+def strainer_for(selectors: List[str]) -> Optional[SoupStrainer]:
+    """
+    Derive a SoupStrainer from CSS selectors: keep only the tags that start each selector
+    (with their subtrees). Returns None when a selector does not start with a tag name,
+    or depends on what the strainer drops: sibling combinators (`h2 + p`, `h2 ~ p`)
+    match outside the kept subtrees, and pseudo-classes (`:first-child`, `:has()`)
+    see a pruned tree.
+    """
+    names = set()
+    for sel in selectors:
+        bare = _ATTRIBUTES.sub("", sel)
+        if any(c in bare for c in "+~:("):
+            return None
+        for part in sel.split(","):
+            m = _LEADING_TAG.match(part.strip())
+            if not m:
+                return None
+            names.add(m.group(1).lower())
+    return SoupStrainer(sorted(names)) if names else None
+
+
+class FieldRule:
+    """
+    One compiled field: ordered fallback selectors plus an optional attribute name.
+    """
+
+    __slots__ = ("field", "selectors", "compiled", "attr")
+
+    def __init__(self, field: str, selectors: List[str], attr: Optional[str] = None):
+        self.field = field
+        self.selectors = selectors
+        self.compiled = [soupsieve.compile(s) for s in selectors]
+        self.attr = attr
+
+
+class ExtractionPlan:
+    """
+    Extraction plan compiled once from a `detail_selectors` mapping.
+
+    Fallback strings ('a || b') are split and every selector is precompiled with
+    soupsieve up front, so `extract()` only parses the document and runs matches.
+    With `strain=True` the document is parsed through a SoupStrainer derived from
+    the selectors (ignored for the selectolax backend and when no safe strainer exists).
+    """
+
+    def __init__(self, selectors: Dict[str, SelectorRule], backend: Optional[str] = None, strain: bool = False):
+        self.backend = resolve_backend(backend)
+        self.rules: List[Tuple[str, Optional[FieldRule]]] = []
+        for field, rule in (selectors or {}).items():
+            self.rules.append((field, self._compile_rule(field, rule)))
+
+        all_selectors = [s for _, r in self.rules if r for s in r.selectors]
+        self.strainer = strainer_for(all_selectors) if strain and self.backend != "selectolax" else None
+
+    @staticmethod
+    def _compile_rule(field: str, rule: Any) -> Optional[FieldRule]:
+        if not rule:
+            return None
         # attribute extraction: (selector, attr)
         if isinstance(rule, (list, tuple)) and len(rule) == 2:
             sel, attr = rule
-            elem = soup.select_one(sel)
-            if not elem:
-                out[field] = None
-            else:
-                # fetch attribute safely
-                out[field] = elem.get(attr, None)
-            continue
-
-        # string rule -> CSS selector for text
+            return FieldRule(field, [sel], attr)
+        # string rule -> CSS selector for text; '||' separates fallbacks
         if isinstance(rule, str):
-            # If selector contains '||' treat as multi-selector fallback
-            if '||' in rule:
-                parts = [r.strip() for r in rule.split('||') if r.strip()]
-            else:
-                parts = [rule]
+            parts = [r.strip() for r in rule.split('||') if r.strip()]
+            return FieldRule(field, parts) if parts else None
+        # Unknown rule type
+        return None
+
+    def extract(self, html: str) -> Dict[str, Any]:
+        if self.backend == "selectolax":
+            return self._extract_selectolax(html)
 
+        soup = make_soup(html, self.backend, parse_only=self.strainer)
+        out: Dict[str, Any] = {}
+        for field, rule in self.rules:
+            if rule is None:
+                out[field] = None
+                continue
+            if rule.attr is not None:
+                elem = rule.compiled[0].select_one(soup)
+                out[field] = elem.get(rule.attr, None) if elem else None
+                continue
             value = None
-            for part in parts:
-                elem = soup.select_one(part)
+            for sel in rule.compiled:
+                elem = sel.select_one(soup)
                 if elem:
                     text = elem.get_text(separator=' ', strip=True)
                     if text:
                         value = text
                         break
             out[field] = value
-            continue
+        return out
+
+    def _extract_selectolax(self, html: str) -> Dict[str, Any]:
+        from selectolax.parser import HTMLParser
+
+        tree = HTMLParser(html or "")
+        out: Dict[str, Any] = {}
+        for field, rule in self.rules:
+            if rule is None:
+                out[field] = None
+                continue
+            if rule.attr is not None:
+                node = tree.css_first(rule.selectors[0])
+                out[field] = node.attributes.get(rule.attr) if node is not None else None
+                continue
+            value = None
+            for sel in rule.selectors:
+                node = tree.css_first(sel)
+                if node is not None:
+                    text = " ".join(node.text(separator=" ", strip=True).split())
+                    if text:
+                        value = text
+                        break
+            out[field] = value
+        return out
+
+
+_PLAN_CACHE: Dict[Hashable, ExtractionPlan] = {}
+_PLAN_LOCK = threading.Lock()
 
-        # Unknown rule type
-        out[field] = None
 
-    return out
+def _freeze(rule: Any) -> Hashable:
+    if isinstance(rule, (list, tuple)):
+        return tuple(_freeze(r) for r in rule)
+    return rule
+
+
+def compile_plan(selectors: Dict[str, SelectorRule], backend: Optional[str] = None, strain: bool = False) -> ExtractionPlan:
+    """
+    Return a cached ExtractionPlan for `selectors` (compiled on first use).
+    """
+    key = (tuple((f, _freeze(r)) for f, r in (selectors or {}).items()), resolve_backend(backend), bool(strain))
+    with _PLAN_LOCK:
+        plan = _PLAN_CACHE.get(key)
+        if plan is None:
+            plan = _PLAN_CACHE[key] = ExtractionPlan(selectors, backend=backend, strain=strain)
+    return plan
+
+
+def extract_fields(html: str, selectors: Dict[str, SelectorRule], backend: Optional[str] = None,
+                   strain: bool = False) -> Dict[str, Any]:
+    """
+    Generic field extractor using BeautifulSoup (or selectolax).
+
+    - html: raw HTML string
+    - selectors: mapping field_name -> selector or (selector, attribute)
+      Examples:
+        { "title": "h1.node-title",
+          "pdf": ("a.download", "href") }
+    - backend: "auto" (default), "lxml", "selectolax" or "html.parser"
+    - strain: parse only the tags the selectors can match (see `strainer_for`)
+
+    Selectors are compiled once per distinct mapping and cached.
+    Returns a dict of extracted values. If element not found -> None.
+    """
+    return compile_plan(selectors, backend=backend, strain=strain).extract(html)
@@ -0,0 +1,422 @@
+import functools
+import multiprocessing
+import os
+import queue
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from .archive import PageArchive
+from .crawler import load_crawler_class
+from .metrics import METRICS
+from .profiling import shared_profiler
+from .scheduler import GlobalScheduler
+from .utils import logger, CircuitBreaker, RetryPolicy, call_with_retry
+
+ItemResult = Tuple[List[Dict[str, Any]], Optional[str]]
+
+
+class DetailFetcher:
+    """
+    Fetch step shared by all detail workers: retries with exponential backoff,
+    jitter and Retry-After, and a per-host circuit breaker, configured by
+
+    retry:
+      times: 3
+      backoff: 1.0          # seconds before the first retry (0 = immediately)
+      factor: 2
+      max_delay: 60
+      jitter: 0.5
+      policies:             # per exception class name, most specific wins
+        HttpStatusError: {times: 5, backoff: 5}
+    circuit_breaker:
+      failure_threshold: 5
+      reset_timeout: 60
+
+    In a batch, each attempt also waits for a slot of the shared `scheduler`
+    (global and per-host limits, admitted by the config's `priority`).
+    """
+
+    def __init__(self, config: Dict[str, Any], scheduler: Optional[GlobalScheduler] = None):
+        retry_cfg = dict({"backoff": 1.0, "jitter": 0.5}, **(config.get("retry") or {}))
+        self.policy = RetryPolicy.from_config(retry_cfg)
+        self.policies = {name: RetryPolicy.from_config(p) for name, p in (retry_cfg.get("policies") or {}).items()}
+        cb_cfg = config.get("circuit_breaker") or {}
+        self.breaker: Optional[CircuitBreaker] = None
+        if cb_cfg.get("enabled", True):
+            self.breaker = CircuitBreaker(
+                failure_threshold=cb_cfg.get("failure_threshold", 5),
+                reset_timeout=cb_cfg.get("reset_timeout", 60),
+            )
+        self.scheduler = scheduler
+        self.priority = int(config.get("priority", 0))
+
+    def __call__(self, crawler, item: str) -> str:
+        fetch = crawler.fetch_detail_cached
+        if self.scheduler is not None:
+            fetch = self._in_slot(fetch)
+        return call_with_retry(
+            fetch, item,
+            policy=self.policy, policies=self.policies,
+            breaker=self.breaker, host=urlsplit(item).netloc.lower() or None,
+        )
+
+    def _in_slot(self, fetch: Callable[[str], str]) -> Callable[[str], str]:
+        """
+        `fetch` holding a scheduler slot for each attempt.
+        """
+        @functools.wraps(fetch)
+        def slotted(url: str) -> str:
+            with self.scheduler.slot(url, self.priority):
+                return fetch(url)
+        return slotted
+
+
+def fetch_item(crawler, item: str, fetch: Optional[DetailFetcher] = None) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Fetch one detail page. Returns (html, None) or (None, error message).
+    The whole fetch, retries included, is timed as the `fetch_detail` stage.
+    """
+    try:
+        with METRICS.time("fetch_detail"):
+            if fetch is not None:
+                html_detail = fetch(crawler, item)
+            else:
+                html_detail = crawler.fetch_detail_cached(item)
+    except Exception as e:
+        logger.exception("fetch_detail failed for %s", item)
+        METRICS.inc("failures_total", stage="fetch_detail")
+        return None, f"fetch_detail: {e!r}"
+
+    if not html_detail:
+        logger.warning("Empty detail HTML for %s", item)
+        METRICS.inc("failures_total", stage="fetch_detail")
+        return None, "empty detail HTML"
+    return html_detail, None
+
+
+def parse_records(crawler, item: Any, html_detail: str) -> ItemResult:
+    """
+    Run `parse_detail` (under the parse profiler with `--profile`) and normalize
+    its result to a list of records.
+    """
+    profiler = shared_profiler(crawler.config)
+    try:
+        if profiler is not None:
+            rec = profiler.run(crawler.parse_detail, html_detail)
+        else:
+            rec = crawler.parse_detail(html_detail)
+    except Exception as e:
+        logger.exception("parse_detail failed for %s", item)
+        return [], f"parse_detail: {e!r}"
+
+    if isinstance(rec, dict):
+        return [rec], None
+    if isinstance(rec, list):
+        return rec, None
+    logger.warning("parse_detail returned unsupported type %s for %s", type(rec), item)
+    return [], f"unsupported parse_detail result {type(rec).__name__}"
+
+
+def timed_parse(crawler, item: Any, html_detail: str) -> Tuple[List[Dict[str, Any]], Optional[str], float]:
+    """
+    `parse_records` plus its duration in seconds. Parse workers return the duration
+    instead of recording it, since their METRICS registry is not the exported one.
+    """
+    started = time.perf_counter()
+    records, error = parse_records(crawler, item, html_detail)
+    return records, error, time.perf_counter() - started
+
+
+def record_parse(seconds: float, error: Optional[str]) -> None:
+    METRICS.observe("parse_detail", seconds)
+    if error:
+        METRICS.inc("failures_total", stage="parse_detail")
+
+
+def process_item(crawler, item: Any, fetch: Optional[DetailFetcher] = None) -> ItemResult:
+    """
+    Fetch and parse a single detail item with the given crawler.
+    Errors are logged and isolated: a failing item yields ([], error message).
+    """
+    if not isinstance(item, (str,)):
+        logger.warning("Skipping non-string item: %r", item)
+        return [], None
+    html_detail, error = fetch_item(crawler, item, fetch)
+    if error:
+        return [], error
+    records, error, seconds = timed_parse(crawler, item, html_detail)
+    record_parse(seconds, error)
+    return records, error
+
+
+def _progress_label(items: Iterable[Any]):
+    total = len(items) if hasattr(items, "__len__") else None
+
+    def label(idx: int) -> str:
+        return f"{idx}/{total}" if total is not None else str(idx)
+    return label
+
+
+def run_detail_stage(crawlers: List[Any], items: Iterable[Any], fetch: Optional[DetailFetcher] = None
+                     ) -> Iterator[Tuple[int, Any, List[Dict[str, Any]], Optional[str]]]:
+    """
+    Process items with one thread per crawler and yield (index, item, records, error)
+    in input order. The number of in-flight items is bounded so results are
+    delivered incrementally instead of after the whole stage finishes.
+    """
+    label = _progress_label(items)
+
+    if len(crawlers) <= 1:
+        for idx, item in enumerate(items, start=1):
+            logger.info("[%s] Processing %s", label(idx), repr(item))
+            yield (idx, item) + process_item(crawlers[0], item, fetch)
+        return
+
+    idle: "queue.Queue[Any]" = queue.Queue()
+    for c in crawlers:
+        idle.put(c)
+
+    def work(idx: int, item: Any) -> ItemResult:
+        c = idle.get()
+        try:
+            logger.info("[%s] Processing %s", label(idx), repr(item))
+            return process_item(c, item, fetch)
+        finally:
+            idle.put(c)
+
+    max_in_flight = 2 * len(crawlers)
+    pending: deque = deque()
+    with ThreadPoolExecutor(max_workers=len(crawlers), thread_name_prefix="detail") as pool:
+        for idx, item in enumerate(items, start=1):
+            pending.append((idx, item, pool.submit(work, idx, item)))
+            while len(pending) >= max_in_flight:
+                i, it, fut = pending.popleft()
+                yield (i, it) + fut.result()
+        while pending:
+            i, it, fut = pending.popleft()
+            yield (i, it) + fut.result()
+
+
+# ---- process-pool parse stage ---------------------------------------------
+
+_PARSER = None
+
+
+def _init_parser(config: Dict[str, Any]) -> None:
+    """
+    Worker-process initializer: rebuild a browser-less parser from the config.
+    """
+    global _PARSER
+    cls = load_crawler_class(config["crawler_class"])
+    _PARSER = cls.for_parsing(config)
+
+
+def _parse_in_worker(item: Any, html_detail: str) -> Tuple[List[Dict[str, Any]], Optional[str], float]:
+    return timed_parse(_PARSER, item, html_detail)
+
+
+def open_parse_pool(config: Dict[str, Any]) -> ProcessPoolExecutor:
+    """
+    The process pool of the pipelined parse stage (`pipeline.parse_workers`
+    processes, default: CPU count), each holding a `for_parsing` crawler.
+    """
+    cfg = config.get("pipeline") or {}
+    parse_workers = int(cfg.get("parse_workers") or os.cpu_count() or 1)
+    # spawn: never fork a process that is running WebDriver and fetch threads
+    ctx = multiprocessing.get_context("spawn")
+    return ProcessPoolExecutor(max_workers=parse_workers, mp_context=ctx,
+                               initializer=_init_parser, initargs=(config,))
+
+
+def run_pipeline(crawlers: List[Any], items: Iterable[Any], config: Dict[str, Any],
+                 fetch: Optional[DetailFetcher] = None, parse_pool: Optional[ProcessPoolExecutor] = None
+                 ) -> Iterator[Tuple[int, Any, List[Dict[str, Any]], Optional[str]]]:
+    """
+    Pipelined detail stage: fetch threads (one per crawler) feed fetched pages into
+    a process pool running `parse_detail`, so browsers never wait for the parser and
+    parsing uses all cores. At most `queue_size` items are in flight (backpressure).
+    Yields (index, item, records, error) in input order, or as soon as each item
+    is done with `ordered: false`. Callers that run several passes pass their own
+    `parse_pool` (see `open_parse_pool`) and shut it down themselves; otherwise
+    the pool lives for this call.
+
+    pipeline:
+      enabled: true
+      parse_workers: 4      # default: CPU count
+      queue_size: 32
+      ordered: true
+    """
+    cfg = config.get("pipeline") or {}
+    max_in_flight = max(len(crawlers), int(cfg.get("queue_size", 32)))
+    ordered = bool(cfg.get("ordered", True))
+    label = _progress_label(items)
+
+    idle: "queue.Queue[Any]" = queue.Queue()
+    for c in crawlers:
+        idle.put(c)
+
+    owns_pool = parse_pool is None
+    if owns_pool:
+        parse_pool = open_parse_pool(config)
+    fetch_pool = ThreadPoolExecutor(max_workers=len(crawlers), thread_name_prefix="fetch")
+
+    def fetch_then_parse(idx: int, item: Any, done: Future) -> None:
+        if not isinstance(item, (str,)):
+            logger.warning("Skipping non-string item: %r", item)
+            done.set_result(([], None))
+            return
+        c = idle.get()
+        try:
+            logger.info("[%s] Fetching %s", label(idx), repr(item))
+            html_detail, error = fetch_item(c, item, fetch)
+        finally:
+            idle.put(c)
+        if error:
+            done.set_result(([], error))
+            return
+        try:
+            parsed = parse_pool.submit(_parse_in_worker, item, html_detail)
+        except Exception as e:
+            done.set_result(([], f"parse_detail: {e!r}"))
+            return
+
+        def on_parsed(f: Future) -> None:
+            try:
+                records, parse_error, seconds = f.result()
+            except Exception as e:
+                logger.error("parse worker failed for %s: %r", item, e)
+                METRICS.inc("failures_total", stage="parse_detail")
+                done.set_result(([], f"parse_detail: {e!r}"))
+                return
+            record_parse(seconds, parse_error)
+            done.set_result((records, parse_error))
+        parsed.add_done_callback(on_parsed)
+
+    pending: deque = deque()
+
+    def submit(idx: int, item: Any) -> None:
+        done: Future = Future()
+        fetch_pool.submit(fetch_then_parse, idx, item, done)
+        pending.append((idx, item, done))
+
+    def drain(until: int) -> Iterator[Tuple[int, Any, List[Dict[str, Any]], Optional[str]]]:
+        while len(pending) > until:
+            if ordered:
+                i, it, done = pending.popleft()
+                yield (i, it) + done.result()
+                continue
+            wait([p[2] for p in pending], return_when=FIRST_COMPLETED)
+            for entry in [p for p in pending if p[2].done()]:
+                pending.remove(entry)
+                yield (entry[0], entry[1]) + entry[2].result()
+
+    try:
+        for idx, item in enumerate(items, start=1):
+            submit(idx, item)
+            if len(pending) >= max_in_flight:
+                yield from drain(max_in_flight - 1)
+        yield from drain(0)
+    finally:
+        fetch_pool.shutdown(wait=True)
+        if owns_pool:
+            parse_pool.shutdown(wait=True)
+
+
+# ---- archive replay ---------------------------------------------------------
+
+_REPLAY = None
+
+
+def _init_replay(config: Dict[str, Any], archive_path: str) -> None:
+    """
+    Replay-worker initializer: a parser plus a read-only (memory-mapped) view of the archive.
+    """
+    global _REPLAY
+    _init_parser(config)
+    _REPLAY = PageArchive(archive_path, readonly=True)
+
+
+def _replay_chunk(chunk: List[Tuple[Any, int, int]]) -> List[Tuple[List[Dict[str, Any]], Optional[str], float]]:
+    return [timed_parse(_PARSER, item, _REPLAY.read(offset, length)) for item, offset, length in chunk]
+
+
+def run_replay(crawler, archive: PageArchive, items: Iterable[Any], config: Dict[str, Any]
+               ) -> Iterator[Tuple[int, Any, List[Dict[str, Any]], Optional[str]]]:
+    """
+    Offline detail stage: `parse_detail` over the archived page of each item instead
+    of fetching it. Items are sent to a process pool in chunks of (item, offset,
+    length); workers read the records from their own memory map of the archive,
+    so no HTML crosses process boundaries. Yields (index, item, records, error)
+    in input order; items missing from the archive fail with "not archived".
+
+    archive:
+      replay_workers: 4     # default: pipeline.parse_workers, else CPU count (1 = parse inline)
+      replay_chunk: 16      # items per task
+    """
+    cfg = config.get("archive") or {}
+    workers = int(cfg.get("replay_workers") or (config.get("pipeline") or {}).get("parse_workers")
+                  or os.cpu_count() or 1)
+    chunk_size = max(1, int(cfg.get("replay_chunk", 16)))
+    label = _progress_label(items)
+
+    def located(enumerated: Iterable[Tuple[int, Any]]) -> Iterator[Tuple[int, Any, Optional[Tuple[int, int]]]]:
+        for idx, item in enumerated:
+            loc = archive.locate(item) if isinstance(item, str) else None
+            if loc is None:
+                logger.warning("[%s] Not in the archive: %r", label(idx), item)
+                METRICS.inc("failures_total", stage="replay")
+            yield idx, item, loc
+
+    if workers <= 1:
+        for idx, item, loc in located(enumerate(items, start=1)):
+            if loc is None:
+                yield idx, item, [], "not archived"
+                continue
+            records, error, seconds = timed_parse(crawler, item, archive.read(*loc))
+            record_parse(seconds, error)
+            yield idx, item, records, error
+        return
+
+    ctx = multiprocessing.get_context("spawn")
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=ctx,
+                               initializer=_init_replay, initargs=(config, archive.path))
+    pending: deque = deque()   # (entries, future or None); entries are (idx, item, loc)
+    max_in_flight = 2 * workers
+
+    def flush(entries: List[Tuple[int, Any, Optional[Tuple[int, int]]]]) -> None:
+        tasks = [(item, loc[0], loc[1]) for _, item, loc in entries if loc is not None]
+        pending.append((entries, pool.submit(_replay_chunk, tasks) if tasks else None))
+
+    def drain(until: int) -> Iterator[Tuple[int, Any, List[Dict[str, Any]], Optional[str]]]:
+        while len(pending) > until:
+            entries, fut = pending.popleft()
+            try:
+                results = iter(fut.result() if fut is not None else [])
+            except Exception as e:
+                logger.error("replay worker failed: %r", e)
+                METRICS.inc("failures_total", len(entries), stage="parse_detail")
+                results = iter([([], f"parse_detail: {e!r}", 0.0)] * len(entries))
+            for idx, item, loc in entries:
+                if loc is None:
+                    yield idx, item, [], "not archived"
+                    continue
+                records, error, seconds = next(results)
+                record_parse(seconds, error)
+                yield idx, item, records, error
+
+    try:
+        chunk: List[Tuple[int, Any, Optional[Tuple[int, int]]]] = []
+        for entry in located(enumerate(items, start=1)):
+            chunk.append(entry)
+            if len(chunk) >= chunk_size:
+                flush(chunk)
+                chunk = []
+                yield from drain(max_in_flight - 1)
+        if chunk:
+            flush(chunk)
+        yield from drain(0)
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
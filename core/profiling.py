@@ -0,0 +1,159 @@
+import cProfile
+import glob
+import io
+import json
+import multiprocessing
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from multiprocessing.util import Finalize
+from typing import Any, Callable, Dict, Optional
+
+from .utils import logger
+
+
+class ParseProfiler:
+    """
+    cProfile + tracemalloc around parse calls, enabled by `run.py --profile`.
+
+    Calls go through `run(func, *args)`; they are serialized so a single
+    cProfile.Profile sees every parse (parsing holds the GIL anyway, so this
+    costs little throughput). Each process writes `parse-<pid>.prof` and
+    `parse-<pid>.txt` to `dir`; pipeline parse workers do so when they exit.
+    `report()` merges all per-process profiles into `parse.prof` and `parse.txt`.
+    Batch jobs have one profiler each; their calls are serialized across
+    profilers too, since a process can only run one cProfile at a time (3.12+).
+    """
+
+    _active = threading.Lock()
+
+    def __init__(self, directory: str, top: int = 30):
+        self.dir = directory
+        self.top = top
+        self.calls = 0
+        self.peak_bytes = 0
+        self.total_seconds = 0.0
+        self._profile = cProfile.Profile()
+        self._lock = threading.Lock()
+        os.makedirs(self.dir, exist_ok=True)
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(10)
+        if multiprocessing.parent_process() is not None:
+            # parse worker: no one calls dump() explicitly, so do it at process exit
+            Finalize(self, ParseProfiler.dump, args=(self,), exitpriority=10)
+
+    def clear(self) -> None:
+        """
+        Remove per-process files left by an earlier run in the same directory.
+        """
+        for f in glob.glob(os.path.join(self.dir, "parse-*")):
+            os.remove(f)
+
+    def run(self, func: Callable, *args: Any, **kwargs: Any) -> Any:
+        with ParseProfiler._active, self._lock:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            started = time.perf_counter()
+            self._profile.enable()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._profile.disable()
+                self.total_seconds += time.perf_counter() - started
+                self.calls += 1
+                self.peak_bytes = max(self.peak_bytes, tracemalloc.get_traced_memory()[1] - before)
+
+    def _text(self, stats: pstats.Stats, calls: int, seconds: float, peak_bytes: int,
+              snapshot: Optional[tracemalloc.Snapshot] = None) -> str:
+        out = io.StringIO()
+        out.write(f"parse calls: {calls}, total {seconds:.3f}s, "
+                  f"mean {1000 * seconds / max(calls, 1):.2f} ms/call, "
+                  f"peak allocation per call {peak_bytes / 1024:.1f} KiB\n\n")
+        stats.stream = out
+        stats.sort_stats("cumulative").print_stats(self.top)
+        stats.sort_stats("tottime").print_stats(self.top)
+        if snapshot is not None:
+            out.write("\nTop allocations still held (tracemalloc):\n")
+            for stat in snapshot.statistics("lineno")[:self.top]:
+                out.write(f"  {stat}\n")
+        return out.getvalue()
+
+    def dump(self) -> Optional[str]:
+        """
+        Write this process's profile; returns the .prof path (None if nothing was profiled).
+        """
+        with self._lock:
+            if not self.calls:
+                return None
+            # snapshot before pstats allocates its tables, so they do not top the list
+            snapshot = tracemalloc.take_snapshot().filter_traces((
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen *>"),
+            ))
+            path = os.path.join(self.dir, f"parse-{os.getpid()}.prof")
+            self._profile.dump_stats(path)
+            totals = {"calls": self.calls, "seconds": self.total_seconds, "peak_bytes": self.peak_bytes}
+            text = self._text(pstats.Stats(self._profile), snapshot=snapshot, **totals)
+        stem = os.path.splitext(path)[0]
+        with open(stem + ".txt", "w", encoding="utf-8") as fh:
+            fh.write(text)
+        with open(stem + ".json", "w", encoding="utf-8") as fh:
+            json.dump(totals, fh)
+        return path
+
+    def report(self) -> Optional[str]:
+        """
+        Dump this process and merge every `parse-<pid>.prof` in `dir` into
+        `parse.prof` / `parse.txt`. Returns the text report path.
+        """
+        self.dump()
+        files = sorted(glob.glob(os.path.join(self.dir, "parse-*.prof")))
+        if not files:
+            logger.warning("Profiler: no parse calls were recorded")
+            return None
+        totals = {"calls": 0, "seconds": 0.0, "peak_bytes": 0}
+        for f in files:
+            try:
+                with open(os.path.splitext(f)[0] + ".json", "r", encoding="utf-8") as fh:
+                    part = json.load(fh)
+            except (OSError, ValueError):
+                continue
+            totals["calls"] += part["calls"]
+            totals["seconds"] += part["seconds"]
+            totals["peak_bytes"] = max(totals["peak_bytes"], part["peak_bytes"])
+        stats = pstats.Stats(*files)
+        merged = os.path.join(self.dir, "parse.prof")
+        stats.dump_stats(merged)
+        text = os.path.join(self.dir, "parse.txt")
+        with open(text, "w", encoding="utf-8") as fh:
+            fh.write(f"merged from {len(files)} process profile(s); "
+                     f"allocations per process are in parse-<pid>.txt\n")
+            fh.write(self._text(stats, **totals))
+        logger.info("Parse profile written to %s (view with: python -m pstats %s)", text, merged)
+        return text
+
+
+_PROFILERS: Dict[str, ParseProfiler] = {}
+_PROFILERS_LOCK = threading.Lock()
+
+
+def shared_profiler(config: Optional[Dict[str, Any]]) -> Optional[ParseProfiler]:
+    """
+    Return the process-wide ParseProfiler configured by `config['profile']`, or None.
+    run.py sets this from `--profile [DIR]`:
+
+    profile:
+      dir: data/ai_lit.profile
+      top: 30            # rows per report table
+    """
+    cfg = (config or {}).get("profile") or {}
+    if not cfg:
+        return None
+    directory = os.path.abspath(cfg.get("dir", "data/profile"))
+    with _PROFILERS_LOCK:
+        profiler = _PROFILERS.get(directory)
+        if profiler is None:
+            profiler = _PROFILERS[directory] = ParseProfiler(directory, top=int(cfg.get("top", 30)))
+    return profiler
@@ -0,0 +1,175 @@
+import asyncio
+import json
+import threading
+import time
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+from .utils import logger
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket.
+
+    `reserve()` takes a token immediately (the balance may go negative) and returns
+    how long the caller must wait before using it, so concurrent callers are spaced
+    out fairly without holding the lock while sleeping.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = max(1e-6, float(rate))
+        self.capacity = max(1.0, float(capacity))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens -= 1.0
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def set_rate(self, rate: float) -> None:
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = max(1e-6, float(rate))
+
+    def acquire(self) -> float:
+        """
+        Block until a token is available; returns the time waited.
+        """
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self) -> float:
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+
+class HostRateLimiter:
+    """
+    Per-host token buckets with optional AIMD adaptation.
+
+    Each host starts at `rate` requests/second. In adaptive mode every healthy
+    response (2xx/3xx/404/410, latency under `latency_target`) adds `increase` req/s
+    up to `max_rate`; a 429 or 5xx, a connection error or a slow response multiplies
+    the rate by `decrease`, down to `min_rate`. Other 4xx responses leave it as is.
+    """
+
+    BACKOFF_STATUSES = (429,)
+    HEALTHY_CLIENT_ERRORS = (404, 410)
+
+    @classmethod
+    def is_backoff(cls, status: Optional[int]) -> bool:
+        return status is not None and (status in cls.BACKOFF_STATUSES or status >= 500)
+
+    @classmethod
+    def is_healthy(cls, status: Optional[int]) -> bool:
+        return status is None or status < 400 or status in cls.HEALTHY_CLIENT_ERRORS
+
+    def __init__(self, rate: float = 1.0, burst: float = 1.0, adaptive: bool = False,
+                 min_rate: Optional[float] = None, max_rate: Optional[float] = None,
+                 increase: float = 0.1, decrease: float = 0.5, latency_target: Optional[float] = None):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.adaptive = adaptive
+        self.min_rate = float(min_rate) if min_rate else self.rate / 10
+        self.max_rate = float(max_rate) if max_rate else self.rate * 4
+        self.increase = float(increase)
+        self.decrease = float(decrease)
+        self.latency_target = latency_target
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def host_of(url: str) -> str:
+        return urlsplit(url or "").netloc.lower()
+
+    def bucket(self, url: str) -> TokenBucket:
+        host = self.host_of(url)
+        with self._lock:
+            b = self._buckets.get(host)
+            if b is None:
+                b = self._buckets[host] = TokenBucket(self.rate, self.burst)
+        return b
+
+    def acquire(self, url: str) -> float:
+        return self.bucket(url).acquire()
+
+    async def acquire_async(self, url: str) -> float:
+        return await self.bucket(url).acquire_async()
+
+    def feedback(self, url: str, status: Optional[int] = None, latency: Optional[float] = None,
+                 error: bool = False) -> None:
+        """
+        Report the outcome of a request so adaptive mode can adjust the host's rate.
+        """
+        if not self.adaptive:
+            return
+        b = self.bucket(url)
+        slow = self.latency_target is not None and latency is not None and latency > self.latency_target
+        if error or slow or self.is_backoff(status):
+            new_rate = max(self.min_rate, b.rate * self.decrease)
+            if new_rate < b.rate:
+                logger.info(f"Rate limit for {self.host_of(url)} lowered to {new_rate:.2f} req/s "
+                            f"(status={status}, latency={latency})")
+        elif self.is_healthy(status):
+            new_rate = min(self.max_rate, b.rate + self.increase)
+        else:
+            return
+        b.set_rate(new_rate)
+
+    def current_rate(self, url: str) -> float:
+        return self.bucket(url).rate
+
+
+_LIMITERS: Dict[str, HostRateLimiter] = {}
+_LIMITERS_LOCK = threading.Lock()
+
+
+def shared_limiter(config: Optional[Dict[str, Any]]) -> Optional[HostRateLimiter]:
+    """
+    Return the process-wide limiter for this config (shared by all workers), or None
+    if throttling is off. `rate_limit` is the initial delay in seconds between requests
+    to one host; `rate_limiter:` tunes it:
+
+    rate_limiter:
+      burst: 1              # requests allowed back-to-back
+      adaptive: true        # AIMD: speed up while healthy, back off on 429/5xx/slow responses
+      min_rps: 0.1
+      max_rps: 5
+      increase: 0.1         # req/s added per healthy response
+      decrease: 0.5         # factor applied on backoff
+      latency_target: 3.0   # seconds; slower responses count as unhealthy
+    """
+    config = config or {}
+    seconds = float(config.get("rate_limit", 0) or 0)
+    cfg = config.get("rate_limiter") or {}
+    if seconds <= 0 and not cfg.get("rps"):
+        return None
+    rate = float(cfg.get("rps") or 1.0 / seconds)
+    key = json.dumps([rate, cfg], sort_keys=True, default=str)
+    with _LIMITERS_LOCK:
+        limiter = _LIMITERS.get(key)
+        if limiter is None:
+            limiter = _LIMITERS[key] = HostRateLimiter(
+                rate=rate,
+                burst=cfg.get("burst", 1),
+                adaptive=bool(cfg.get("adaptive", False)),
+                min_rate=cfg.get("min_rps"),
+                max_rate=cfg.get("max_rps"),
+                increase=cfg.get("increase", 0.1),
+                decrease=cfg.get("decrease", 0.5),
+                latency_target=cfg.get("latency_target"),
+            )
+    return limiter
@@ -0,0 +1,139 @@
+import itertools
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from .utils import logger
+
+
+class PriorityGate:
+    """
+    Counting semaphore whose waiters are admitted highest priority first (FIFO
+    among equal priorities), optionally with at most `per_key` holders per key
+    (e.g. per host). A waiter whose key is at its limit does not block waiters
+    for other keys behind it.
+    """
+
+    def __init__(self, capacity: int, per_key: int = 0):
+        self.capacity = max(1, int(capacity))
+        self.per_key = max(0, int(per_key))
+        self.in_use = 0
+        self._per_key: Dict[Any, int] = {}
+        self._waiting: List[Tuple[int, int, Any]] = []   # (-priority, seq, key)
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+
+    def _fits(self, key: Any) -> bool:
+        return self.in_use < self.capacity and (
+            not self.per_key or key is None or self._per_key.get(key, 0) < self.per_key)
+
+    def _next(self) -> Optional[Tuple[int, int, Any]]:
+        for entry in sorted(self._waiting):  # few waiters: at most one per fetch thread
+            if self._fits(entry[2]):
+                return entry
+        return None
+
+    def acquire(self, priority: int = 0, key: Any = None, blocking: bool = True) -> bool:
+        with self._cond:
+            if not self._waiting and self._fits(key):
+                self._take(key)
+                return True
+            if not blocking:
+                return False
+            entry = (-int(priority), next(self._seq), key)
+            self._waiting.append(entry)
+            while self._next() != entry:
+                self._cond.wait()
+            self._waiting.remove(entry)
+            self._take(key)
+            # the next waiter may fit too (different key)
+            self._cond.notify_all()
+            return True
+
+    def _take(self, key: Any) -> None:
+        self.in_use += 1
+        if key is not None:
+            self._per_key[key] = self._per_key.get(key, 0) + 1
+
+    def release(self, key: Any = None) -> None:
+        with self._cond:
+            self.in_use -= 1
+            if key is not None:
+                left = self._per_key.get(key, 1) - 1
+                if left:
+                    self._per_key[key] = left
+                else:
+                    self._per_key.pop(key, None)
+            self._cond.notify_all()
+
+
+class GlobalScheduler:
+    """
+    Capacity shared by all crawls of a batch (`run.py -c a.yaml -c b.yaml`, or
+    `--batch`): at most `workers` detail fetches in flight across all jobs, at
+    most `per_host` of them against one host, and at most `browsers` crawler
+    instances holding a browser. Whenever a fetch slot or a browser frees up,
+    it goes to the waiting job with the highest `priority`.
+
+    batch:
+      workers: 8        # detail fetches in flight, all jobs together
+      browsers: 2       # crawler instances with a WebDriver, all jobs together
+      per_host: 2       # detail fetches in flight per host (0 = no limit)
+    """
+
+    def __init__(self, workers: int = 8, browsers: int = 2, per_host: int = 2):
+        self.fetches = PriorityGate(workers, per_host)
+        self.browsers = PriorityGate(browsers)
+        self._holding: Dict[int, bool] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, cfg: Optional[Dict[str, Any]]) -> "GlobalScheduler":
+        cfg = cfg or {}
+        return cls(workers=int(cfg.get("workers", 8)), browsers=int(cfg.get("browsers", 2)),
+                   per_host=int(cfg.get("per_host", 2)))
+
+    @contextmanager
+    def slot(self, url: str, priority: int = 0) -> Iterator[None]:
+        """
+        Hold one fetch slot (and one of the URL host's) for the duration of the block.
+        """
+        host = urlsplit(url).netloc.lower() or None
+        self.fetches.acquire(priority, host)
+        try:
+            yield
+        finally:
+            self.fetches.release(host)
+
+    def start_crawler(self, factory: Callable[[], Any], priority: int = 0, wait: bool = True) -> Optional[Any]:
+        """
+        Build a crawler within the browser budget. Waits for a free browser (by
+        priority) unless `wait` is False, in which case None is returned when
+        none is free. Instances that do not drive a browser (`uses_browser`
+        is False, e.g. HTTP-only crawlers) give their place back right away;
+        the others keep it even before their driver is started on first use.
+        """
+        if not self.browsers.acquire(priority, blocking=wait):
+            return None
+        try:
+            crawler = factory()
+        except BaseException:
+            self.browsers.release()
+            raise
+        if not getattr(crawler, "uses_browser", False):
+            self.browsers.release()
+        else:
+            with self._lock:
+                self._holding[id(crawler)] = True
+        return crawler
+
+    def release_crawler(self, crawler: Any) -> None:
+        """
+        Return the browser of a crawler built by `start_crawler` (after quitting it).
+        """
+        with self._lock:
+            held = self._holding.pop(id(crawler), False)
+        if held:
+            self.browsers.release()
+            logger.debug("Browser released (%d in use)", self.browsers.in_use)
@@ -0,0 +1,231 @@
+import re
+import threading
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+import soupsieve
+from bs4 import BeautifulSoup, Tag
+
+from .parser import make_soup
+
+SectionRule = Any  # heading substring, or {heading, lists, last, item}
+
+# tag.class[attr="value"] selectors are matched without soupsieve (most calls of the pass)
+_SIMPLE = re.compile(r'^([a-zA-Z][a-zA-Z0-9-]*)?((?:\.[\w-]+)*)((?:\[[\w-]+(?:=(?:"[^"]*"|\'[^\']*\'|[\w-]+))?\])*)$')
+_ATTR = re.compile(r'\[([\w-]+)(?:=("[^"]*"|\'[^\']*\'|[\w-]+))?\]')
+
+
+def compile_matcher(selector: str) -> Callable[[Tag], bool]:
+    """
+    Predicate for one compound selector; plain soupsieve matching for anything
+    beyond tag, classes and attribute (equality) tests.
+    """
+    m = _SIMPLE.match(selector.strip())
+    if not m:
+        return soupsieve.compile(selector).match
+    name = (m.group(1) or "").lower()
+    classes = [c for c in m.group(2).split(".") if c]
+    attrs = [(k, v.strip("\"'") if v else None) for k, v in _ATTR.findall(m.group(3))]
+
+    def match(tag: Tag) -> bool:
+        if name and tag.name != name:
+            return False
+        if classes:
+            have = tag.get("class") or ()
+            if any(c not in have for c in classes):
+                return False
+        for key, value in attrs:
+            got = tag.get(key)
+            if got is None or (value is not None and got != value):
+                return False
+        return True
+    return match
+
+
+class SectionSpec:
+    """
+    Document structure compiled once from a `sections:` config block.
+
+    sections:
+      headings: [h2, h3]                             # tags whose text names a section
+      block: article                                 # a section's content: the next such tag
+      definition_list: 'dl[data-cb-name="DataCtnr"]' # dl elements read as label -> value
+      label: dt                                      # CSS for labels / values inside them
+      value: dd
+      empty: "NA"                                    # value of empty dd / empty sections
+      link_values: true                              # dd holding a link -> "text (href)"
+      pairs: true                                    # merge every definition list into the record
+      fields:                                        # record field -> section
+        "Summary of Significance": significance      # text of the section's <p>s
+        Dockets: {heading: dockets, lists: true}     # definition lists inside the section
+        Documents: {heading: documents, lists: true, last: true}   # last matching heading
+    """
+
+    def __init__(self, cfg: Optional[Dict[str, Any]] = None):
+        cfg = cfg or {}
+        self.headings = tuple(h.lower() for h in cfg.get("headings") or ("h1", "h2", "h3", "h4", "h5", "h6"))
+        self.block = (cfg.get("block") or "article").lower()
+        self.definition_list = compile_matcher(cfg.get("definition_list") or "dl")
+        self.label = compile_matcher(cfg.get("label") or "dt")
+        self.value = compile_matcher(cfg.get("value") or "dd")
+        self.empty = cfg.get("empty", "NA")
+        self.link_values = bool(cfg.get("link_values", False))
+        self.pairs = bool(cfg.get("pairs", True))
+        self.fields: Dict[str, SectionRule] = dict(cfg.get("fields") or {})
+        # every tag the single pass has to look at
+        self.names = sorted(set(self.headings) | {self.block, "dl", "dt", "dd"})
+
+
+class SectionIndex:
+    """
+    Index of a parsed document built in one traversal: each heading with the
+    content block that follows it, and each definition list with its
+    label -> value pairs (also grouped by the blocks that contain it).
+    Lookups afterwards touch only the index, not the tree.
+    """
+
+    def __init__(self, soup: BeautifulSoup, spec: Optional[SectionSpec] = None):
+        self.spec = spec or SectionSpec()
+        # (lowercased heading text, block or None), in document order
+        self.sections: List[List[Any]] = []
+        # pairs of every matched definition list, in document order
+        self.lists: List[Dict[str, Any]] = []
+        self._lists_in: Dict[int, List[Dict[str, Any]]] = {}
+        self._lookup: Dict[Tuple[str, bool], Optional[Tag]] = {}
+        self._build(soup)
+
+    def _build(self, soup: BeautifulSoup) -> None:
+        spec = self.spec
+        waiting: List[List[Any]] = []          # headings whose block has not appeared yet
+        open_lists: Dict[int, Tuple[Dict[str, Any], List[Optional[str]]]] = {}
+        for tag in soup.find_all(spec.names):
+            name = tag.name
+            if name in spec.headings:
+                section = [tag.get_text(strip=True).lower(), None]
+                self.sections.append(section)
+                waiting.append(section)
+            if name == spec.block:
+                for section in waiting:
+                    section[1] = tag
+                waiting = []
+            if name == "dl":
+                if not spec.definition_list(tag):
+                    continue
+                pairs: Dict[str, Any] = {}
+                open_lists[id(tag)] = (pairs, [None])
+                self.lists.append(pairs)
+                for parent in tag.parents:
+                    if parent.name == spec.block:
+                        self._lists_in.setdefault(id(parent), []).append(pairs)
+            elif name in ("dt", "dd"):
+                parent = tag.parent
+                while parent is not None and parent.name != "dl":
+                    parent = parent.parent
+                owner = open_lists.get(id(parent))
+                if owner is None:
+                    continue
+                pairs, last_label = owner
+                if spec.label(tag):
+                    last_label[0] = tag.get_text(strip=True)
+                elif spec.value(tag) and last_label[0]:
+                    pairs[last_label[0]] = self._value(tag)
+                    last_label[0] = None
+
+    def _value(self, tag: Tag) -> Any:
+        text = tag.get_text(strip=True)
+        if not text or text == "\xa0":
+            return self.spec.empty
+        if self.spec.link_values:
+            a = tag.find("a")
+            if a and a.get("href"):
+                return f"{a.get_text(strip=True)} ({a['href']})"
+        return text
+
+    def block(self, key: str, last: bool = False) -> Optional[Tag]:
+        """
+        Content block of the first (or last) heading containing `key` (case-insensitive).
+        """
+        cache_key = (key.lower(), last)
+        if cache_key not in self._lookup:
+            found = None
+            for text, block in (reversed(self.sections) if last else self.sections):
+                if cache_key[0] in text:
+                    found = block
+                    break
+            self._lookup[cache_key] = found
+        return self._lookup[cache_key]
+
+    def text(self, key: str, item: str = "p", last: bool = False) -> Optional[Any]:
+        """
+        Text of the `item` elements in a section's block, one per line; `empty`
+        if it has none, None if there is no such section.
+        """
+        block = self.block(key, last)
+        if block is None:
+            return None
+        return "\n".join(el.get_text(strip=True) for el in block.find_all(item)) or self.spec.empty
+
+    def lists_in(self, key: str, last: bool = False) -> List[Dict[str, Any]]:
+        """
+        Pairs of the definition lists inside a section's block.
+        """
+        block = self.block(key, last)
+        return list(self._lists_in.get(id(block), [])) if block is not None else []
+
+    def pairs(self) -> Dict[str, Any]:
+        """
+        All definition lists merged, later labels overriding earlier ones.
+        """
+        merged: Dict[str, Any] = {}
+        for pairs in self.lists:
+            merged.update(pairs)
+        return merged
+
+    def extract(self, fields: Optional[Dict[str, SectionRule]] = None) -> Dict[str, Any]:
+        """
+        Build a record from `fields` (default: the spec's). Text fields of missing
+        sections are left out; list fields are `empty` when nothing matched.
+        """
+        record = self.pairs() if self.spec.pairs else {}
+        for field, rule in (self.spec.fields if fields is None else fields).items():
+            if isinstance(rule, str):
+                rule = {"heading": rule}
+            key, last = rule["heading"], bool(rule.get("last", False))
+            if rule.get("lists"):
+                record[field] = self.lists_in(key, last) or self.spec.empty
+                continue
+            value = self.text(key, rule.get("item", "p"), last)
+            if value is not None:
+                record[field] = value
+        return record
+
+
+_SPEC_CACHE: Dict[Hashable, SectionSpec] = {}
+_SPEC_LOCK = threading.Lock()
+
+
+def _freeze(value: Any) -> Hashable:
+    if isinstance(value, dict):
+        return tuple((k, _freeze(v)) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def compile_sections(cfg: Optional[Dict[str, Any]]) -> SectionSpec:
+    """
+    Return a cached SectionSpec for a `sections:` block (compiled on first use).
+    """
+    key = _freeze(cfg or {})
+    with _SPEC_LOCK:
+        spec = _SPEC_CACHE.get(key)
+        if spec is None:
+            spec = _SPEC_CACHE[key] = SectionSpec(cfg)
+    return spec
+
+
+def index_sections(html: Any, cfg: Optional[Dict[str, Any]] = None, backend: Optional[str] = None) -> SectionIndex:
+    """
+    Index a document (HTML string or an already parsed soup) by the `sections:` block `cfg`.
+    """
+    soup = html if isinstance(html, BeautifulSoup) else make_soup(html, backend)
+    return SectionIndex(soup, compile_sections(cfg))
@@ -0,0 +1,506 @@
+import csv
+import importlib.util
+import json
+import os
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterable, List, Optional
+
+from .utils import logger, ensure_parent_dir
+
+
+def require_packages(cls: type, path: str) -> None:
+    """
+    Raise ImportError if a package the sink class `cls` writes with is not installed
+    (looked up without importing it).
+    """
+    for package in cls.requires:
+        if importlib.util.find_spec(package) is None:
+            raise ImportError(f"Writing {path} requires {package} (pip install {package})")
+
+
+def cell_value(value: Any) -> Any:
+    """
+    Convert a record value for a flat cell (CSV/Excel): None -> "", nested -> str().
+    Matches what pandas wrote before, so existing consumers see the same cells.
+    """
+    if value is None:
+        return ""
+    if isinstance(value, (list, dict, tuple, set)):
+        return str(value)
+    return value
+
+
+class ResultSink(ABC):
+    """
+    Streaming destination for crawl records.
+
+    Records are buffered in memory (at most `buffer_size`) and appended to a
+    `<path>.part` file as they arrive, so output is available while the crawl runs
+    and memory stays bounded. `finalize()` atomically moves the finished file to
+    `path`; `abort()` leaves the partial file in place for inspection.
+    New columns appearing in later records are added to the schema.
+    Optional packages the writer needs (`requires`) are checked when the sink
+    is created, not when the finished output is written.
+    """
+
+    requires: tuple = ()
+
+    def __init__(self, path: str, buffer_size: int = 500):
+        if not path:
+            raise ValueError("output_path is required for saving results.")
+        require_packages(type(self), path)
+        self.path = path
+        self.part_path = path + ".part"
+        self.buffer_size = max(1, int(buffer_size))
+        self.buffer: List[Dict[str, Any]] = []
+        self.columns: List[str] = []
+        self.count = 0
+        self.closed = False
+        ensure_parent_dir(path)
+
+    def write(self, record: Dict[str, Any]) -> None:
+        if self.closed:
+            raise RuntimeError(f"Sink for {self.path} is already closed")
+        self.buffer.append(record)
+        self.count += 1
+        if len(self.buffer) >= self.buffer_size:
+            self.flush()
+
+    def write_many(self, records: Iterable[Dict[str, Any]]) -> None:
+        for rec in records:
+            self.write(rec)
+
+    def _new_columns(self, records: List[Dict[str, Any]]) -> List[str]:
+        known = set(self.columns)
+        added = []
+        for rec in records:
+            for key in rec:
+                if key not in known:
+                    known.add(key)
+                    added.append(key)
+        return added
+
+    def flush(self) -> None:
+        if not self.buffer:
+            return
+        batch, self.buffer = self.buffer, []
+        self._write_batch(batch)
+
+    @abstractmethod
+    def _write_batch(self, batch: List[Dict[str, Any]]) -> None:
+        raise NotImplementedError
+
+    def _commit(self) -> None:
+        """
+        Produce the final file at self.path from the part file.
+        """
+        os.replace(self.part_path, self.path)
+
+    def finalize(self) -> None:
+        """
+        Flush remaining records and atomically publish the output file.
+        """
+        if self.closed:
+            return
+        self.flush()
+        self._close_part()
+        self.closed = True
+        if self.count == 0:
+            logger.warning("No data to save.")
+            if os.path.exists(self.part_path):
+                os.remove(self.part_path)
+            return
+        self._commit()
+        logger.info(f"Saved {self.count} records to {self.path}")
+
+    def abort(self) -> None:
+        """
+        Flush what we have and keep the partial output at `<path>.part`.
+        """
+        if self.closed:
+            return
+        self.flush()
+        self._close_part()
+        self.closed = True
+        logger.warning(f"Sink aborted; partial output kept at {self.part_path}")
+
+    def _close_part(self) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.finalize()
+        else:
+            self.abort()
+        return False
+
+
+class JsonlSink(ResultSink):
+    """
+    JSON Lines sink: one record per line, schema-free.
+    """
+
+    def __init__(self, path: str, buffer_size: int = 500):
+        super().__init__(path, buffer_size)
+        self._fh = open(self.part_path, "w", encoding="utf-8")
+
+    def _write_batch(self, batch: List[Dict[str, Any]]) -> None:
+        self.columns.extend(self._new_columns(batch))
+        for rec in batch:
+            self._fh.write(json.dumps(rec, ensure_ascii=False, default=str))
+            self._fh.write("\n")
+        self._fh.flush()
+
+    def _close_part(self) -> None:
+        self._fh.close()
+
+
+class CsvSink(ResultSink):
+    """
+    CSV sink. When a batch introduces new columns after rows were written,
+    the part file is rewritten once with the widened header.
+    """
+
+    def __init__(self, path: str, buffer_size: int = 500):
+        super().__init__(path, buffer_size)
+        self._fh = open(self.part_path, "w", encoding="utf-8", newline="")
+        self._rows_written = 0
+
+    def _widen(self, columns: List[str]) -> None:
+        self._fh.close()
+        tmp = self.part_path + ".widen"
+        with open(self.part_path, "r", encoding="utf-8", newline="") as src, \
+                open(tmp, "w", encoding="utf-8", newline="") as dst:
+            reader = csv.reader(src)
+            writer = csv.writer(dst)
+            next(reader, None)  # old header
+            writer.writerow(columns)
+            pad = [""] * (len(columns) - len(self.columns))
+            for row in reader:
+                writer.writerow(row + pad)
+        os.replace(tmp, self.part_path)
+        self._fh = open(self.part_path, "a", encoding="utf-8", newline="")
+
+    def _write_batch(self, batch: List[Dict[str, Any]]) -> None:
+        added = self._new_columns(batch)
+        if added:
+            columns = self.columns + added
+            if self._rows_written:
+                logger.info(f"New columns {added} in {self.path}; widening CSV header")
+                self._widen(columns)
+            else:
+                self._fh.seek(0)
+                self._fh.truncate()
+                csv.writer(self._fh).writerow(columns)
+            self.columns = columns
+
+        writer = csv.writer(self._fh)
+        for rec in batch:
+            writer.writerow([cell_value(rec.get(c)) for c in self.columns])
+        self._rows_written += len(batch)
+        self._fh.flush()
+
+    def _close_part(self) -> None:
+        self._fh.close()
+
+
+class SpoolSink(JsonlSink):
+    """
+    Base for formats that cannot be appended to cheaply (Excel, Parquet):
+    batches are flushed to a JSON Lines spool, and `finalize()` streams the spool
+    into the target format with the full, evolved column list.
+    """
+
+    def iter_spool(self) -> Iterable[Dict[str, Any]]:
+        with open(self.part_path, "r", encoding="utf-8") as fh:
+            for line in fh:
+                if line.strip():
+                    yield json.loads(line)
+
+    def iter_batches(self) -> Iterable[List[Dict[str, Any]]]:
+        batch: List[Dict[str, Any]] = []
+        for rec in self.iter_spool():
+            batch.append(rec)
+            if len(batch) >= self.buffer_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def _commit(self) -> None:
+        tmp = self.path + ".tmp"
+        try:
+            self._convert(tmp)
+            os.replace(tmp, self.path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        os.remove(self.part_path)
+
+    @abstractmethod
+    def _convert(self, target: str) -> None:
+        raise NotImplementedError
+
+
+class ExcelSink(SpoolSink):
+    """
+    Excel sink: streams the spool into a write-only openpyxl workbook.
+    """
+
+    requires = ("openpyxl",)
+
+    def _convert(self, target: str) -> None:
+        from openpyxl import Workbook
+
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet("Sheet1")
+        ws.append(self.columns)
+        for rec in self.iter_spool():
+            ws.append([None if rec.get(c) is None else cell_value(rec.get(c)) for c in self.columns])
+        wb.save(target)
+
+
+def _unify(a: Any, b: Any) -> Any:
+    """
+    Common Arrow type of two inferred column types: null gives way to anything,
+    int widens to float, structs merge their fields, lists unify their items;
+    anything else falls back to string.
+    """
+    import pyarrow as pa
+
+    if a is None or a.equals(b):
+        return b
+    if pa.types.is_null(a):
+        return b
+    if pa.types.is_null(b):
+        return a
+    if pa.types.is_integer(a) and pa.types.is_integer(b):
+        return pa.int64()
+    if (pa.types.is_integer(a) or pa.types.is_floating(a)) and (pa.types.is_integer(b) or pa.types.is_floating(b)):
+        return pa.float64()
+    if pa.types.is_list(a) and pa.types.is_list(b):
+        return pa.list_(_unify(a.value_type, b.value_type))
+    if pa.types.is_struct(a) and pa.types.is_struct(b):
+        fields = {f.name: f.type for f in a}
+        for f in b:
+            fields[f.name] = _unify(fields.get(f.name), f.type)
+        return pa.struct([(name, t) for name, t in fields.items()])
+    return pa.string()
+
+
+def _storable(t: Any) -> Any:
+    """
+    Replace types Parquet cannot store (structs without fields) by string.
+    """
+    import pyarrow as pa
+
+    if pa.types.is_struct(t):
+        if t.num_fields == 0:
+            return pa.string()
+        return pa.struct([(f.name, _storable(f.type)) for f in t])
+    if pa.types.is_list(t):
+        return pa.list_(_storable(t.value_type))
+    return t
+
+
+def _coerce(value: Any, t: Any) -> Any:
+    """
+    Shape one value for its unified type; values that do not fit a string
+    column are JSON-encoded (nested) or str()-ed.
+    """
+    import pyarrow as pa
+
+    if value is None:
+        return None
+    if pa.types.is_string(t):
+        if isinstance(value, str):
+            return value
+        if isinstance(value, (list, dict)):
+            return json.dumps(value, ensure_ascii=False, default=str)
+        return str(value)
+    if pa.types.is_struct(t):
+        if not isinstance(value, dict):
+            return None
+        return {f.name: _coerce(value.get(f.name), f.type) for f in t}
+    if pa.types.is_list(t):
+        if not isinstance(value, list):
+            return None
+        return [_coerce(v, t.value_type) for v in value]
+    if pa.types.is_floating(t) and isinstance(value, int) and not isinstance(value, bool):
+        return float(value)
+    return value
+
+
+class ColumnarSink(SpoolSink):
+    """
+    Base for Arrow-typed formats (Parquet, Arrow IPC). Records are spooled as
+    JSON Lines while the crawl runs; `finalize()` reads the spool twice: once to
+    infer a schema unified across all records (native list and struct columns
+    for nested values, numbers as numbers), once to write it in row groups of
+    `row_group_size` records. Columns whose values cannot share a type are
+    stored as strings (nested values JSON-encoded). Top-level strings listed in
+    `null_values` (e.g. "NA") are written as nulls.
+    """
+
+    requires = ("pyarrow",)
+
+    def __init__(self, path: str, buffer_size: int = 500, compression: Optional[str] = None,
+                 compression_level: Optional[int] = None, row_group_size: int = 10000,
+                 null_values: Iterable[str] = ()):
+        super().__init__(path, buffer_size)
+        self.compression = compression
+        self.compression_level = compression_level
+        self.row_group_size = max(1, int(row_group_size))
+        self.null_values = set(null_values or ())
+
+    def _value(self, rec: Dict[str, Any], column: str) -> Any:
+        value = rec.get(column)
+        if isinstance(value, str) and value in self.null_values:
+            return None
+        return value
+
+    def infer_schema(self):
+        """
+        Arrow schema unified over every spooled record, columns in first-seen order.
+        """
+        import pyarrow as pa
+
+        types: Dict[str, Any] = {c: None for c in self.columns}
+        for batch in self.iter_batches():
+            for c in self.columns:
+                values = [self._value(rec, c) for rec in batch]
+                try:
+                    inferred = pa.array(values).type
+                except (pa.ArrowInvalid, pa.ArrowTypeError):
+                    inferred = pa.string()
+                types[c] = _unify(types[c], inferred)
+        return pa.schema([(c, _storable(t if t is not None else pa.null())) for c, t in types.items()])
+
+    def iter_tables(self, schema) -> Iterable[Any]:
+        """
+        Spooled records as Arrow tables of `row_group_size` rows.
+        """
+        import pyarrow as pa
+
+        rows: List[Dict[str, Any]] = []
+        for batch in self.iter_batches():
+            for rec in batch:
+                rows.append({f.name: _coerce(self._value(rec, f.name), f.type) for f in schema})
+                if len(rows) >= self.row_group_size:
+                    yield pa.Table.from_pylist(rows, schema=schema)
+                    rows = []
+        if rows:
+            yield pa.Table.from_pylist(rows, schema=schema)
+
+
+class ParquetSink(ColumnarSink):
+    """
+    Parquet sink: one row group per `row_group_size` records, `compression`
+    snappy (default), zstd, gzip, brotli, lz4 or none.
+    """
+
+    def _convert(self, target: str) -> None:
+        import pyarrow.parquet as pq
+
+        schema = self.infer_schema()
+        with pq.ParquetWriter(target, schema, compression=self.compression or "snappy",
+                              compression_level=self.compression_level) as writer:
+            for table in self.iter_tables(schema):
+                writer.write_table(table, row_group_size=self.row_group_size)
+
+
+class ArrowSink(ColumnarSink):
+    """
+    Arrow IPC file (Feather v2) sink: one record batch per `row_group_size`
+    records, `compression` lz4, zstd or none (default).
+    """
+
+    def _convert(self, target: str) -> None:
+        import pyarrow as pa
+
+        schema = self.infer_schema()
+        compression = None if (self.compression or "none") == "none" else self.compression
+        if compression is not None and self.compression_level is not None:
+            compression = pa.Codec(compression, self.compression_level)
+        options = pa.ipc.IpcWriteOptions(compression=compression)
+        with pa.OSFile(target, "wb") as fh, pa.ipc.new_file(fh, schema, options=options) as writer:
+            for table in self.iter_tables(schema):
+                writer.write_table(table, max_chunksize=self.row_group_size)
+
+
+SINKS = {
+    "csv": CsvSink,
+    "": CsvSink,
+    "jsonl": JsonlSink,
+    "ndjson": JsonlSink,
+    "xls": ExcelSink,
+    "xlsx": ExcelSink,
+    "parquet": ParquetSink,
+    "arrow": ArrowSink,
+    "feather": ArrowSink,
+    "ipc": ArrowSink,
+}
+
+
+def output_options(config: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    `config['output_format']` as a dict: a plain string names the format,
+    a mapping adds writer options.
+
+    output_format:
+      type: parquet          # used when output_path has no known extension
+      compression: zstd      # parquet: snappy|zstd|gzip|brotli|lz4|none; arrow: lz4|zstd|none
+      compression_level: 3
+      row_group_size: 10000  # records per Parquet row group / Arrow record batch
+      null_values: ["NA"]    # strings written as nulls in typed columns
+    """
+    fmt = (config or {}).get("output_format")
+    if isinstance(fmt, str):
+        return {"type": fmt}
+    return dict(fmt or {})
+
+
+def sink_class(path: str, config: Optional[Dict[str, Any]] = None) -> type:
+    """
+    The sink class for `path`: by its extension, or by `output_format` when the
+    extension is not a known format.
+    """
+    options = output_options(config)
+    ext = os.path.splitext(path or "")[1].lower().lstrip('.')
+    fmt = str(options.get("type") or "").lower()
+    if fmt and ext and ext in SINKS and SINKS.get(fmt) is not SINKS[ext]:
+        logger.warning(f"output_format {fmt!r} does not match {path}; writing by file extension")
+    elif fmt and (not ext or ext not in SINKS):
+        ext = fmt
+    cls = SINKS.get(ext)
+    if cls is None:
+        raise ValueError(f"Unsupported output format: {ext}")
+    return cls
+
+
+def check_sink(path: str, config: Optional[Dict[str, Any]] = None) -> None:
+    """
+    Fail fast before a crawl: raise ValueError for an unsupported output format
+    and ImportError if its writer needs a package that is not installed.
+    """
+    require_packages(sink_class(path, config), path)
+
+
+def open_sink(path: str, config: Optional[Dict[str, Any]] = None) -> ResultSink:
+    """
+    Create a sink for `path` based on its extension (or `output_format` when the
+    extension is not a known format). `config['output_buffer']` sets how many
+    records are buffered in memory (default 500); Parquet and Arrow writers
+    take their options from `output_format` (see `output_options`).
+    """
+    options = output_options(config)
+    cls = sink_class(path, config)
+    kwargs: Dict[str, Any] = {"buffer_size": (config or {}).get("output_buffer", 500)}
+    if issubclass(cls, ColumnarSink):
+        for key in ("compression", "compression_level", "row_group_size", "null_values"):
+            if options.get(key) is not None:
+                kwargs[key] = options[key]
+    return cls(path, **kwargs)
@@ -0,0 +1,152 @@
+import json
+import os
+import sqlite3
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set
+
+from .utils import ensure_parent_dir
+
+PENDING = "pending"
+DONE = "done"
+FAILED = "failed"
+
+
+class CrawlState:
+    """
+    Durable crawl state in SQLite: the parsed item frontier and per-item status.
+
+    Every item gets a row (position, status, attempts, last error). Parsed records of
+    finished items are stored with them, so a resumed run can re-emit finished output
+    without fetching again. Writes are committed per item, so an interrupted run
+    loses at most the items that were in flight.
+    """
+
+    def __init__(self, path: str):
+        ensure_parent_dir(path)
+        self.path = path
+        self._db = sqlite3.connect(path, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS items ("
+            " position INTEGER PRIMARY KEY AUTOINCREMENT, item TEXT UNIQUE NOT NULL,"
+            " status TEXT NOT NULL DEFAULT 'pending', attempts INTEGER NOT NULL DEFAULT 0,"
+            " error TEXT, records TEXT, updated_at REAL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS items_status ON items(status)")
+        self._db.commit()
+
+    def reset(self) -> None:
+        """
+        Forget all state (used when a run starts without --resume).
+        """
+        self._db.execute("DELETE FROM items")
+        self._db.execute("DELETE FROM meta")
+        self._db.commit()
+
+    def get_meta(self, key: str) -> Optional[str]:
+        row = self._db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str) -> None:
+        self._db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+        self._db.commit()
+
+    @property
+    def has_frontier(self) -> bool:
+        """
+        True once the list stage finished and its items were recorded.
+        """
+        return self.get_meta("frontier_complete") == "1"
+
+    @property
+    def has_items(self) -> bool:
+        """
+        True if any item was recorded, e.g. by a streamed list stage that was interrupted.
+        """
+        return self._db.execute("SELECT 1 FROM items LIMIT 1").fetchone() is not None
+
+    def add_items(self, items: Iterable[Any]) -> int:
+        """
+        Record items as pending (existing items keep their status). Returns the number added.
+        """
+        now = time.time()
+        before = self._db.total_changes
+        self._db.executemany(
+            "INSERT OR IGNORE INTO items (item, updated_at) VALUES (?, ?)",
+            ((it, now) for it in items if isinstance(it, str)),
+        )
+        self._db.commit()
+        return self._db.total_changes - before
+
+    def save_frontier(self, items: Iterable[Any]) -> None:
+        self.add_items(items)
+        self.set_meta("frontier_complete", "1")
+
+    def items_to_process(self, max_attempts: int = 3) -> List[str]:
+        """
+        Pending items plus failed items that still have attempts left, in frontier order.
+        """
+        rows = self._db.execute(
+            "SELECT item FROM items WHERE status = ? OR (status = ? AND attempts < ?) ORDER BY position",
+            (PENDING, FAILED, max_attempts),
+        ).fetchall()
+        return [r[0] for r in rows]
+
+    def settled(self, items: Iterable[Any], max_attempts: int = 3) -> Set[str]:
+        """
+        Those of `items` that are done, or failed with no attempts left (what a
+        resumed run must not fetch again).
+        """
+        items = [it for it in items if isinstance(it, str)]
+        found: Set[str] = set()
+        for i in range(0, len(items), 500):
+            chunk = items[i:i + 500]
+            rows = self._db.execute(
+                f"SELECT item FROM items WHERE item IN ({','.join('?' * len(chunk))})"
+                " AND (status = ? OR (status = ? AND attempts >= ?))",
+                chunk + [DONE, FAILED, max_attempts],
+            ).fetchall()
+            found.update(r[0] for r in rows)
+        return found
+
+    def mark_done(self, item: str, records: List[Dict[str, Any]]) -> None:
+        self._db.execute(
+            "UPDATE items SET status = ?, attempts = attempts + 1, error = NULL, records = ?, updated_at = ?"
+            " WHERE item = ?",
+            (DONE, json.dumps(records, ensure_ascii=False, default=str), time.time(), item),
+        )
+        self._db.commit()
+
+    def mark_failed(self, item: str, error: str) -> None:
+        self._db.execute(
+            "UPDATE items SET status = ?, attempts = attempts + 1, error = ?, updated_at = ? WHERE item = ?",
+            (FAILED, error, time.time(), item),
+        )
+        self._db.commit()
+
+    def iter_done_records(self) -> Iterator[Dict[str, Any]]:
+        """
+        Yield records of finished items in frontier order.
+        """
+        cur = self._db.execute("SELECT records FROM items WHERE status = ? ORDER BY position", (DONE,))
+        for (raw,) in cur:
+            for rec in json.loads(raw or "[]"):
+                yield rec
+
+    def counts(self) -> Dict[str, int]:
+        rows = self._db.execute("SELECT status, COUNT(*) FROM items GROUP BY status").fetchall()
+        return {status: n for status, n in rows}
+
+    def close(self) -> None:
+        self._db.close()
+
+
+def default_state_path(config: Dict[str, Any], output_path: str) -> str:
+    """
+    `config['state_path']`, or `<output dir>/<output stem>.state.sqlite`.
+    """
+    if config.get("state_path"):
+        return config["state_path"]
+    stem = os.path.splitext(output_path)[0]
+    return stem + ".state.sqlite"
@@ -0,0 +1,255 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .incremental import record_hash
+from .sinks import ResultSink, open_sink
+from .utils import ensure_parent_dir, logger
+
+
+def _json_path(field: str) -> str:
+    """
+    SQL literal of the JSON path of a top-level record field (used in index expressions,
+    which must be spelled the same way in queries to be used).
+    """
+    return "'$.\"" + field.replace("'", "''").replace('"', '\\"') + "\"'"
+
+
+class ResultStore:
+    """
+    Keyed record store (SQLite, WAL) for merging crawls over time.
+
+    Each record is stored as JSON under its primary key (the values of the
+    `key` fields). Writing a record whose key exists replaces it only if its
+    content changed, so a daily run touches just the added and changed rows.
+    Declared `indexes` become SQLite expression indexes on the JSON fields,
+    used by `find()`. Exports stream the rows into any output sink.
+    """
+
+    def __init__(self, path: str, key: Sequence[str], indexes: Iterable[Any] = ()):
+        if not key:
+            raise ValueError("store.key must name at least one record field")
+        ensure_parent_dir(path)
+        self.path = path
+        self.key = [key] if isinstance(key, str) else list(key)
+        self.inserted = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.unkeyed = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS records (id INTEGER PRIMARY KEY AUTOINCREMENT, key TEXT UNIQUE NOT NULL,"
+            " data TEXT NOT NULL, content_hash TEXT NOT NULL, first_seen REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS records_updated ON records(updated_at)")
+        for fields in indexes or ():
+            self.add_index(fields)
+        self._db.commit()
+
+    def add_index(self, fields: Any) -> None:
+        """
+        Create (if missing) an index on one record field or a list of fields.
+        """
+        fields = [fields] if isinstance(fields, str) else list(fields)
+        name = "records_ix_" + "_".join("".join(c if c.isalnum() else "_" for c in f) for f in fields)
+        columns = ", ".join(f"json_extract(data, {_json_path(f)})" for f in fields)
+        self._db.execute(f'CREATE INDEX IF NOT EXISTS "{name}" ON records({columns})')
+
+    def key_of(self, record: Dict[str, Any]) -> Optional[str]:
+        values = [record.get(f) for f in self.key]
+        if all(v is None or v == "" for v in values):
+            return None
+        return json.dumps(values if len(values) > 1 else values[0], ensure_ascii=False, default=str)
+
+    def upsert_many(self, records: Iterable[Dict[str, Any]]) -> Tuple[int, int]:
+        """
+        Insert or update records in one transaction. Records without a key are
+        skipped with a warning. Returns (inserted, updated).
+        """
+        rows: Dict[str, Tuple[str, str, str]] = {}
+        for rec in records:
+            key = self.key_of(rec)
+            if key is None:
+                self.unkeyed += 1
+                logger.warning("Record without %s not stored: %s", "/".join(self.key), str(rec)[:200])
+                continue
+            # a later record with the same key in one batch wins
+            rows[key] = (key, json.dumps(rec, ensure_ascii=False, default=str), record_hash(rec))
+        if not rows:
+            return 0, 0
+        now = time.time()
+        keys = list(rows)
+        with self._lock:
+            known: Dict[str, str] = {}
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                known.update(self._db.execute(
+                    f"SELECT key, content_hash FROM records WHERE key IN ({','.join('?' * len(chunk))})",
+                    chunk).fetchall())
+            inserts = [(k, d, h, now, now) for k, d, h in rows.values() if k not in known]
+            updates = [(d, h, now, k) for k, d, h in rows.values() if k in known and known[k] != h]
+            with self._db:
+                self._db.executemany(
+                    "INSERT INTO records (key, data, content_hash, first_seen, updated_at) VALUES (?, ?, ?, ?, ?)",
+                    inserts)
+                self._db.executemany(
+                    "UPDATE records SET data = ?, content_hash = ?, updated_at = ? WHERE key = ?", updates)
+            self.inserted += len(inserts)
+            self.updated += len(updates)
+            self.unchanged += len(rows) - len(inserts) - len(updates)
+        return len(inserts), len(updates)
+
+    def get(self, *key_values: Any) -> Optional[Dict[str, Any]]:
+        """
+        The record with this primary key (one value per `key` field), or None.
+        """
+        values = list(key_values)
+        key = json.dumps(values if len(values) > 1 else values[0], ensure_ascii=False, default=str)
+        with self._lock:
+            row = self._db.execute("SELECT data FROM records WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def find(self, **fields: Any) -> List[Dict[str, Any]]:
+        """
+        Records whose fields equal the given values; indexed fields are looked up
+        through their index. Use `store.find(**{"Docket Number": "1:23-cv-1"})`
+        for names that are not identifiers.
+        """
+        where = " AND ".join(f"json_extract(data, {_json_path(f)}) = ?" for f in fields) or "1"
+        with self._lock:
+            rows = self._db.execute(f"SELECT data FROM records WHERE {where} ORDER BY id",
+                                    list(fields.values())).fetchall()
+        return [json.loads(data) for (data,) in rows]
+
+    def iter_records(self, since: Optional[float] = None, batch: int = 1000) -> Iterator[Dict[str, Any]]:
+        """
+        All records (or those added/changed after the timestamp `since`) in the
+        order they were first stored, read in batches.
+        """
+        last = 0
+        while True:
+            with self._lock:
+                rows = self._db.execute(
+                    "SELECT id, data FROM records WHERE id > ? AND updated_at > ? ORDER BY id LIMIT ?",
+                    (last, since or 0, batch)).fetchall()
+            if not rows:
+                return
+            last = rows[-1][0]
+            for _, data in rows:
+                yield json.loads(data)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+
+    def export(self, output_path: str, config: Optional[Dict[str, Any]] = None, since: Optional[float] = None) -> int:
+        """
+        Write the stored records to `output_path` (format by extension, as for
+        crawl output). Returns the number of records written.
+        """
+        sink = open_sink(output_path, config)
+        try:
+            sink.write_many(self.iter_records(since))
+        except BaseException:
+            sink.abort()
+            raise
+        sink.finalize()
+        return sink.count
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+class StoreSink(ResultSink):
+    """
+    Sink that upserts records into a ResultStore, a batch (`buffer_size`
+    records) per transaction. With `export=True`, `finalize()` writes the
+    records this run added or changed to the output path; full exports are
+    made on demand (`ResultStore.export`, `run.py --export`).
+    """
+
+    def __init__(self, path: str, store: ResultStore, config: Optional[Dict[str, Any]] = None,
+                 buffer_size: int = 500, export: bool = False):
+        super().__init__(path, buffer_size)
+        self.store = store
+        self.config = config
+        self.export = export
+        self.started = time.time()
+        # the store is shared by every run of the process: report this run's share
+        self._counts_before = (store.inserted, store.updated, store.unchanged)
+
+    def _write_batch(self, batch: List[Dict[str, Any]]) -> None:
+        self.store.upsert_many(batch)
+
+    def finalize(self) -> None:
+        if self.closed:
+            return
+        self.flush()
+        self.closed = True
+        store = self.store
+        added, changed, unchanged = (now - before for now, before in
+                                     zip((store.inserted, store.updated, store.unchanged), self._counts_before))
+        logger.info("Result store %s: %d added, %d changed, %d unchanged (%d records)",
+                    store.path, added, changed, unchanged, len(store))
+        if self.export:
+            if added or changed:
+                # what the output file now holds (BaseCrawler.record_count)
+                self.count = store.export(self.path, self.config, since=self.started)
+            else:
+                logger.info("No added or changed records; nothing exported to %s", self.path)
+
+    def abort(self) -> None:
+        if self.closed:
+            return
+        self.flush()
+        self.closed = True
+        kept = self.store.inserted + self.store.updated - self._counts_before[0] - self._counts_before[1]
+        logger.warning("Crawl aborted; %d record(s) kept in %s", kept, self.store.path)
+
+
+def default_store_path(config: Dict[str, Any], output_path: Optional[str] = None) -> str:
+    """
+    `config['store']['path']`, or `<output dir>/<output stem>.store.sqlite`.
+    """
+    cfg = config.get("store") or {}
+    if cfg.get("path"):
+        return cfg["path"]
+    output = output_path or config.get("output_path") or config.get("output") or "data/output.csv"
+    return os.path.splitext(output)[0] + ".store.sqlite"
+
+
+_STORES: Dict[str, ResultStore] = {}
+_STORES_LOCK = threading.Lock()
+
+
+def shared_store(config: Optional[Dict[str, Any]]) -> Optional[ResultStore]:
+    """
+    Return the process-wide ResultStore configured by `config['store']`, or None if disabled.
+
+    store:
+      enabled: true
+      url_field: url                 # add the detail URL to each record under this name
+      key: url                       # record field(s) identifying a record (default: url_field)
+      indexes: [Jurisdiction, [Status, Filed]]   # secondary indexes (one field or a list)
+      path: data/ai_lit.store.sqlite # default <output stem>.store.sqlite
+      export: false                  # true: write the records a run added/changed to output_path
+                                     # (full exports: run.py --export)
+    """
+    cfg = (config or {}).get("store") or {}
+    if not cfg.get("enabled", False):
+        return None
+    path = os.path.abspath(default_store_path(config))
+    with _STORES_LOCK:
+        store = _STORES.get(path)
+        if store is None:
+            key = cfg.get("key") or cfg.get("url_field")
+            if not key:
+                raise ValueError("store: needs `key` (record fields) or `url_field` (key by detail URL)")
+            store = _STORES[path] = ResultStore(path, key, cfg.get("indexes") or ())
+    return store
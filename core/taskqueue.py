@@ -0,0 +1,567 @@
+import importlib
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .utils import ensure_parent_dir, logger
+
+# (item, records, error) as delivered back to the coordinator
+Result = Tuple[str, List[Dict[str, Any]], Optional[str]]
+
+
+class WorkQueue(ABC):
+    """
+    Shared item queue for distributed crawls.
+
+    The coordinator `publish()`es the frontier and `close()`s the queue once the
+    list stage is done; workers `lease()` items, hold them for `lease_seconds`
+    (renewed with `renew()` while they work) and report back with `complete()` or
+    `fail()`. Items whose lease expires (dead worker) become available again;
+    every lease counts as an attempt, so an item that keeps killing its workers
+    is delivered as failed once its lease expired after `max_attempts` leases.
+    The coordinator reads finished items with `take_results()`. An item can be
+    delivered twice if an expired lease was completed by both workers, so
+    consumers dedupe by item.
+    """
+
+    def __init__(self, lease_seconds: float = 300, max_attempts: int = 3):
+        self.lease_seconds = float(lease_seconds)
+        self.max_attempts = int(max_attempts)
+
+    @abstractmethod
+    def reset(self) -> None:
+        """
+        Drop all items and results of this job.
+        """
+
+    @abstractmethod
+    def publish(self, items: List[str]) -> int:
+        """
+        Add items (duplicates are ignored). Returns the number added.
+        """
+
+    @abstractmethod
+    def close(self) -> None:
+        """
+        Mark the frontier complete: workers exit once the queue drains.
+        """
+
+    @abstractmethod
+    def lease(self, worker_id: str, n: int = 1) -> List[str]:
+        """
+        Claim up to `n` available items (pending, or leased with an expired lease).
+        Expired leases of items leased `max_attempts` times are finished as failed
+        instead.
+        """
+
+    @abstractmethod
+    def renew(self, worker_id: str, items: List[str]) -> None:
+        """
+        Extend the leases this worker holds on `items`.
+        """
+
+    @abstractmethod
+    def complete(self, worker_id: str, item: str, records: List[Dict[str, Any]]) -> None:
+        ...
+
+    @abstractmethod
+    def fail(self, worker_id: str, item: str, error: str) -> None:
+        """
+        Release a failed item: it becomes available again until it has been tried
+        `max_attempts` times, then it is delivered as failed.
+        """
+
+    @abstractmethod
+    def take_results(self, limit: int = 100) -> List[Result]:
+        """
+        Pop up to `limit` finished items (done or finally failed).
+        """
+
+    @abstractmethod
+    def counts(self) -> Dict[str, int]:
+        """
+        Number of items per state: pending (including expired leases), leased and finished.
+        """
+
+    @abstractmethod
+    def is_closed(self) -> bool:
+        ...
+
+    def drained(self) -> bool:
+        """
+        True when the frontier is complete and no item is pending or leased.
+        """
+        if not self.is_closed():
+            return False
+        counts = self.counts()
+        return counts.get("pending", 0) == 0 and counts.get("leased", 0) == 0
+
+    def shutdown(self) -> None:
+        """
+        Release connections (the queue contents stay).
+        """
+
+
+class SqliteWorkQueue(WorkQueue):
+    """
+    WorkQueue in one SQLite file (WAL mode), for workers that share a volume.
+    Leases are taken inside `BEGIN IMMEDIATE` transactions, so concurrent
+    workers never claim the same item. Network filesystems must support POSIX
+    locks (NFSv4 does; many SMB mounts do not) - otherwise use the redis backend.
+    """
+
+    def __init__(self, path: str, job: str = "default", lease_seconds: float = 300, max_attempts: int = 3):
+        super().__init__(lease_seconds, max_attempts)
+        ensure_parent_dir(path)
+        self.path = path
+        self.job = job
+        self._local = threading.local()
+        db = self._db
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS tasks ("
+            " job TEXT NOT NULL, position INTEGER NOT NULL, item TEXT NOT NULL,"
+            " status TEXT NOT NULL DEFAULT 'pending', owner TEXT, lease_until REAL,"
+            " attempts INTEGER NOT NULL DEFAULT 0, error TEXT, records TEXT,"
+            " delivered INTEGER NOT NULL DEFAULT 0, updated_at REAL,"
+            " PRIMARY KEY (job, item))"
+        )
+        db.execute("CREATE INDEX IF NOT EXISTS tasks_status ON tasks(job, status, position)")
+        db.execute("CREATE TABLE IF NOT EXISTS jobs (job TEXT PRIMARY KEY, closed INTEGER NOT NULL DEFAULT 0)")
+        db.commit()
+
+    @property
+    def _db(self) -> sqlite3.Connection:
+        # one connection per thread: workers renew leases from a heartbeat thread
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            self._local.db = db
+        return db
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        # a failed statement must not leave this thread's connection inside an
+        # open transaction, or every later BEGIN on it fails too
+        db = self._db
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            yield db
+            db.execute("COMMIT")
+        except BaseException:
+            if db.in_transaction:
+                db.execute("ROLLBACK")
+            raise
+
+    def _write(self, sql: str, params=()) -> sqlite3.Cursor:
+        with self._transaction() as db:
+            return db.execute(sql, params)
+
+    def reset(self) -> None:
+        with self._transaction() as db:
+            db.execute("DELETE FROM tasks WHERE job = ?", (self.job,))
+            db.execute("INSERT OR REPLACE INTO jobs (job, closed) VALUES (?, 0)", (self.job,))
+
+    def publish(self, items: List[str]) -> int:
+        with self._transaction() as db:
+            start = db.execute("SELECT COALESCE(MAX(position), 0) FROM tasks WHERE job = ?",
+                               (self.job,)).fetchone()[0]
+            before = db.total_changes
+            db.executemany(
+                "INSERT OR IGNORE INTO tasks (job, position, item, updated_at) VALUES (?, ?, ?, ?)",
+                [(self.job, start + i, it, time.time()) for i, it in enumerate(items, start=1)],
+            )
+            added = db.total_changes - before
+        return added
+
+    def close(self) -> None:
+        self._write("INSERT OR REPLACE INTO jobs (job, closed) VALUES (?, 1)", (self.job,))
+
+    def is_closed(self) -> bool:
+        row = self._db.execute("SELECT closed FROM jobs WHERE job = ?", (self.job,)).fetchone()
+        return bool(row and row[0])
+
+    def lease(self, worker_id: str, n: int = 1) -> List[str]:
+        now = time.time()
+        with self._transaction() as db:
+            exhausted = db.execute(
+                "UPDATE tasks SET status = 'failed', owner = NULL, lease_until = NULL,"
+                " error = 'lease expired after ' || attempts || ' attempt(s)', updated_at = ?"
+                " WHERE job = ? AND status = 'leased' AND lease_until < ? AND attempts >= ?",
+                (now, self.job, now, self.max_attempts),
+            ).rowcount
+            if exhausted:
+                logger.warning("%d item(s) failed: lease expired after %d attempt(s)", exhausted, self.max_attempts)
+            rows = db.execute(
+                "SELECT item FROM tasks WHERE job = ? AND"
+                " (status = 'pending' OR (status = 'leased' AND lease_until < ?))"
+                " ORDER BY position LIMIT ?",
+                (self.job, now, n),
+            ).fetchall()
+            items = [r[0] for r in rows]
+            db.executemany(
+                "UPDATE tasks SET status = 'leased', owner = ?, lease_until = ?, attempts = attempts + 1,"
+                " updated_at = ? WHERE job = ? AND item = ?",
+                [(worker_id, now + self.lease_seconds, now, self.job, it) for it in items],
+            )
+        return items
+
+    def renew(self, worker_id: str, items: List[str]) -> None:
+        if not items:
+            return
+        until = time.time() + self.lease_seconds
+        with self._transaction() as db:
+            db.executemany(
+                "UPDATE tasks SET lease_until = ? WHERE job = ? AND item = ? AND owner = ? AND status = 'leased'",
+                [(until, self.job, it, worker_id) for it in items],
+            )
+
+    def complete(self, worker_id: str, item: str, records: List[Dict[str, Any]]) -> None:
+        self._write(
+            "UPDATE tasks SET status = 'done', owner = ?, error = NULL, records = ?, updated_at = ?"
+            " WHERE job = ? AND item = ? AND status != 'done'",
+            (worker_id, json.dumps(records, ensure_ascii=False, default=str), time.time(), self.job, item),
+        )
+
+    def fail(self, worker_id: str, item: str, error: str) -> None:
+        self._write(
+            "UPDATE tasks SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,"
+            " owner = NULL, lease_until = NULL, error = ?, updated_at = ?"
+            " WHERE job = ? AND item = ? AND owner = ? AND status = 'leased'",
+            (self.max_attempts, error, time.time(), self.job, item, worker_id),
+        )
+
+    def take_results(self, limit: int = 100) -> List[Result]:
+        with self._transaction() as db:
+            rows = db.execute(
+                "SELECT item, status, records, error FROM tasks WHERE job = ? AND delivered = 0"
+                " AND status IN ('done', 'failed') ORDER BY position LIMIT ?",
+                (self.job, limit),
+            ).fetchall()
+            db.executemany("UPDATE tasks SET delivered = 1 WHERE job = ? AND item = ?",
+                           [(self.job, r[0]) for r in rows])
+        return [(item, json.loads(raw or "[]") if status == "done" else [], error if status == "failed" else None)
+                for item, status, raw, error in rows]
+
+    def counts(self) -> Dict[str, int]:
+        now = time.time()
+        rows = self._db.execute(
+            "SELECT CASE WHEN status = 'leased' AND lease_until < ? THEN 'pending'"
+            " WHEN status IN ('done', 'failed') THEN 'finished' ELSE status END AS s, COUNT(*)"
+            " FROM tasks WHERE job = ? GROUP BY s",
+            (now, self.job),
+        ).fetchall()
+        return {s: n for s, n in rows}
+
+    def shutdown(self) -> None:
+        db = getattr(self._local, "db", None)
+        if db is not None:
+            db.close()
+            self._local.db = None
+
+
+class RedisWorkQueue(WorkQueue):
+    """
+    WorkQueue on Redis (or anything speaking its protocol, e.g. a local fakeredis
+    TcpFakeServer in tests). Keys, all under `crawl:<job>:`:
+
+      queue     sorted set: item -> position while pending, lease deadline while leased
+      owners    hash: item -> worker id
+      attempts  hash: item -> lease count
+      results   list of JSON results for the coordinator
+      closed    "1" once the frontier is complete
+      finished  number of finished items
+
+    Pending positions are small numbers and deadlines are epoch seconds, so
+    "available" is simply `score <= now`, which includes expired leases.
+    Leases are claimed with WATCH/MULTI, so no Lua scripting is required.
+    """
+
+    def __init__(self, client, job: str = "default", lease_seconds: float = 300, max_attempts: int = 3):
+        super().__init__(lease_seconds, max_attempts)
+        self.r = client
+        self.job = job
+        prefix = f"crawl:{job}:"
+        self.k_queue = prefix + "queue"
+        self.k_owners = prefix + "owners"
+        self.k_attempts = prefix + "attempts"
+        self.k_results = prefix + "results"
+        self.k_closed = prefix + "closed"
+        self.k_next = prefix + "next"
+        self.k_finished = prefix + "finished"
+
+    def reset(self) -> None:
+        self.r.delete(self.k_queue, self.k_owners, self.k_attempts, self.k_results, self.k_closed,
+                      self.k_next, self.k_finished)
+
+    def publish(self, items: List[str]) -> int:
+        items = list(dict.fromkeys(items))
+        added = 0
+        for chunk_start in range(0, len(items), 1000):
+            chunk = items[chunk_start:chunk_start + 1000]
+            last = self.r.incrby(self.k_next, len(chunk))
+            mapping = {it: last - len(chunk) + i for i, it in enumerate(chunk, start=1)}
+            added += self.r.zadd(self.k_queue, mapping, nx=True)
+        return added
+
+    def close(self) -> None:
+        self.r.set(self.k_closed, "1")
+
+    def is_closed(self) -> bool:
+        return self.r.get(self.k_closed) is not None
+
+    def lease(self, worker_id: str, n: int = 1) -> List[str]:
+        from redis.exceptions import WatchError
+        while True:
+            now = time.time()
+            with self.r.pipeline() as pipe:
+                try:
+                    pipe.watch(self.k_queue)
+                    found = [i.decode() if isinstance(i, bytes) else i
+                             for i in pipe.zrangebyscore(self.k_queue, 0, now, start=0, num=n)]
+                    if not found:
+                        pipe.unwatch()
+                        return []
+                    # an owner is only set while leased: these leases expired
+                    owners = pipe.hmget(self.k_owners, found)
+                    attempts = pipe.hmget(self.k_attempts, found)
+                    exhausted = [it for it, owner, a in zip(found, owners, attempts)
+                                 if owner is not None and int(a or 0) >= self.max_attempts]
+                    items = [it for it in found if it not in exhausted]
+                    pipe.multi()
+                    for it in exhausted:
+                        self._finish(it, {"item": it, "records": [],
+                                          "error": f"lease expired after {self.max_attempts} attempt(s)"}, pipe)
+                    if not items:
+                        pipe.execute()
+                        if exhausted:
+                            logger.warning("%d item(s) failed: lease expired after %d attempt(s)",
+                                           len(exhausted), self.max_attempts)
+                            continue
+                        return []
+                    pipe.zadd(self.k_queue, {it: now + self.lease_seconds for it in items}, xx=True)
+                    pipe.hset(self.k_owners, mapping={it: worker_id for it in items})
+                    for it in items:
+                        pipe.hincrby(self.k_attempts, it, 1)
+                    pipe.execute()
+                    if exhausted:
+                        logger.warning("%d item(s) failed: lease expired after %d attempt(s)",
+                                       len(exhausted), self.max_attempts)
+                    return items
+                except WatchError:
+                    continue    # another worker leased concurrently; retry
+
+    def renew(self, worker_id: str, items: List[str]) -> None:
+        if not items:
+            return
+        until = time.time() + self.lease_seconds
+        owners = self.r.hmget(self.k_owners, items)
+        mine = {it: until for it, owner in zip(items, owners)
+                if (owner.decode() if isinstance(owner, bytes) else owner) == worker_id}
+        if mine:
+            self.r.zadd(self.k_queue, mine, xx=True)
+
+    def _finish(self, item: str, payload: Dict[str, Any], pipe=None) -> None:
+        """
+        Remove `item` from the queue and push its result (queued on `pipe`, if given).
+        """
+        own = pipe is None
+        if own:
+            pipe = self.r.pipeline()
+        pipe.zrem(self.k_queue, item)
+        pipe.hdel(self.k_owners, item)
+        pipe.rpush(self.k_results, json.dumps(payload, ensure_ascii=False, default=str))
+        pipe.incr(self.k_finished)
+        if own:
+            pipe.execute()
+
+    def complete(self, worker_id: str, item: str, records: List[Dict[str, Any]]) -> None:
+        self._finish(item, {"item": item, "records": records, "error": None})
+
+    def _owner(self, item: str) -> Optional[str]:
+        owner = self.r.hget(self.k_owners, item)
+        return owner.decode() if isinstance(owner, bytes) else owner
+
+    def fail(self, worker_id: str, item: str, error: str) -> None:
+        if self._owner(item) != worker_id:
+            return      # lease expired and the item went to another worker
+        attempts = int(self.r.hget(self.k_attempts, item) or 0)
+        if attempts >= self.max_attempts:
+            self._finish(item, {"item": item, "records": [], "error": error})
+            return
+        pipe = self.r.pipeline()
+        pipe.hdel(self.k_owners, item)
+        pipe.zadd(self.k_queue, {item: 0}, xx=True)     # available again, ahead of the rest
+        pipe.execute()
+
+    def take_results(self, limit: int = 100) -> List[Result]:
+        pipe = self.r.pipeline()
+        pipe.lrange(self.k_results, 0, limit - 1)
+        pipe.ltrim(self.k_results, limit, -1)
+        raw, _ = pipe.execute()
+        out: List[Result] = []
+        for r in raw:
+            d = json.loads(r)
+            out.append((d["item"], d.get("records") or [], d.get("error")))
+        return out
+
+    def counts(self) -> Dict[str, int]:
+        now = time.time()
+        pipe = self.r.pipeline()
+        pipe.zcount(self.k_queue, 0, now)
+        pipe.zcount(self.k_queue, "(" + repr(now), "+inf")
+        pipe.get(self.k_finished)
+        available, leased, finished = pipe.execute()
+        return {"pending": available, "leased": leased, "finished": int(finished or 0)}
+
+    def shutdown(self) -> None:
+        try:
+            self.r.close()
+        except Exception:
+            pass
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+
+def default_queue_path(config: Dict[str, Any], output_path: str) -> str:
+    """
+    `config['distributed']['path']`, or `<output dir>/<output stem>.queue.sqlite`.
+    """
+    cfg = config.get("distributed") or {}
+    if cfg.get("path"):
+        return cfg["path"]
+    stem = os.path.splitext(output_path)[0]
+    return stem + ".queue.sqlite"
+
+
+def open_queue(config: Dict[str, Any], output_path: str) -> WorkQueue:
+    """
+    Build the WorkQueue configured by `config['distributed']`:
+
+    distributed:
+      enabled: true
+      backend: sqlite        # sqlite | redis | dotted path to a WorkQueue subclass
+      path: /shared/ai_lit.queue.sqlite      # sqlite: file on a volume all machines mount
+      url: redis://queue-host:6379/0         # redis
+      job: ai_lit            # queue namespace (default: site_name)
+      lease_seconds: 300     # a worker silent for this long loses its items
+      lease_batch: 2         # items leased per request by a worker process (all its crawlers together)
+      poll_interval: 2       # seconds between polls of an empty queue
+    """
+    cfg = config.get("distributed") or {}
+    backend = cfg.get("backend", "sqlite")
+    job = str(cfg.get("job") or config.get("site_name") or "default")
+    kwargs = {
+        "job": job,
+        "lease_seconds": float(cfg.get("lease_seconds", 300)),
+        "max_attempts": int(config.get("max_attempts", 3)),
+    }
+    if backend == "sqlite":
+        return SqliteWorkQueue(default_queue_path(config, output_path), **kwargs)
+    if backend == "redis":
+        try:
+            import redis
+        except ImportError:
+            raise ImportError("distributed.backend 'redis' requires the redis package (pip install redis)")
+        return RedisWorkQueue(redis.Redis.from_url(cfg.get("url", "redis://localhost:6379/0")), **kwargs)
+    module_name, class_name = backend.rsplit(".", 1)
+    cls = getattr(importlib.import_module(module_name), class_name)
+    return cls(config, **kwargs)
+
+
+class LeaseKeeper:
+    """
+    Worker-side bookkeeping: the items this worker holds, renewed from a
+    heartbeat thread every `lease_seconds / 3` so long fetches keep their lease.
+    """
+
+    def __init__(self, queue: WorkQueue, worker_id: str):
+        self.queue = queue
+        self.worker_id = worker_id
+        self.held: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._beat, name="lease-heartbeat", daemon=True)
+
+    def _beat(self) -> None:
+        interval = max(1.0, self.queue.lease_seconds / 3)
+        while not self._stop.wait(interval):
+            with self._lock:
+                items = list(self.held)
+            try:
+                self.queue.renew(self.worker_id, items)
+            except Exception:
+                logger.exception("Lease renewal failed")
+
+    def start(self) -> "LeaseKeeper":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def add(self, items: List[str]) -> None:
+        with self._lock:
+            for it in items:
+                self.held[it] = time.time()
+
+    def release(self, item: str) -> None:
+        with self._lock:
+            self.held.pop(item, None)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self.held)
+
+
+def iter_leased(queue: WorkQueue, keeper: LeaseKeeper, batch: int = 1) -> Iterator[str]:
+    """
+    Yield items leased from `queue`, `batch` at a time, until none is available.
+    Items are leased only when the consumer asks for the next one, so a worker
+    holds no more than its in-flight window. The caller polls again later
+    (see `WorkQueue.drained`), after its in-flight results have been reported.
+    """
+    while True:
+        items = queue.lease(keeper.worker_id, batch)
+        if not items:
+            return
+        keeper.add(items)
+        yield from items
+
+
+def iter_results(queue: WorkQueue, items: List[Any], poll_interval: float = 2.0
+                 ) -> Iterator[Tuple[int, str, List[Dict[str, Any]], Optional[str]]]:
+    """
+    Coordinator side: yield (index, item, records, error) for every published
+    item as workers finish it (completion order, duplicates dropped), in the
+    same shape as core.pipeline.run_detail_stage.
+    """
+    remaining = {it for it in items if isinstance(it, str)}
+    total = len(remaining)
+    idx = 0
+    last_log = 0.0
+    while remaining:
+        batch = queue.take_results()
+        if not batch:
+            if time.monotonic() - last_log > 60:
+                logger.info("Waiting for workers: %d/%d finished, queue %s", idx, total, queue.counts())
+                last_log = time.monotonic()
+            time.sleep(poll_interval)
+            continue
+        for item, records, error in batch:
+            if item not in remaining:
+                continue
+            remaining.discard(item)
+            idx += 1
+            logger.info("[%d/%d] Received %s", idx, total, repr(item))
+            yield idx, item, records, error
@@ -1,8 +1,15 @@
 # core/utils.py
 import time
+import random
 import logging
+import threading
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 from functools import wraps
-from typing import Callable, Any, Tuple, Type
+from typing import Callable, Any, Tuple, Type, Dict, Optional
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+from .metrics import METRICS
 
 # Basic logger configuration used across the project
 logging.basicConfig(format="%(asctime)s %(levelname)s %(message)s", level=logging.INFO)
@@ -23,6 +30,24 @@ def ensure_parent_dir(path: str) -> None:
     if parent:
         __import__('os').makedirs(parent, exist_ok=True)
 
+def normalize_url(url: str) -> str:
+    """
+    Canonical form of a URL for cache keys and dedupe:
+    lowercase scheme/host, no default port, no fragment, sorted query, no trailing slash.
+    """
+    parts = urlsplit((url or "").strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    port = parts.port
+    if port and not ((scheme == "http" and port == 80) or (scheme == "https" and port == 443)):
+        host = f"{host}:{port}"
+    path = parts.path or "/"
+    if len(path) > 1 and path.endswith("/"):
+        path = path.rstrip("/")
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, host, path, query, ""))
+
+
 def rate_limit(seconds: float):
     """
     Decorator to sleep for `seconds` before calling the function.
@@ -39,22 +64,214 @@ def rate_limit(seconds: float):
     return deco
 
 
-def retry(times: int = 3, exceptions: Tuple[Type[BaseException], ...] = (Exception,)):
+def retry_after_seconds(exc: BaseException) -> Optional[float]:
+    """
+    Delay requested by the server for this error, if any: an exception attribute
+    `retry_after` (seconds) or a `Retry-After` header on `exc.response`
+    (delta-seconds or HTTP date).
+    """
+    value = getattr(exc, "retry_after", None)
+    if value is None:
+        response = getattr(exc, "response", None)
+        headers = getattr(response, "headers", None) or {}
+        value = headers.get("Retry-After") if hasattr(headers, "get") else None
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        when = parsedate_to_datetime(str(value))
+    except (TypeError, ValueError):
+        return None
+    if when is None:
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+class RetryPolicy:
+    """
+    How often and how patiently to retry one class of errors.
+
+    The delay before retry n (1-based) is `backoff * factor ** (n - 1)`, capped at
+    `max_delay`, reduced by up to `jitter` (0..1) of itself at random, and never
+    shorter than the server's Retry-After. `backoff=0` retries immediately.
     """
-    Simple retry decorator. Retries the wrapped function up to `times` when one of the
+
+    def __init__(self, times: int = 3, backoff: float = 0.0, factor: float = 2.0,
+                 max_delay: float = 60.0, jitter: float = 0.0):
+        self.times = max(1, int(times))
+        self.backoff = float(backoff)
+        self.factor = float(factor)
+        self.max_delay = float(max_delay)
+        self.jitter = min(1.0, max(0.0, float(jitter)))
+
+    def delay(self, attempt: int, exc: Optional[BaseException] = None) -> float:
+        base = min(self.max_delay, self.backoff * (self.factor ** (attempt - 1)))
+        if self.jitter and base > 0:
+            base -= base * self.jitter * random.random()
+        server = retry_after_seconds(exc) if exc is not None else None
+        if server is not None:
+            base = max(base, min(server, self.max_delay))
+        return base
+
+    @classmethod
+    def from_config(cls, cfg: Optional[Dict[str, Any]]) -> "RetryPolicy":
+        cfg = cfg or {}
+        return cls(
+            times=cfg.get("times", 3),
+            backoff=cfg.get("backoff", 0.0),
+            factor=cfg.get("factor", 2.0),
+            max_delay=cfg.get("max_delay", 60.0),
+            jitter=cfg.get("jitter", 0.0),
+        )
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of calling a host whose circuit breaker is open.
+    """
+
+    def __init__(self, host: str, retry_in: float):
+        super().__init__(f"Circuit open for {host}; next probe in {retry_in:.1f}s")
+        self.host = host
+        self.retry_after = retry_in
+
+
+class CircuitBreaker:
+    """
+    Per-host circuit breaker.
+
+    After `failure_threshold` consecutive failures a host's circuit opens and calls
+    fail fast with CircuitOpenError. Once `reset_timeout` seconds have passed, one
+    probe call is let through (half-open): success closes the circuit, failure
+    opens it again.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 60.0):
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.reset_timeout = float(reset_timeout)
+        self._failures: Dict[str, int] = {}
+        self._opened_at: Dict[str, float] = {}
+        self._probing: Dict[str, bool] = {}
+        self._lock = threading.Lock()
+
+    def before_call(self, host: str) -> None:
+        with self._lock:
+            opened = self._opened_at.get(host)
+            if opened is None:
+                return
+            waited = time.monotonic() - opened
+            if waited < self.reset_timeout or self._probing.get(host):
+                raise CircuitOpenError(host, max(0.0, self.reset_timeout - waited))
+            self._probing[host] = True
+            logger.info(f"Circuit half-open for {host}; probing")
+
+    def record_success(self, host: str) -> None:
+        with self._lock:
+            if host in self._opened_at:
+                logger.info(f"Circuit closed for {host}")
+            self._failures[host] = 0
+            self._opened_at.pop(host, None)
+            self._probing.pop(host, None)
+
+    def record_failure(self, host: str) -> None:
+        with self._lock:
+            self._failures[host] = self._failures.get(host, 0) + 1
+            if self._probing.pop(host, False) or self._failures[host] >= self.failure_threshold:
+                logger.warning(f"Circuit open for {host} after {self._failures[host]} failure(s)")
+                self._opened_at[host] = time.monotonic()
+
+    def state(self, host: str) -> str:
+        with self._lock:
+            if host not in self._opened_at:
+                return "closed"
+            return "half-open" if self._probing.get(host) else "open"
+
+
+def _policy_for(exc: BaseException, policies: Dict[Any, RetryPolicy]) -> Optional[RetryPolicy]:
+    # most specific class first; keys may be classes or class names (from YAML)
+    for klass in type(exc).__mro__:
+        if klass in policies:
+            return policies[klass]
+        if klass.__name__ in policies:
+            return policies[klass.__name__]
+    return None
+
+
+def call_with_retry(func: Callable, *args,
+                    policy: Optional[RetryPolicy] = None,
+                    exceptions: Tuple[Type[BaseException], ...] = (Exception,),
+                    policies: Optional[Dict[Any, RetryPolicy]] = None,
+                    breaker: Optional[CircuitBreaker] = None,
+                    host: Optional[str] = None,
+                    **kwargs) -> Any:
+    """
+    Call `func(*args, **kwargs)`, retrying failures.
+
+    - `policies` maps exception classes (or class names) to a RetryPolicy; the most
+      specific match wins. Other errors listed in `exceptions` use `policy`; anything
+      else is raised immediately.
+    - With a `breaker` and `host`, calls fail fast while the host's circuit is open
+      and every outcome is reported to the breaker. CircuitOpenError is not retried.
+    """
+    policy = policy or RetryPolicy()
+    policies = policies or {}
+    attempt = 0
+    while True:
+        attempt += 1
+        if breaker is not None and host:
+            breaker.before_call(host)
+        try:
+            result = func(*args, **kwargs)
+        except CircuitOpenError:
+            raise
+        except Exception as e:
+            if breaker is not None and host:
+                breaker.record_failure(host)
+            pol = _policy_for(e, policies)
+            if pol is None:
+                if not isinstance(e, exceptions):
+                    raise
+                pol = policy
+            name = getattr(func, "__name__", repr(func))
+            if attempt >= pol.times:
+                logger.error(f"All {pol.times} attempts failed for function {name}")
+                raise
+            delay = pol.delay(attempt, e)
+            METRICS.inc("retries_total", error=type(e).__name__)
+            logger.warning(f"Attempt {attempt}/{pol.times} failed: {e}; retrying in {delay:.1f}s")
+            if delay > 0:
+                time.sleep(delay)
+            continue
+        if breaker is not None and host:
+            breaker.record_success(host)
+        return result
+
+
+def retry(times: int = 3, exceptions: Tuple[Type[BaseException], ...] = (Exception,),
+          backoff: float = 0.0, factor: float = 2.0, max_delay: float = 60.0, jitter: float = 0.0,
+          policies: Optional[Dict[Any, RetryPolicy]] = None,
+          breaker: Optional[CircuitBreaker] = None,
+          host_of: Optional[Callable[..., str]] = None):
+    """
+    Retry decorator. Retries the wrapped function up to `times` when one of the
     specified exceptions is raised. After final failure, re-raises the last exception.
+
+    Optional: exponential `backoff` (seconds) with `factor`, `max_delay` and `jitter`,
+    per-exception `policies`, and a per-host circuit `breaker` where
+    `host_of(*args, **kwargs)` names the host of a call. See `call_with_retry`.
     """
+    policy = RetryPolicy(times=times, backoff=backoff, factor=factor, max_delay=max_delay, jitter=jitter)
+
     def deco(func: Callable):
         @wraps(func)
         def wrapper(*args, **kwargs):
-            last_exc = None
-            for attempt in range(1, times + 1):
-                try:
-                    return func(*args, **kwargs)
-                except exceptions as e:
-                    last_exc = e
-                    logger.warning(f"Attempt {attempt}/{times} failed: {e}")
-            logger.error(f"All {times} attempts failed for function {func.__name__}")
-            raise last_exc
+            host = host_of(*args, **kwargs) if host_of is not None else None
+            return call_with_retry(func, *args, policy=policy, exceptions=exceptions, policies=policies,
+                                   breaker=breaker, host=host, **kwargs)
         return wrapper
     return deco
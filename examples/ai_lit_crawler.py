@@ -1,13 +1,7 @@
-import time
-from typing import List, Dict
+from typing import Dict, Iterator, List
+from urllib.parse import urljoin
 import re
 
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
-from bs4 import BeautifulSoup
-
 from core.crawler import BaseCrawler
 
 BASE_URL = "https://blogs.gwu.edu/law-eti/ai-litigation-database/"
@@ -25,114 +19,75 @@ def get_page_source(driver) -> str:
         return ""
 
 
-def parse_dt_dd_pairs(dl) -> Dict[str, str]:
-    data = {}
-    last_dt = None
-    for tag in dl.find_all(["dt", "dd"], class_=["cbResultSetListViewDataLabel", "cbResultSetData"]):
-        if tag.name == "dt":
-            last_dt = tag.get_text(strip=True)
-        elif tag.name == "dd" and last_dt:
-            txt = tag.get_text(strip=True)
-            if not txt or txt == "\xa0":
-                data[last_dt] = "NA"
-            else:
-                a = tag.find("a")
-                if a and a.get("href"):
-                    data[last_dt] = f"{a.get_text(strip=True)} ({a['href']})"
-                else:
-                    data[last_dt] = txt
-            last_dt = None
-    return data
+# page structure and record fields, used when the config has no `sections:` block
+SECTIONS = {
+    "headings": ["h2", "h3"],
+    "block": "article",
+    "definition_list": 'dl[data-cb-name="DataCtnr"]',
+    "label": "dt.cbResultSetListViewDataLabel",
+    "value": "dd.cbResultSetData",
+    "empty": "NA",
+    "link_values": True,
+    "fields": {
+        "Summary of Facts and Activity to Date": "facts and activity to date",
+        "Summary of Significance": "significance",
+        "Dockets": {"heading": "dockets", "lists": True},
+        "Documents": {"heading": "documents", "lists": True, "last": True},
+    },
+}
 
 
 class AILitCrawler(BaseCrawler):
-    def __init__(self, config):
-        super().__init__(config)
-        opts = Options()
-        opts.add_argument("--headless")
-        opts.add_argument("--disable-gpu")
-        service = Service(ChromeDriverManager().install())
-        self.driver = webdriver.Chrome(service=service, options=opts)
-        self.driver.implicitly_wait(10)
-
-    def fetch_list(self) -> List[str]:
-        htmls = []
-        self.driver.get(BASE_URL)
-        time.sleep(self.config.get("rate_limit", 2))
+    # Chrome (configured by the `browser:` block) starts on the first list page
+    # or detail fallback; HTTP-served details never need it
+    uses_browser = True
+
+    @property
+    def base_url(self) -> str:
+        # overridable for mirrors and the local benchmark fixture site
+        return self.config.get("base_url") or BASE_URL
+
+    def fetch_list(self) -> Iterator[str]:
+        # a generator: run.py starts on each page's cases while the next page loads
+        list_ready = self.browser_config.get("list_ready_selector") or ""
+        self.navigate(self.base_url, ready_selector=list_ready)
         start = self.config.get("pagination", {}).get("start_page", 1)
         max_pages = self.config.get("pagination", {}).get("max_pages", 1)
         for _ in range(start, start + max_pages):
-            htmls.append(self.driver.page_source)
+            html = self.driver.page_source
+            yield html
+            if self.page_is_known(html):
+                # incremental mode: older pages only contain items we already have
+                break
             try:
                 btn = self.driver.find_element("css selector", 'a.cbResultSetNavigationLinks[data-cb-name="JumpToNext"]')
+                self.throttle(self.base_url)
                 btn.click()
-                time.sleep(self.config.get("rate_limit", 2))
+                # the results panel is replaced in place: wait for the old one to go
+                self.wait_render(list_ready, stale=btn)
             except Exception:
                 break
-        return htmls
 
     def parse_list(self, html_list: List[str]) -> List[str]:
         items = []
         for html in html_list:
-            soup = BeautifulSoup(html, "html.parser")
+            soup = self.soup(html)
             table = soup.find("table")
             if not table:
                 continue
             for row in table.find_all("tr")[1:]:
                 a = row.find("a")
                 if a and a.get("href"):
-                    href = a["href"]
-                    if not href.startswith("http"):
-                        href = BASE_URL + href
-                    items.append(href)
+                    items.append(urljoin(self.base_url, a["href"]))
         return list(dict.fromkeys(items))
 
     def fetch_detail(self, url: str) -> str:
-        self.driver.get(url)
-        time.sleep(self.config.get("rate_limit", 1))
+        return self.fetch_page(url, fallback=self._browser_detail)
+
+    def _browser_detail(self, url: str) -> str:
+        self.navigate(url)
         return get_page_source(self.driver)
 
     def parse_detail(self, html: str) -> Dict:
-        soup = BeautifulSoup(html, "html.parser")
-        record = {}
-        for dl in soup.find_all("dl", {"data-cb-name": "DataCtnr"}):
-            record.update(parse_dt_dd_pairs(dl))
-
-        # summary sections
-        def find_section_text(key):
-            hdr = soup.find(lambda t: t.name in ["h2", "h3"] and key in t.get_text(strip=True).lower())
-            if hdr:
-                nxt = hdr.find_next("article")
-                if nxt:
-                    return "\n".join(p.get_text(strip=True) for p in nxt.find_all("p")) or "NA"
-            return None
-
-        sf = find_section_text("facts and activity to date")
-        if sf:
-            record["Summary of Facts and Activity to Date"] = sf
-
-        ss = find_section_text("significance")
-        if ss:
-            record["Summary of Significance"] = ss
-
-        # dockets & documents
-        # Dockets: look for header 'Dockets' then parse dl within its article
-        dockets = []
-        hdr = soup.find(lambda t: t.name in ["h2", "h3"] and "dockets" in t.get_text(strip=True).lower())
-        if hdr:
-            art = hdr.find_next("article")
-            if art:
-                for dl in art.find_all("dl", {"data-cb-name": "DataCtnr"}):
-                    dockets.append(parse_dt_dd_pairs(dl))
-        record["Dockets"] = dockets or "NA"
-
-        docs = []
-        hdrs = soup.find_all(lambda t: t.name in ["h2", "h3"] and "documents" in t.get_text(strip=True).lower())
-        if hdrs:
-            art = hdrs[-1].find_next("article")
-            if art:
-                for dl in art.find_all("dl", {"data-cb-name": "DataCtnr"}):
-                    docs.append(parse_dt_dd_pairs(dl))
-        record["Documents"] = docs or "NA"
-
-        return record
+        # one pass over the page indexes the case fields, summary sections and dockets/documents
+        return self.sections(html, self.config.get("sections") or SECTIONS).extract()
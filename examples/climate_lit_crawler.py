@@ -1,16 +1,10 @@
-import time
 from urllib.parse import urljoin
 import logging
 from typing import List
 
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
-from bs4 import BeautifulSoup
 from bs4 import SoupStrainer
 
 from core.crawler import BaseCrawler
-# optional: from core.parser import extract_fields
 
 logger = logging.getLogger("ClimateLitCrawler")
 
@@ -21,16 +15,9 @@ class ClimateLitCrawler(BaseCrawler):
     Fetches a list page, extracts article entries and visits details.
     """
 
-    def __init__(self, config):
-        super().__init__(config)
-        service = Service(ChromeDriverManager().install())
-        opts = webdriver.ChromeOptions()
-        # If headless misses dynamic content, run without headless while debugging
-        # opts.add_argument("--headless")
-        opts.add_argument("--no-sandbox")
-        opts.add_argument("--disable-dev-shm-usage")
-        self.driver = webdriver.Chrome(service=service, options=opts)
-        self.driver.implicitly_wait(10)
+    # browser options come from the `browser:` block of the config; Chrome
+    # starts on first use of self.driver
+    uses_browser = True
 
     def fetch_list(self) -> List[str]:
         htmls = []
@@ -39,8 +26,7 @@ class ClimateLitCrawler(BaseCrawler):
             logger.error("start_url is not set in config")
             return htmls
         logger.info("Loading list URL: %s", start_url)
-        self.driver.get(start_url)
-        time.sleep(self.config.get("rate_limit", 2))
+        self.navigate(start_url, ready_selector=self.browser_config.get("list_ready_selector") or "")
         htmls.append(self.driver.page_source)
         return htmls
 
@@ -49,7 +35,7 @@ class ClimateLitCrawler(BaseCrawler):
         items: List[str] = []
         for html in html_list:
             # parse only structural tags to speed up
-            soup = BeautifulSoup(html, "html.parser", parse_only=SoupStrainer("article"))
+            soup = self.soup(html, parse_only=SoupStrainer("article"))
             # If CSS selector is invalid for soupsieve, fall back to "article"
             try:
                 cards = soup.select(selector)
@@ -72,29 +58,26 @@ class ClimateLitCrawler(BaseCrawler):
         if not isinstance(url, str) or not url.strip():
             logger.warning("fetch_detail received invalid url: %r", url)
             return ""
-        try:
-            self.driver.get(url)
-            time.sleep(self.config.get("rate_limit", 1))
-            return self.driver.page_source
-        except Exception as e:
-            logger.exception("Error loading detail url %s: %s", url, e)
-            return ""
+        # failures propagate so the retry policy and circuit breaker see them
+        return self.fetch_page(url, fallback=self._browser_detail)
+
+    def _browser_detail(self, url: str) -> str:
+        self.navigate(url)
+        return self.driver.page_source
 
     def parse_detail(self, html: str) -> dict:
-        # If you have core.parser.extract_fields available and configured, prefer it:
+        # Prefer the compiled extraction plan built from config detail_selectors
         selectors = self.config.get("detail_selectors")
         try:
-            from core.parser import extract_fields
-
             if selectors:
-                out = extract_fields(html, selectors)
+                out = self.extract(html, selectors)
                 if isinstance(out, dict) and any(out.values()):
                     return out
         except Exception:
             # fall back to manual parse
             pass
 
-        soup = BeautifulSoup(html, "html.parser")
+        soup = self.soup(html)
         def pick_one(*sels):
             for s in sels:
                 el = soup.select_one(s)
@@ -1,20 +1,54 @@
 from __future__ import annotations
 
 import argparse
-import importlib
 import logging
+import os
+import time
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 import yaml
 
+from core.archive import DETAIL, LIST, PageArchive, default_archive_path
+from core.crawler import as_pages, load_crawler_class
+from core.frontier import Frontier, absolute_url, open_frontier
+from core.metrics import METRICS, MetricsExporter, default_metrics_path
+from core.pipeline import DetailFetcher, open_parse_pool, run_detail_stage, run_pipeline, run_replay
+from core.profiling import shared_profiler
+from core.scheduler import GlobalScheduler
+from core.sinks import check_sink
+from core.store import shared_store
+from core.state import CrawlState, default_state_path
+from core.taskqueue import LeaseKeeper, default_worker_id, iter_leased, iter_results, open_queue
+
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
 logger = logging.getLogger("run")
 
 
 def parse_args() -> argparse.Namespace:
     p = argparse.ArgumentParser(description="Run a configured crawler")
-    p.add_argument("-c", "--config", required=True, help="Path to YAML config file")
+    p.add_argument("-c", "--config", action="append", default=[],
+                   help="Path to YAML config file (repeat to run several crawls as one batch)")
+    p.add_argument("--batch", metavar="FILE",
+                   help="Batch file: scheduler limits (batch:) and the configs to run (jobs:)")
+    p.add_argument("--resume", action="store_true",
+                   help="Continue an interrupted run: skip finished items and retry failed ones")
+    p.add_argument("--profile", nargs="?", const="", metavar="DIR",
+                   help="Profile the parse stage with cProfile and tracemalloc "
+                        "(reports go to DIR, default <output stem>.profile/)")
+    p.add_argument("--worker", action="store_true",
+                   help="Distributed mode: lease items from the shared queue (distributed: in the config) "
+                        "and process them until the coordinator's frontier is drained")
+    p.add_argument("--worker-id", help="Worker name in the queue (default: host-pid-random)")
+    p.add_argument("--replay", nargs="?", const="", metavar="ARCHIVE",
+                   help="Re-parse the pages of a page archive (archive: in the config) without fetching "
+                        "anything (default ARCHIVE: archive.path, else <output stem>.warc.gz)")
+    p.add_argument("--export", nargs="?", const="", metavar="PATH",
+                   help="Write the result store (store: in the config) to PATH without crawling; "
+                        "format by extension (default PATH: output_path)")
+    p.add_argument("--since", type=float, metavar="HOURS",
+                   help="With --export: only records added or changed in the last HOURS")
     return p.parse_args()
 
 
@@ -39,108 +73,660 @@ def instantiate_crawler(config: Dict[str, Any]):
     full = config.get("crawler_class")
     if not full:
         raise KeyError("crawler_class is missing in config")
-    module_name, class_name = full.rsplit(".", 1)
-    module = importlib.import_module(module_name)
-    CrawlerClass = getattr(module, class_name)
+    CrawlerClass = load_crawler_class(full)
     return CrawlerClass(config)
 
 
-def main() -> None:
-    args = parse_args()
+def start_crawler(config: Dict[str, Any], scheduler: Optional[GlobalScheduler] = None, wait: bool = True):
+    """
+    Instantiate a crawler, within the batch's browser budget when there is a scheduler
+    (None if `wait` is False and no browser is free).
+    """
+    if scheduler is None:
+        return instantiate_crawler(config)
+    return scheduler.start_crawler(lambda: instantiate_crawler(config), int(config.get("priority", 0)), wait)
+
+
+def build_worker_crawlers(config: Dict[str, Any], primary, concurrency: int,
+                          scheduler: Optional[GlobalScheduler] = None) -> List[Any]:
+    """
+    Return `concurrency` crawler instances for the detail stage.
+    The primary crawler (which already ran the list stage) is reused as worker 0;
+    every extra worker gets its own instance and therefore its own WebDriver/session.
+    With `primary=None` (the list stage is still paging), all workers are new instances.
+    In a batch, extra workers are only started while the shared browser budget allows.
+    """
+    crawlers = [primary] if primary is not None else []
+    for n in range(len(crawlers), concurrency):
+        try:
+            worker = start_crawler(config, scheduler, wait=False)
+        except Exception:
+            logger.exception("Failed to start detail worker %d; continuing with %d worker(s)", n + 1, len(crawlers))
+            break
+        if worker is None:
+            logger.info("No free browser for detail worker %d; continuing with %d worker(s)", n + 1, len(crawlers))
+            break
+        crawlers.append(worker)
+    return crawlers
+
+
+def quit_driver(crawler, scheduler: Optional[GlobalScheduler] = None) -> None:
     try:
-        config = load_config(args.config)
-    except Exception as e:
-        logger.exception("Failed to load config: %s", e)
-        return
+        if crawler.quit_driver():
+            logger.info("WebDriver quit.")
+    except Exception:
+        logger.exception("Error quitting WebDriver (ignored)")
+    fetcher = getattr(crawler, "_fetcher", None)
+    if fetcher is not None:
+        fetcher.close()
+    if scheduler is not None:
+        scheduler.release_crawler(crawler)
 
-    output = config.get("output_path") or config.get("output") or "data/output.csv"
-    ensure_parent_dir(output)
 
+def write_debug_page(config: Dict[str, Any], html: Any) -> None:
+    """
+    Save a list page that yielded no items, for writing selectors against.
+    """
+    debug_path = config.get("debug_page") or "data/debug_page1.html"
+    ensure_parent_dir(debug_path)
     try:
-        crawler = instantiate_crawler(config)
-    except Exception as e:
-        logger.exception("Failed to instantiate crawler: %s", e)
-        return
+        Path(debug_path).write_text(html, encoding="utf-8")
+        logger.warning("No items parsed — wrote debug page to %s", debug_path)
+    except Exception:
+        logger.exception("Failed to write debug page")
 
-    if not hasattr(crawler, "results") or crawler.results is None:
-        crawler.results = []
 
+def run_list_stage(crawler, config: Dict[str, Any]) -> List[Any]:
+    """
+    Steps 1-2: fetch list pages and parse them into detail items.
+    """
     # 1) fetch list pages
     try:
-        html_list = crawler.fetch_list()
-        if not isinstance(html_list, list):
-            html_list = [html_list] if html_list else []
+        with METRICS.time("fetch_list"):
+            html_list = list(as_pages(crawler.fetch_list_cached()))
     except Exception:
         logger.exception("fetch_list() failed")
+        METRICS.inc("failures_total", stage="fetch_list")
         html_list = []
 
     logger.info("Fetched %d list page(s)", len(html_list))
 
     # 2) parse list -> items (urls)
     try:
-        items = crawler.parse_list(html_list)
-        if items is None:
-            items = []
+        with METRICS.time("parse_list"):
+            items = list(crawler.parse_list(html_list) or [])
     except Exception:
         logger.exception("parse_list() failed")
+        METRICS.inc("failures_total", stage="parse_list")
         items = []
 
     # Save debug page if no items parsed
     if not items and html_list:
-        debug_path = config.get("debug_page") or "data/debug_page1.html"
-        ensure_parent_dir(debug_path)
-        try:
-            Path(debug_path).write_text(html_list[0], encoding="utf-8")
-            logger.warning("No items parsed — wrote debug page to %s", debug_path)
-        except Exception:
-            logger.exception("Failed to write debug page")
+        write_debug_page(config, html_list[0])
 
     logger.info("Parsed %d items", len(items))
+    return items
 
-    # 3) fetch detail pages and parse
-    for idx, item in enumerate(items, start=1):
-        logger.info("[%d/%d] Processing %s", idx, len(items), repr(item))
-        if not isinstance(item, (str,)):
-            logger.warning("Skipping non-string item: %r", item)
-            continue
+
+def iter_list_stage(crawler, config: Dict[str, Any]) -> Iterator[List[Any]]:
+    """
+    Steps 1-2, streamed: fetch list pages one at a time and yield the items parsed
+    from each page before the next one is requested. `fetch_list`/`parse_list`
+    are timed per page.
+    """
+    pages = crawler.iter_list_pages()
+    first_page = None
+    n_pages = n_items = 0
+    while True:
+        started = time.perf_counter()
+        try:
+            html = next(pages, None)
+        except Exception:
+            logger.exception("fetch_list() failed after %d list page(s)", n_pages)
+            METRICS.inc("failures_total", stage="fetch_list")
+            break
+        if html is None:
+            break
+        METRICS.observe("fetch_list", time.perf_counter() - started)
+        n_pages += 1
+        if first_page is None:
+            first_page = html
         try:
-            html_detail = crawler.fetch_detail(item)
+            with METRICS.time("parse_list"):
+                items = list(crawler.parse_list([html]) or [])
         except Exception:
-            logger.exception("fetch_detail failed for %s", item)
+            logger.exception("parse_list() failed on list page %d", n_pages)
+            METRICS.inc("failures_total", stage="parse_list")
             continue
+        logger.info("List page %d: %d item(s)", n_pages, len(items))
+        n_items += len(items)
+        yield items
+
+    if not n_items and first_page is not None:
+        write_debug_page(config, first_page)
+    logger.info("Fetched %d list page(s), parsed %d items", n_pages, n_items)
+
+
+def drop_settled(items: List[Any], state: CrawlState, max_attempts: int) -> List[Any]:
+    """
+    `items` (as the frontier stores them) without those a previous attempt finished.
+    """
+    urls = [absolute_url(it) if isinstance(it, str) else it for it in items]
+    settled = state.settled(urls, max_attempts)
+    return [it for it in urls if not (isinstance(it, str) and it in settled)]
 
-        if not html_detail:
-            logger.warning("Empty detail HTML for %s", item)
+
+def stream_items(pages: Iterator[List[Any]], frontier, state: Optional[CrawlState],
+                 resume: bool = False, max_attempts: int = 3) -> Iterator[Any]:
+    """
+    Feed each list page's items through the frontier (and the checkpoint) and hand
+    them to the detail stage; the next list page is fetched once they are taken.
+    Items are recorded in the checkpoint as they stream in; the frontier is marked
+    complete only after the last page. When resuming an interrupted stream,
+    items the checkpoint has as finished are skipped.
+    """
+    skipped = 0
+    for page_items in pages:
+        if resume and state is not None:
+            listed = len(page_items)
+            page_items = drop_settled(page_items, state, max_attempts)
+            skipped += listed - len(page_items)
+        if not frontier.add_many(page_items):
             continue
+        if state is not None:
+            state.add_items(frontier.pending())
+        yield from frontier
+    if state is not None:
+        state.set_meta("frontier_complete", "1")
+    if skipped:
+        logger.info("Skipped %d item(s) finished by the previous attempt", skipped)
+    if frontier.duplicates:
+        logger.info("Frontier: %d item(s), %d duplicate(s) dropped", frontier.added, frontier.duplicates)
+
+
+def run_detail_items(crawlers: List[Any], items, config: Dict[str, Any], fetch: DetailFetcher,
+                     parse_pool=None):
+    """
+    The configured detail stage (pipelined or threaded) over `items`.
+    """
+    if (config.get("pipeline") or {}).get("enabled", False):
+        return run_pipeline(crawlers, items, config, fetch, parse_pool)
+    return run_detail_stage(crawlers, items, fetch)
+
+
+def run_worker(config: Dict[str, Any], output: str, worker_id: Optional[str]) -> None:
+    """
+    Distributed worker: lease items from the shared queue, fetch and parse them with
+    `concurrency` local crawlers and report results back, until the queue is drained.
+    Leases are renewed while items are in flight; if this process dies, its items
+    become available to other workers after `lease_seconds`.
+    """
+    dcfg = config.get("distributed") or {}
+    queue = open_queue(config, output)
+    worker_id = worker_id or default_worker_id()
+    batch = max(1, int(dcfg.get("lease_batch", 2)))
+    poll_interval = float(dcfg.get("poll_interval", 2))
+
+    try:
+        crawler = instantiate_crawler(config)
+    except Exception as e:
+        logger.exception("Failed to instantiate crawler: %s", e)
+        return
+    crawlers = build_worker_crawlers(config, crawler, max(1, int(config.get("concurrency") or 1)))
+
+    exporter: Optional[MetricsExporter] = None
+    metrics_cfg = config.get("metrics") or {}
+    if metrics_cfg.get("enabled", True):
+        exporter = MetricsExporter(f"{default_metrics_path(config, output)}.{worker_id}",
+                                   interval=metrics_cfg.get("interval", 30)).start()
 
+    logger.info("Worker %s started with %d crawler(s)", worker_id, len(crawlers))
+    keeper = LeaseKeeper(queue, worker_id).start()
+    fetch = DetailFetcher(config)
+    # one parse pool for all passes, so its processes are not respawned on every poll
+    parse_pool = open_parse_pool(config) if (config.get("pipeline") or {}).get("enabled", False) else None
+    processed = 0
+    try:
+        while True:
+            # one pass lasts until the queue is momentarily empty, then in-flight items finish
+            results = run_detail_items(crawlers, iter_leased(queue, keeper, batch), config, fetch, parse_pool)
+            for idx, item, records, error in results:
+                if error:
+                    queue.fail(worker_id, item, error)
+                else:
+                    queue.complete(worker_id, item, records)
+                keeper.release(item)
+                processed += 1
+                METRICS.inc("items_total", status="failed" if error else "done")
+                METRICS.inc("records_total", len(records))
+            if queue.drained():
+                break
+            time.sleep(poll_interval)
+    finally:
+        keeper.stop()
+        if parse_pool is not None:
+            parse_pool.shutdown(wait=True)
+        for c in crawlers:
+            quit_driver(c)
+        queue.shutdown()
+        if exporter is not None:
+            exporter.stop()
+    logger.info("Worker %s done: processed %d item(s); stage timings: %s",
+                worker_id, processed, METRICS.summary_line())
+
+
+def run_replay_mode(config: Dict[str, Any], output: str, archive_path: str) -> None:
+    """
+    Offline re-parse: run `parse_list` over the archived list pages (or take every
+    archived detail page if no list pages were archived), then `parse_detail` over
+    the archived detail pages in parallel, and save. No browser or session is
+    started and nothing is fetched; checkpoint, frontier and incremental index
+    of the live crawl are left untouched.
+    """
+    try:
+        archive = PageArchive(archive_path, readonly=True)
+    except FileNotFoundError as e:
+        logger.error("%s (enable archive: in the config and crawl first)", e)
+        return
+    try:
+        check_sink(output, config)
+    except (ImportError, ValueError) as e:
+        logger.error("Cannot write the output, not replaying: %s", e)
+        return
+    crawler = load_crawler_class(config["crawler_class"]).for_parsing(config)
+    logger.info("Replaying %s: %s", archive_path, archive.counts())
+
+    list_pages = [html for _, html in archive.iter_pages(LIST)]
+    if list_pages:
         try:
-            rec = crawler.parse_detail(html_detail)
+            with METRICS.time("parse_list"):
+                listed = list(crawler.parse_list(list_pages) or [])
         except Exception:
-            logger.exception("parse_detail failed for %s", item)
-            continue
+            logger.exception("parse_list() failed on the archived list pages")
+            METRICS.inc("failures_total", stage="parse_list")
+            listed = []
+        logger.info("Parsed %d items from %d archived list page(s)", len(listed), len(list_pages))
+    else:
+        listed = [url for url, _, _ in archive.entries(DETAIL)]
+        logger.info("No archived list pages; replaying all %d archived detail page(s)", len(listed))
+    # same canonical dedupe as a live run, in memory
+    frontier = Frontier(strip_params=(config.get("frontier") or {}).get("strip_params", ()))
+    frontier.add_many(listed)
+    items = list(frontier)
+    frontier.close()
 
-        if isinstance(rec, dict):
-            crawler.results.append(rec)
-        elif isinstance(rec, list):
-            crawler.results.extend(rec)
+    if config.get("stream_output", True):
+        try:
+            crawler.open_sink(output)
+        except Exception:
+            logger.exception("Failed to open output sink; collecting results in memory")
+    failed = 0
+    try:
+        for idx, item, records, error in run_replay(crawler, archive, items, config):
+            for rec in records:
+                crawler.emit(rec, item)
+            failed += bool(error)
+            METRICS.inc("items_total", status="failed" if error else "done")
+            METRICS.inc("records_total", len(records))
+    except BaseException:
+        if crawler.sink is not None:
+            crawler.sink.abort()
+        raise
+    finally:
+        archive.close()
+
+    try:
+        with METRICS.time("save"):
+            crawler.save(output)
+        logger.info("Replayed %d item(s), %d failed", len(items), failed)
+    except Exception:
+        logger.exception("Failed to save results")
+    logger.info("Stage timings: %s", METRICS.summary_line())
+
+
+def export_store(config: Dict[str, Any], path: str, since_hours: Optional[float] = None) -> None:
+    """
+    Write the result store to `path` (any output format), optionally only the
+    records added or changed in the last `since_hours`.
+    """
+    store = shared_store(config)
+    if store is None:
+        logger.error("No result store configured (store: in the config)")
+        return
+    since = time.time() - since_hours * 3600 if since_hours else None
+    ensure_parent_dir(path)
+    written = store.export(path, config, since)
+    logger.info("Exported %d of %d stored record(s) from %s", written, len(store), store.path)
+    store.close()
+
+
+def output_path_of(config: Dict[str, Any]) -> str:
+    return config.get("output_path") or config.get("output") or "data/output.csv"
+
+
+def run_crawl(config: Dict[str, Any], config_path: str, resume: bool = False, profile: Optional[str] = None,
+              scheduler: Optional[GlobalScheduler] = None, export_metrics: bool = True) -> None:
+    """
+    One complete crawl of `config`: list stage, detail stage, save. In a batch,
+    browsers and detail fetches are taken from the shared `scheduler`.
+    """
+    output = output_path_of(config)
+    ensure_parent_dir(output)
+    try:
+        # an unusable output format fails here, not after the whole crawl
+        check_sink(output, config)
+    except (ImportError, ValueError) as e:
+        logger.error("Cannot write the output, not crawling: %s", e)
+        return
+    try:
+        crawler = start_crawler(config, scheduler)
+    except Exception as e:
+        logger.exception("Failed to instantiate crawler: %s", e)
+        return
+
+    if not hasattr(crawler, "results") or crawler.results is None:
+        crawler.results = []
+
+    # Metrics: JSON summary + Prometheus text file, refreshed every `metrics.interval` seconds
+    exporter: Optional[MetricsExporter] = None
+    metrics_cfg = config.get("metrics") or {}
+    if export_metrics and metrics_cfg.get("enabled", True):
+        exporter = MetricsExporter(default_metrics_path(config, output),
+                                   interval=metrics_cfg.get("interval", 30)).start()
+
+    if profile is not None:
+        # in the config so pipeline parse workers pick it up too
+        profile_cfg = dict(config.get("profile") or {})
+        profile_cfg["dir"] = profile or os.path.splitext(output)[0] + ".profile"
+        config["profile"] = profile_cfg
+        shared_profiler(config).clear()
+
+    state: Optional[CrawlState] = None
+    if config.get("checkpoint", True):
+        state = CrawlState(default_state_path(config, output))
+    max_attempts = int(config.get("max_attempts", 3))
+
+    # Detail items go through an on-disk frontier: canonical URLs, deduped, by priority
+    frontier = open_frontier(config, output)
+    distributed = (config.get("distributed") or {}).get("enabled", False)
+    resuming = resume and state is not None and state.has_frontier
+    # an interrupted streamed run: its frontier was recorded only up to the last list page read
+    continuing = resume and state is not None and not resuming and state.has_items
+    if resume and not resuming and not continuing:
+        logger.warning("Nothing to resume (no recorded frontier); starting a full run")
+    # a generator fetch_list is consumed page by page, overlapping pagination with the
+    # detail stage; incremental selection and distributed publishing need the whole list
+    streaming = not resuming and crawler.streams_list and crawler.seen_index is None and not distributed
+    if resuming:
+        # 1-2) reuse the recorded frontier instead of crawling the list pages again
+        frontier.add_many(state.items_to_process(max_attempts))
+        logger.info("Resuming from %s: %s; %d item(s) left", state.path, state.counts(), len(frontier))
+        items = frontier
+    elif streaming:
+        # 1-2) list pages are fetched and parsed as the detail stage asks for items
+        if continuing:
+            logger.info("Resuming a partial frontier from %s: %s; re-reading the list pages",
+                        state.path, state.counts())
+        elif state is not None:
+            state.reset()
+        items = stream_items(iter_list_stage(crawler, config), frontier, state, continuing, max_attempts)
+    else:
+        items = run_list_stage(crawler, config)
+        if crawler.seen_index is not None:
+            listed = len(items)
+            items = crawler.seen_index.select_for_fetch(
+                [absolute_url(it) if isinstance(it, str) else it for it in items])
+            logger.info("Incremental mode: fetching %d of %d listed item(s)", len(items), listed)
+        if continuing:
+            listed = len(items)
+            items = drop_settled(items, state, max_attempts)
+            logger.info("Resuming a partial frontier from %s: %d of %d listed item(s) left",
+                        state.path, len(items), listed)
+        frontier.add_many(items)
+        if frontier.duplicates:
+            logger.info("Frontier: %d item(s), %d duplicate(s) dropped", frontier.added, frontier.duplicates)
+        if state is not None:
+            if not continuing:
+                state.reset()
+            state.save_frontier(frontier.pending())
+        items = frontier
+
+    # Stream records to the output file as they are produced (unless disabled)
+    if config.get("stream_output", True):
+        try:
+            crawler.open_sink(output)
+        except Exception:
+            logger.exception("Failed to open output sink; collecting results in memory")
+
+    # Records of items finished by a previous attempt come from the state store
+    # (a result store already holds them)
+    if resume and state is not None and crawler.store is None:
+        for rec in state.iter_done_records():
+            crawler.emit(rec)
+
+    # 3) fetch detail pages and parse - here, or on `run.py --worker` processes in distributed mode
+    if distributed:
+        crawlers = [crawler]
+    elif streaming:
+        # the primary crawler keeps paging the list, so details get their own instances
+        crawlers = build_worker_crawlers(config, None, max(1, int(config.get("concurrency") or 1)), scheduler)
+        if not crawlers:
+            logger.warning("No detail worker started; finishing the list stage before fetching details")
+            items = list(items)
+            crawlers = [crawler]
+    else:
+        concurrency = max(1, int(config.get("concurrency") or 1))
+        concurrency = min(concurrency, max(1, len(items)))
+        crawlers = build_worker_crawlers(config, crawler, concurrency, scheduler)
+    # every crawler whose browser must be quit at the end
+    owned = crawlers if crawler in crawlers else [crawler] + crawlers
+    seen_index = crawler.seen_index
+    changes: Dict[str, int] = {}
+    try:
+        if distributed:
+            queue = open_queue(config, output)
+            queue.reset()
+            published = [it for it in items if isinstance(it, str)]
+            queue.publish(published)
+            queue.close()
+            logger.info("Published %d item(s) to job %r; start workers with: run.py -c %s --worker",
+                        len(published), queue.job, config_path)
+            results = iter_results(queue, published,
+                                   float((config.get("distributed") or {}).get("poll_interval", 2)))
         else:
-            logger.warning("parse_detail returned unsupported type %s for %s", type(rec), item)
+            results = run_detail_items(crawlers, items, config, DetailFetcher(config, scheduler))
+        for idx, item, records, error in results:
+            if seen_index is not None and isinstance(item, str) and not error:
+                change = seen_index.classify(item, records)
+                changes[change] = changes.get(change, 0) + 1
+                if change == "unchanged":
+                    records = []
+            for rec in records:
+                crawler.emit(rec, item)
+            METRICS.inc("items_total", status="failed" if error else "done")
+            METRICS.inc("records_total", len(records))
+            if state is not None and isinstance(item, str):
+                if error:
+                    state.mark_failed(item, error)
+                else:
+                    state.mark_done(item, records)
+    except BaseException:
+        # keep what was streamed so far, then quit browsers and re-raise
+        if crawler.sink is not None:
+            crawler.sink.abort()
+        for c in owned:
+            quit_driver(c, scheduler)
+        if exporter is not None:
+            exporter.stop()
+        raise
+
+    if seen_index is not None:
+        logger.info("Incremental changes: %s", changes)
 
     # 4) save
     try:
         ensure_parent_dir(output)
-        crawler.save(output)
-        logger.info("Saved %d records to %s", len(crawler.results), output)
+        with METRICS.time("save"):
+            crawler.save(output)
     except Exception:
         logger.exception("Failed to save results")
+        METRICS.inc("failures_total", stage="save")
+
+    # 5) quit driver(s)
+    for c in owned:
+        quit_driver(c, scheduler)
+
+    frontier.close()
+    if state is not None:
+        logger.info("Crawl state: %s (resume with --resume)", state.counts())
+        state.close()
+
+    if scheduler is None:
+        logger.info("Stage timings: %s", METRICS.summary_line())
+    if exporter is not None:
+        exporter.stop()
+        logger.info("Metrics written to %s.json / .prom", exporter.path_prefix)
+    profiler = shared_profiler(config)
+    if profiler is not None:
+        profiler.report()
+
+
+def load_batch(path: Optional[str], config_paths: List[str]) -> Tuple[Dict[str, Any], List[Tuple[str, int]]]:
+    """
+    Scheduler settings and (config path, priority) jobs from a batch file plus
+    `-c` configs. Config paths are relative to the working directory, as with `-c`.
+
+    batch:
+      workers: 8            # detail fetches in flight across all jobs
+      browsers: 2           # crawler instances with a WebDriver across all jobs
+      per_host: 2           # detail fetches in flight per host
+      max_jobs: 4           # crawls running at once (default: all)
+    jobs:
+      - examples/ai_lit_config.yaml                          # priority from the config (default 0)
+      - {config: examples/climate_lit_config.yaml, priority: 10}
+    """
+    batch_cfg: Dict[str, Any] = {}
+    jobs: List[Tuple[str, Optional[int]]] = []
+    if path:
+        data = load_config(path)
+        batch_cfg = data.get("batch") or {}
+        for job in data.get("jobs") or []:
+            if isinstance(job, str):
+                job = {"config": job}
+            jobs.append((job["config"], job.get("priority")))
+    jobs += [(p, None) for p in config_paths]
+    return batch_cfg, jobs
 
-    # 5) quit driver
+
+def run_batch(batch_cfg: Dict[str, Any], jobs: List[Tuple[str, Optional[int]]], resume: bool = False,
+              profile: Optional[str] = None) -> None:
+    """
+    Run several crawls concurrently in this process under one GlobalScheduler:
+    they share the browser budget and the detail-fetch slots (globally and per
+    host), which go to the highest-priority job first. Each job writes its own
+    output, checkpoint and frontier; metrics are exported once for the batch.
+    """
+    configs: List[Tuple[str, Dict[str, Any], Optional[str]]] = []
+    outputs: Dict[str, str] = {}
+    profile_dirs: set = set()
+    for path, priority in jobs:
+        try:
+            config = load_config(path)
+        except Exception as e:
+            logger.exception("Failed to load config %s: %s", path, e)
+            continue
+        if priority is not None:
+            config["priority"] = int(priority)
+        output = os.path.abspath(output_path_of(config))
+        if output in outputs:
+            logger.error("%s writes to %s like %s; skipping it", path, output, outputs[output])
+            continue
+        outputs[output] = path
+        job_profile = profile
+        if profile:
+            # each job clears its profile directory: give every job its own under --profile DIR
+            name = base = os.path.splitext(os.path.basename(output))[0]
+            n = 1
+            while name in profile_dirs:
+                n += 1
+                name = f"{base}-{n}"
+            profile_dirs.add(name)
+            job_profile = os.path.join(profile, name)
+        configs.append((path, config, job_profile))
+    if not configs:
+        return
+    # highest priority starts first; max_jobs bounds how many run at once
+    configs.sort(key=lambda job: -int(job[1].get("priority", 0)))
+    scheduler = GlobalScheduler.from_config(batch_cfg)
+
+    exporter: Optional[MetricsExporter] = None
+    metrics_cfg = batch_cfg.get("metrics") or {}
+    if metrics_cfg.get("enabled", True):
+        exporter = MetricsExporter(metrics_cfg.get("path") or "data/batch.metrics",
+                                   interval=metrics_cfg.get("interval", 30)).start()
+
+    def job(path: str, config: Dict[str, Any], profile: Optional[str]) -> None:
+        started = time.perf_counter()
+        logger.info("Batch job %s started (priority %s)", path, config.get("priority", 0))
+        try:
+            run_crawl(config, path, resume=resume, profile=profile, scheduler=scheduler, export_metrics=False)
+        except Exception:
+            logger.exception("Batch job %s failed", path)
+            return
+        logger.info("Batch job %s finished in %.1fs", path, time.perf_counter() - started)
+
+    max_jobs = int(batch_cfg.get("max_jobs") or len(configs))
+    logger.info("Running %d crawl(s): %d at a time, %d fetch slot(s), %d browser(s), %s per host",
+                len(configs), max_jobs, scheduler.fetches.capacity, scheduler.browsers.capacity,
+                scheduler.fetches.per_key or "no limit")
     try:
-        if hasattr(crawler, "driver"):
-            crawler.driver.quit()
-            logger.info("WebDriver quit.")
-    except Exception:
-        logger.exception("Error quitting WebDriver (ignored)")
+        with ThreadPoolExecutor(max_workers=max_jobs, thread_name_prefix="job") as pool:
+            for path, config, job_profile in configs:
+                pool.submit(job, path, config, job_profile)
+    finally:
+        logger.info("Stage timings: %s", METRICS.summary_line())
+        if exporter is not None:
+            exporter.stop()
+            logger.info("Metrics written to %s.json / .prom", exporter.path_prefix)
+
+
+def main() -> None:
+    args = parse_args()
+    if args.batch or len(args.config) > 1:
+        if args.worker or args.replay is not None or args.export is not None:
+            logger.error("--worker, --replay and --export take a single --config")
+            return
+        try:
+            batch_cfg, jobs = load_batch(args.batch, args.config)
+        except Exception as e:
+            logger.exception("Failed to load batch: %s", e)
+            return
+        run_batch(batch_cfg, jobs, resume=args.resume, profile=args.profile)
+        return
+    if not args.config:
+        logger.error("Pass a config with -c (or several, or --batch)")
+        return
+
+    config_path = args.config[0]
+    try:
+        config = load_config(config_path)
+    except Exception as e:
+        logger.exception("Failed to load config: %s", e)
+        return
+
+    output = output_path_of(config)
+    ensure_parent_dir(output)
+
+    if args.worker:
+        run_worker(config, output, args.worker_id)
+        return
+    if args.replay is not None:
+        run_replay_mode(config, output, args.replay or default_archive_path(config, output))
+        return
+    if args.export is not None:
+        export_store(config, args.export or output, args.since)
+        return
+    run_crawl(config, config_path, resume=args.resume, profile=args.profile)
 
 
 if __name__ == "__main__":
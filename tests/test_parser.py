@@ -0,0 +1,44 @@
+import pytest
+
+from core.parser import extract_fields, strainer_for
+
+HTML = """
+<html><body>
+  <h1 class="title">Case</h1>
+  <h2>Facts</h2><p>sib</p><p>second</p>
+  <div class="meta"><span>first</span><span>last</span></div>
+  <ul><li>a</li><li>b</li></ul>
+  <a class="doc" href="http://example.org/a:b.pdf">PDF</a>
+</body></html>
+"""
+
+SELECTORS = {
+    "title": "h1.title",
+    "adjacent": "h2 + p",
+    "general": "h2 ~ p",
+    "first_span": "div.meta span:first-child",
+    "last_li": "li:last-of-type",
+    "has": "div:has(span)",
+    "child": "div.meta > span",
+    "fallback": "h3 || h1",
+    "pdf": ("a.doc", "href"),
+    "colon_in_attr": 'a[href$="a:b.pdf"]',
+}
+
+
+@pytest.mark.parametrize("backend", ["html.parser", "lxml"])
+@pytest.mark.parametrize("field", sorted(SELECTORS))
+def test_strained_extraction_matches_unstrained(backend, field):
+    selectors = {field: SELECTORS[field]}
+    expected = extract_fields(HTML, selectors, backend=backend)
+    assert expected[field] is not None
+    assert extract_fields(HTML, selectors, backend=backend, strain=True) == expected
+
+
+@pytest.mark.parametrize("selector", ["h2 + p", "h2 ~ p", "li:first-child", "div:has(span)"])
+def test_no_strainer_for_context_dependent_selectors(selector):
+    assert strainer_for(["h1.title", selector]) is None
+
+
+def test_strainer_for_plain_selectors():
+    assert strainer_for(["h1.title", "div.meta > span", 'a[href$="a:b.pdf"]']) is not None
@@ -0,0 +1,109 @@
+import http.server
+import threading
+
+import pytest
+
+from core.fetcher import HttpStatusError, PageFetcher
+from core.ratelimit import HostRateLimiter
+
+URL = "http://example.org/case"
+
+
+def limiter(**kwargs):
+    options = dict(rate=1.0, adaptive=True, min_rate=0.25, max_rate=2.0, increase=0.5, decrease=0.5)
+    options.update(kwargs)
+    return HostRateLimiter(**options)
+
+
+@pytest.mark.parametrize("status", [200, 301, 304, 404, 410])
+def test_healthy_responses_add_increase(status):
+    lim = limiter()
+    lim.feedback(URL, status=status)
+    assert lim.current_rate(URL) == 1.5
+
+
+def test_rate_is_capped_at_max_rate():
+    lim = limiter()
+    for _ in range(5):
+        lim.feedback(URL, status=200)
+    assert lim.current_rate(URL) == 2.0
+
+
+@pytest.mark.parametrize("status", [429, 500, 502, 503, 504])
+def test_throttling_and_server_errors_multiply_by_decrease(status):
+    lim = limiter()
+    lim.feedback(URL, status=status)
+    assert lim.current_rate(URL) == 0.5
+
+
+def test_rate_is_floored_at_min_rate():
+    lim = limiter()
+    for _ in range(5):
+        lim.feedback(URL, status=503)
+    assert lim.current_rate(URL) == 0.25
+
+
+@pytest.mark.parametrize("status", [400, 401, 403])
+def test_other_client_errors_leave_the_rate_alone(status):
+    lim = limiter()
+    lim.feedback(URL, status=status)
+    assert lim.current_rate(URL) == 1.0
+
+
+def test_connection_errors_and_slow_responses_back_off():
+    lim = limiter(latency_target=2.0)
+    lim.feedback(URL, error=True)
+    assert lim.current_rate(URL) == 0.5
+    lim.feedback(URL, status=200, latency=5.0)
+    assert lim.current_rate(URL) == 0.25
+    lim.feedback(URL, status=200, latency=0.1)
+    assert lim.current_rate(URL) == 0.75
+
+
+def test_hosts_adapt_independently():
+    lim = limiter()
+    lim.feedback(URL, status=429)
+    assert lim.current_rate("http://other.org/") == 1.0
+
+
+def test_fixed_rate_ignores_feedback():
+    lim = limiter(adaptive=False)
+    lim.feedback(URL, status=503)
+    assert lim.current_rate(URL) == 1.0
+
+
+class StatusHandler(http.server.BaseHTTPRequestHandler):
+    # GET /<status> answers with that status
+    def do_GET(self):
+        self.send_response(int(self.path.strip("/")))
+        self.end_headers()
+        self.wfile.write(b"<html></html>")
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def status_server():
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), StatusHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.parametrize("status", [429, 500, 502, 503, 504])
+def test_fetcher_raises_on_backoff_statuses_without_the_browser(status_server, status):
+    fallbacks = []
+    fetcher = PageFetcher({"http": {"enabled": True}})
+    with pytest.raises(HttpStatusError) as err:
+        fetcher.fetch(f"{status_server}/{status}", fallback=fallbacks.append)
+    assert err.value.status == status
+    assert fallbacks == []
+    fetcher.close()
+
+
+def test_fetcher_falls_back_to_the_browser_on_404(status_server):
+    fetcher = PageFetcher({"http": {"enabled": True}})
+    assert fetcher.fetch(f"{status_server}/404", fallback=lambda url: "browser") == "browser"
+    fetcher.close()
@@ -0,0 +1,79 @@
+import json
+import threading
+
+import pytest
+
+import run
+from bench.crawlers import HttpAILitCrawler
+from bench.fixture_site import FixtureSite
+from core.state import CrawlState, default_state_path
+
+FETCHED = []
+_LOCK = threading.Lock()
+
+
+class InterruptingCrawler(HttpAILitCrawler):
+    """
+    Stops the crawl (as Ctrl-C would) when asked for list page `interrupt_at_page`.
+    """
+
+    def fetch_list(self):
+        stop = self.config.get("interrupt_at_page")
+        for n, html in enumerate(super().fetch_list(), start=1):
+            if n == stop:
+                raise KeyboardInterrupt
+            yield html
+
+    def fetch_detail(self, url):
+        with _LOCK:
+            FETCHED.append(url)
+        return super().fetch_detail(url)
+
+
+@pytest.fixture
+def site():
+    with FixtureSite(cases=20, per_page=10) as s:
+        yield s
+
+
+def make_config(site, tmp_path, **extra):
+    config = {
+        "crawler_class": f"{__name__}.InterruptingCrawler",
+        "base_url": site.base_url + "/ai-lit/",
+        "pagination": {"start_page": 1, "max_pages": 10},
+        "http": {"enabled": True},
+        "retry": {"times": 2, "backoff": 0.01},
+        "concurrency": 1,
+        "output_path": str(tmp_path / "out.jsonl"),
+        "metrics": {"enabled": False},
+    }
+    config.update(extra)
+    return config
+
+
+def test_resume_after_interrupt_mid_stream(site, tmp_path):
+    FETCHED.clear()
+    config = make_config(site, tmp_path, interrupt_at_page=2)
+    with pytest.raises(KeyboardInterrupt):
+        run.run_crawl(config, "test.yaml")
+    first = list(FETCHED)
+    assert len(first) == 10
+
+    state = CrawlState(default_state_path(config, config["output_path"]))
+    assert state.counts() == {"done": 10}
+    assert not state.has_frontier
+    state.close()
+
+    FETCHED.clear()
+    run.run_crawl(make_config(site, tmp_path), "test.yaml", resume=True)
+    # only the items of the unread list page are fetched
+    assert len(FETCHED) == 10
+    assert not set(FETCHED) & set(first)
+
+    with open(config["output_path"], encoding="utf-8") as fh:
+        records = [json.loads(line) for line in fh]
+    assert len(records) == 20
+    state = CrawlState(default_state_path(config, config["output_path"]))
+    assert state.counts() == {"done": 20}
+    assert state.has_frontier
+    state.close()
@@ -0,0 +1,153 @@
+import pytest
+
+import core.utils as utils
+from core.fetcher import HttpStatusError
+from core.utils import CircuitBreaker, CircuitOpenError, RetryPolicy, call_with_retry
+from examples.climate_lit_crawler import ClimateLitCrawler
+
+
+class FakeClock:
+    """
+    Stands in for the `time` module in core.utils: sleeping advances the clock.
+    """
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(utils, "time", fake)
+    return fake
+
+
+class Flaky:
+    """
+    Raises the given errors in turn, then returns "ok".
+    """
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def __call__(self, url):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+
+def test_delay_grows_by_factor_and_is_capped():
+    policy = RetryPolicy(times=6, backoff=1.0, factor=2.0, max_delay=5.0)
+    assert [policy.delay(n) for n in range(1, 6)] == [1.0, 2.0, 4.0, 5.0, 5.0]
+
+
+def test_jitter_only_shortens_the_delay():
+    policy = RetryPolicy(backoff=4.0, jitter=0.5)
+    for _ in range(50):
+        assert 2.0 <= policy.delay(1) <= 4.0
+
+
+def test_retry_after_wins_over_a_shorter_backoff_but_not_max_delay():
+    policy = RetryPolicy(backoff=1.0, max_delay=30.0)
+    assert policy.delay(1, HttpStatusError("http://h/x", 429, "10")) == 10.0
+    assert policy.delay(1, HttpStatusError("http://h/x", 503, "120")) == 30.0
+
+
+def test_retries_until_success(clock):
+    fetch = Flaky(ConnectionError("reset"), ConnectionError("reset"))
+    assert call_with_retry(fetch, "http://h/x", policy=RetryPolicy(times=3, backoff=1.0)) == "ok"
+    assert fetch.calls == 3
+    assert clock.sleeps == [1.0, 2.0]
+
+
+def test_gives_up_after_times_attempts(clock):
+    fetch = Flaky(*[ConnectionError("reset")] * 5)
+    with pytest.raises(ConnectionError):
+        call_with_retry(fetch, "http://h/x", policy=RetryPolicy(times=3))
+    assert fetch.calls == 3
+
+
+def test_most_specific_policy_wins_and_names_match_yaml_keys(clock):
+    fetch = Flaky(*[HttpStatusError("http://h/x", 503)] * 4)
+    policies = {Exception: RetryPolicy(times=2), "HttpStatusError": RetryPolicy(times=5)}
+    assert call_with_retry(fetch, "http://h/x", policies=policies) == "ok"
+    assert fetch.calls == 5
+
+
+def test_errors_outside_exceptions_are_not_retried(clock):
+    fetch = Flaky(KeyError("x"))
+    with pytest.raises(KeyError):
+        call_with_retry(fetch, "http://h/x", exceptions=(ConnectionError,))
+    assert fetch.calls == 1
+
+
+def test_breaker_opens_after_threshold_consecutive_failures(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60)
+    for _ in range(2):
+        breaker.record_failure("h")
+    assert breaker.state("h") == "closed"
+    breaker.record_success("h")
+    for _ in range(2):
+        breaker.record_failure("h")
+    assert breaker.state("h") == "closed"  # the success reset the count
+    breaker.record_failure("h")
+    assert breaker.state("h") == "open"
+    with pytest.raises(CircuitOpenError) as err:
+        breaker.before_call("h")
+    assert err.value.retry_after == pytest.approx(60)
+    breaker.before_call("other")  # hosts are independent
+
+
+def test_breaker_half_open_lets_one_probe_through(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    breaker.record_failure("h")
+    clock.now += 61
+    breaker.before_call("h")
+    assert breaker.state("h") == "half-open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call("h")  # a second caller while the probe runs
+    breaker.record_success("h")
+    assert breaker.state("h") == "closed"
+    breaker.before_call("h")
+
+
+def test_failed_probe_reopens_the_circuit(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60)
+    for _ in range(3):
+        breaker.record_failure("h")
+    clock.now += 61
+    breaker.before_call("h")
+    breaker.record_failure("h")
+    assert breaker.state("h") == "open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call("h")
+
+
+def test_open_circuit_fails_fast_without_retrying(clock):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    fetch = Flaky(*[ConnectionError("reset")] * 10)
+    with pytest.raises(CircuitOpenError):
+        call_with_retry(fetch, "http://h/x", policy=RetryPolicy(times=5), breaker=breaker, host="h")
+    assert fetch.calls == 2
+    with pytest.raises(CircuitOpenError):
+        call_with_retry(fetch, "http://h/x", policy=RetryPolicy(times=5), breaker=breaker, host="h")
+    assert fetch.calls == 2
+
+
+def test_climate_fetch_detail_lets_failures_reach_the_retry_policy(clock, monkeypatch):
+    crawler = ClimateLitCrawler({})
+    fetch = Flaky(ConnectionError("reset"), TimeoutError("render"))
+    monkeypatch.setattr(crawler, "fetch_page", lambda url, fallback=None: fetch(url))
+    assert call_with_retry(crawler.fetch_detail, "http://h/case", policy=RetryPolicy(times=3)) == "ok"
+    assert fetch.calls == 3
+    assert crawler.fetch_detail("  ") == ""
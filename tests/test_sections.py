@@ -0,0 +1,107 @@
+from typing import Dict
+
+import pytest
+
+from bench.corpus import ai_lit_detail_page
+from core.parser import make_soup
+from examples.ai_lit_crawler import AILitCrawler
+
+
+# parse_detail of AILitCrawler before the section index, kept as the reference
+def parse_dt_dd_pairs(dl) -> Dict[str, str]:
+    data = {}
+    last_dt = None
+    for tag in dl.find_all(["dt", "dd"], class_=["cbResultSetListViewDataLabel", "cbResultSetData"]):
+        if tag.name == "dt":
+            last_dt = tag.get_text(strip=True)
+        elif tag.name == "dd" and last_dt:
+            txt = tag.get_text(strip=True)
+            if not txt or txt == "\xa0":
+                data[last_dt] = "NA"
+            else:
+                a = tag.find("a")
+                if a and a.get("href"):
+                    data[last_dt] = f"{a.get_text(strip=True)} ({a['href']})"
+                else:
+                    data[last_dt] = txt
+            last_dt = None
+    return data
+
+
+def reference_parse_detail(html: str, backend: str) -> Dict:
+    soup = make_soup(html, backend)
+    record = {}
+    for dl in soup.find_all("dl", {"data-cb-name": "DataCtnr"}):
+        record.update(parse_dt_dd_pairs(dl))
+
+    def find_section_text(key):
+        hdr = soup.find(lambda t: t.name in ["h2", "h3"] and key in t.get_text(strip=True).lower())
+        if hdr:
+            nxt = hdr.find_next("article")
+            if nxt:
+                return "\n".join(p.get_text(strip=True) for p in nxt.find_all("p")) or "NA"
+        return None
+
+    sf = find_section_text("facts and activity to date")
+    if sf:
+        record["Summary of Facts and Activity to Date"] = sf
+    ss = find_section_text("significance")
+    if ss:
+        record["Summary of Significance"] = ss
+
+    dockets = []
+    hdr = soup.find(lambda t: t.name in ["h2", "h3"] and "dockets" in t.get_text(strip=True).lower())
+    if hdr:
+        art = hdr.find_next("article")
+        if art:
+            for dl in art.find_all("dl", {"data-cb-name": "DataCtnr"}):
+                dockets.append(parse_dt_dd_pairs(dl))
+    record["Dockets"] = dockets or "NA"
+
+    docs = []
+    hdrs = soup.find_all(lambda t: t.name in ["h2", "h3"] and "documents" in t.get_text(strip=True).lower())
+    if hdrs:
+        art = hdrs[-1].find_next("article")
+        if art:
+            for dl in art.find_all("dl", {"data-cb-name": "DataCtnr"}):
+                docs.append(parse_dt_dd_pairs(dl))
+    record["Documents"] = docs or "NA"
+    return record
+
+
+def dl(pairs: Dict[str, str]) -> str:
+    cells = "".join(f'<dt class="cbResultSetListViewDataLabel">{k}</dt><dd class="cbResultSetData">{v}</dd>'
+                    for k, v in pairs.items())
+    return f'<dl data-cb-name="DataCtnr">{cells}</dl>'
+
+
+# no significance section, an empty facts article, no dockets, two "documents" headings
+EDGE_PAGE = (
+    "<html><body>"
+    + dl({"Caption": "Doe v. Robot", "Status": "&nbsp;", "Case Link": '<a href="/case/1">Docket</a>'})
+    + "<h3>Summary of Facts and Activity to Date</h3><article><div>no paragraphs</div></article>"
+    + "<h2>Related Documents</h2><article>" + dl({"Document": "old"}) + "</article>"
+    + "<h2>Documents</h2><article>"
+    + dl({"Document": "Complaint", "Date": "2023-01-02", "Link": '<a href="/d.pdf">PDF</a>'})
+    + dl({"Document": "Order", "Date": "", "Link": "none"})
+    + "</article></body></html>"
+)
+
+
+def crawler(backend: str) -> AILitCrawler:
+    return AILitCrawler.for_parsing({"parser": {"backend": backend}})
+
+
+@pytest.mark.parametrize("backend", ["html.parser", "lxml"])
+@pytest.mark.parametrize("case_id", [1, 2, 7, 23])
+def test_section_index_matches_old_parse_detail(backend, case_id):
+    html = ai_lit_detail_page(case_id)
+    assert crawler(backend).parse_detail(html) == reference_parse_detail(html, backend)
+
+
+@pytest.mark.parametrize("backend", ["html.parser", "lxml"])
+def test_section_index_matches_old_parse_detail_on_edge_cases(backend):
+    record = crawler(backend).parse_detail(EDGE_PAGE)
+    assert record == reference_parse_detail(EDGE_PAGE, backend)
+    assert record["Dockets"] == "NA"
+    assert [d["Document"] for d in record["Documents"]] == ["Complaint", "Order"]
@@ -0,0 +1,113 @@
+import sqlite3
+
+import pytest
+
+import core.taskqueue as taskqueue
+from core.taskqueue import RedisWorkQueue, SqliteWorkQueue
+
+
+class FakeClock:
+    """
+    Stands in for the `time` module in core.taskqueue.
+    """
+
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(taskqueue, "time", fake)
+    return fake
+
+
+@pytest.fixture(params=["sqlite", "redis"])
+def make_queue(request, tmp_path, clock):
+    def make(lease_seconds=60, max_attempts=2):
+        if request.param == "sqlite":
+            queue = SqliteWorkQueue(str(tmp_path / "q.sqlite"), job="t",
+                                    lease_seconds=lease_seconds, max_attempts=max_attempts)
+        else:
+            fakeredis = pytest.importorskip("fakeredis")
+            queue = RedisWorkQueue(fakeredis.FakeRedis(), job="t",
+                                   lease_seconds=lease_seconds, max_attempts=max_attempts)
+        queue.reset()
+        return queue
+    return make
+
+
+def test_leased_items_are_not_handed_out_twice(make_queue):
+    queue = make_queue()
+    assert queue.publish(["a", "b", "c"]) == 3
+    assert queue.publish(["a"]) == 0
+    assert queue.lease("w1", 2) == ["a", "b"]
+    assert queue.lease("w2", 2) == ["c"]
+    assert queue.lease("w3", 2) == []
+
+
+def test_expired_lease_goes_to_another_worker(make_queue, clock):
+    queue = make_queue()
+    queue.publish(["a"])
+    assert queue.lease("w1") == ["a"]
+    clock.now += 61
+    assert queue.counts()["pending"] == 1
+    assert queue.lease("w2") == ["a"]
+    queue.fail("w1", "a", "late")  # w1 no longer owns it
+    queue.complete("w2", "a", [{"id": 1}])
+    assert queue.take_results() == [("a", [{"id": 1}], None)]
+
+
+def test_renew_keeps_the_lease(make_queue, clock):
+    queue = make_queue()
+    queue.publish(["a"])
+    queue.lease("w1")
+    clock.now += 50
+    queue.renew("w1", ["a"])
+    clock.now += 50
+    assert queue.lease("w2") == []
+    queue.renew("w2", ["a"])  # not the owner: no effect
+    clock.now += 11
+    assert queue.lease("w2") == ["a"]
+
+
+def test_failed_items_are_retried_until_max_attempts(make_queue):
+    queue = make_queue(max_attempts=2)
+    queue.publish(["a"])
+    queue.lease("w1")
+    queue.fail("w1", "a", "boom")
+    assert queue.take_results() == []
+    assert queue.lease("w1") == ["a"]
+    queue.fail("w1", "a", "boom again")
+    assert queue.take_results() == [("a", [], "boom again")]
+    assert queue.lease("w1") == []
+
+
+def test_lease_expiring_max_attempts_times_fails_the_item(make_queue, clock):
+    queue = make_queue(max_attempts=2)
+    queue.publish(["a"])
+    queue.close()
+    for worker in ("w1", "w2"):
+        assert queue.lease(worker) == ["a"]
+        clock.now += 61
+    assert queue.lease("w3") == []
+    [(item, records, error)] = queue.take_results()
+    assert (item, records) == ("a", [])
+    assert "expired" in error
+    assert queue.drained()
+
+
+def test_sqlite_renew_recovers_after_a_failed_transaction(tmp_path, clock):
+    queue = SqliteWorkQueue(str(tmp_path / "q.sqlite"), job="t", lease_seconds=60)
+    queue.reset()
+    queue.publish(["a"])
+    queue.lease("w1")
+    with pytest.raises(sqlite3.Error):
+        queue.renew("w1", [object()])
+    clock.now += 50
+    queue.renew("w1", ["a"])
+    clock.now += 50
+    assert queue.lease("w2") == []